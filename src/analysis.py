@@ -1,36 +1,31 @@
+import json
 import click
-import numpy as np
-import pandas as pd
-from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LogisticRegression
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import RandomForestClassifier
-from src.train_evaluate_models import train_evaluate_models
-from src.plot_roc import plot_roc_curves
-@click.command()
-@click.argument('path_train', type = str)
-@click.argument('path_test', type = str)
-@click.argument('path_save', type = str)
+from src.frame_io import read_frame
+from src.instrument import stage, traced, traced_command
 
-def main(path_train, path_test, path_save):
-    # Real the train and test datasets
-    train_df = pd.read_csv(path_train)
-    test_df = pd.read_csv(path_test)
-    feature_columns = ['fixed acidity', 'volatile acidity', 'citric acid', 'residual sugar',
-                       'chlorides', 'free sulfur dioxide', 'total sulfur dioxide', 'density',
-                       'pH', 'sulphates', 'alcohol']  
-    
-    # Split into X and y
-    X_train = train_df[feature_columns]
-    y_train = train_df['quality_binary']
+def build_models(params = None):
+    """
+    Create the unfitted models compared by the analysis.
 
-    X_test = test_df[feature_columns]
-    y_test = test_df['quality_binary']
-    
-    # Scale features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
+    Parameters
+    ----------
+    params : dict[str, dict], optional
+        Hyperparameters that override the defaults, keyed by model name,
+        e.g. the best configurations written by `tune.py`.
+
+    Returns
+    -------
+    dict[str, sklearn.base.BaseEstimator]
+        The models keyed by display name.
+
+    Raises
+    ------
+    KeyError
+        If `params` names an unknown model.
+    """
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.tree import DecisionTreeClassifier
+    from sklearn.ensemble import RandomForestClassifier
 
     # Initialize models with class balancing
     models = {
@@ -55,15 +50,168 @@ def main(path_train, path_test, path_save):
             class_weight='balanced'
         )
     }
+    for name, model_params in (params or {}).items():
+        if name not in models:
+            raise KeyError(f"Unknown model '{name}'; available models: {list(models)}.")
+        models[name].set_params(**model_params)
+    return models
+
+@traced()
+def analyze(train_df, test_df, feature_columns, path_save, params = None, executor = 'serial', max_workers = None,
+            cache = None, model_dir = None, draft = False, dpi = 300, dtype = 'float64', bootstrap = 0,
+            bootstrap_jobs = 1):
+    """
+    Scale the features, train and evaluate the models, and write the metrics and ROC curves.
+
+    The features are scaled from compact `WineDataset` matrices, so the only
+    copies made are the scaled train and test matrices, in the dataset's dtype.
+
+    Parameters
+    ----------
+    train_df, test_df : pandas.DataFrame or WineDataset
+        Train and test data with `feature_columns` and 'quality_binary'; frames
+        are converted with `WineDataset.from_frame`.
+    feature_columns : list[str]
+        The feature columns, in the order the scaler is fitted on.
+    path_save : str
+        Directory of model_performance_metrics.csv, curve_summary.csv, calibration_curves.csv
+        and roc_curves.png.
+    params : dict[str, dict], optional
+        Hyperparameters overriding the defaults of `build_models`.
+    executor : str, optional
+        How the models are fitted, see `train_evaluate_models` (default is 'serial').
+    max_workers : int, optional
+        Maximum number of concurrent model fits.
+    cache : ArtifactCache, optional
+        Cache of the fitted scaler and models; its statistics are written to cache_stats.csv.
+    model_dir : str, optional
+        Directory where the fitted scaler and models are saved for inference.
+    draft : bool, optional
+        Save the ROC curves as a vector roc_curves.svg instead of a PNG (default is False).
+    dpi : float, optional
+        Resolution of roc_curves.png (default is 300).
+    dtype : str, optional
+        Dtype of the feature matrices built from frames (default is 'float64',
+        which keeps the published results; 'float32' halves their memory).
+    bootstrap : int, optional
+        Number of bootstrap resamples of the test set for the 95% confidence
+        intervals written next to the metrics (default is 0, none).
+    bootstrap_jobs : int, optional
+        Number of processes sharing the bootstrap resamples (default is 1).
+
+    Returns
+    -------
+    results : list[dict]
+        The metrics of every model.
+    scaler : sklearn.preprocessing.StandardScaler
+        The fitted scaler.
+    trained_models : dict[str, sklearn.base.BaseEstimator]
+        The fitted models.
+    """
+    import pandas as pd
+    from sklearn.preprocessing import StandardScaler
+    from src.train_evaluate_models import train_evaluate_models
+    from src.plot_roc import plot_roc_curves
+    from src.model_store import save_models
+    from src.curves import curve_summary
+    from src.wine_dataset import as_dataset
+
+    # Compact feature matrices; the scaler sees views of them with the feature names
+    train = as_dataset(train_df, feature_columns, dtype)
+    test = as_dataset(test_df, feature_columns, dtype)
+    X_train = train.frame(target = None)
+    y_train = train.y
+
+    X_test = test.frame(target = None)
+    y_test = test.y
+    
+    # Scale features, reusing a cached scaler fitted on the same training data
+    with stage('scale_features'):
+        scaler = StandardScaler()
+        if cache is None:
+            X_train_scaled = scaler.fit_transform(X_train)
+        else:
+            scaler, hit = cache.fit(scaler, X_train)
+            cache.record(hit)
+            X_train_scaled = scaler.transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
+
+    # Initialize models with class balancing, overriding tuned hyperparameters
+    models = build_models(params)
 
     # Train models and store results
-    results, trained_models = train_evaluate_models(models, X_train_scaled, y_train, X_test_scaled, y_test)
+    results, trained_models, curves = train_evaluate_models(models, X_train_scaled, y_train, X_test_scaled, y_test,
+                                                            executor = executor, max_workers = max_workers,
+                                                            return_curves = True, cache = cache,
+                                                            bootstrap = bootstrap, bootstrap_jobs = bootstrap_jobs)
     
     # Save the results as a dataframe
     pd.DataFrame(results).to_csv(path_save+"/model_performance_metrics.csv",index = False)
+    if cache is not None:
+        pd.DataFrame([cache.stats()]).to_csv(path_save+"/cache_stats.csv", index = False)
+
+    # Threshold-free summaries and calibration bins of every model
+    pd.DataFrame(curve_summary(curves)).to_csv(path_save+"/curve_summary.csv", index = False)
+    calibration = [{'Model': name, 'Mean Predicted': pred, 'Fraction Positive': true, 'Count': count}
+                   for name, curve in curves.items()
+                   for pred, true, count in zip(curve['prob_pred'], curve['prob_true'], curve['bin_count'])]
+    pd.DataFrame(calibration).to_csv(path_save+"/calibration_curves.csv", index = False)
+
+    # Plot ROC curves, reusing the curves computed while scoring
+    plot_roc_curves(trained_models, X_test_scaled, y_test, path_save, 'roc_curves.svg' if draft else 'roc_curves.png',
+                    curves = curves, dpi = dpi)
+
+    # Persist the fitted scaler and models for the scoring and serving entry points
+    if model_dir is not None:
+        with stage('save_models'):
+            save_models(scaler, trained_models, feature_columns, model_dir)
+    return results, scaler, trained_models
+
+@click.command()
+@click.argument('path_train', type = str)
+@click.argument('path_test', type = str)
+@click.argument('path_save', type = str)
+@click.option('--executor', type = click.Choice(['serial', 'thread', 'process', 'joblib']), default = 'serial',
+              help = 'How the models are fitted and scored.')
+@click.option('--max-workers', type = int, default = None, help = 'Maximum number of concurrent model fits.')
+@click.option('--cache-dir', type = str, default = None,
+              help = 'Directory of the fitted scaler and model cache (disabled by default).')
+@click.option('--cache-max-mb', type = float, default = 1024, help = 'Size limit of the cache in MB.')
+@click.option('--model-dir', type = str, default = None,
+              help = 'Directory where the fitted scaler and models are saved for inference.')
+@click.option('--params', 'path_params', type = str, default = None,
+              help = 'JSON file of tuned hyperparameters per model, as written by tune.py.')
+@click.option('--draft', is_flag = True, help = 'Save the ROC curves as a quick vector SVG instead of a PNG.')
+@click.option('--dpi', type = float, default = 300, help = 'Resolution of the ROC curve PNG.')
+@click.option('--dtype', type = click.Choice(['float32', 'float64']), default = 'float64',
+              help = 'Dtype of the compact feature matrices.')
+@click.option('--bootstrap', type = int, default = 0,
+              help = 'Bootstrap resamples of the test set for 95% confidence intervals of the metrics (0 for none).')
+@click.option('--bootstrap-jobs', type = int, default = 1, help = 'Processes sharing the bootstrap resamples.')
+@traced_command('analysis')
+
+def main(path_train, path_test, path_save, executor, max_workers, cache_dir, cache_max_mb, model_dir, path_params,
+         draft, dpi, dtype, bootstrap, bootstrap_jobs):
+    from src.artifact_cache import ArtifactCache
+
+    feature_columns = ['fixed acidity', 'volatile acidity', 'citric acid', 'residual sugar',
+                       'chlorides', 'free sulfur dioxide', 'total sulfur dioxide', 'density',
+                       'pH', 'sulphates', 'alcohol']  
+
+    params = None
+    if path_params is not None:
+        with open(path_params) as f:
+            params = json.load(f)
+
+    # Read the train and test datasets (CSV, Feather or Parquet), loading only
+    # the features and target; Feather files are memory-mapped
+    with stage('read_data'):
+        train_df = read_frame(path_train, columns = feature_columns + ['quality_binary'])
+        test_df = read_frame(path_test, columns = feature_columns + ['quality_binary'])
 
-    # Plot ROC curves
-    plot_roc_curves(trained_models, X_test_scaled, y_test, path_save)
+    cache = None if cache_dir is None else ArtifactCache(cache_dir, int(cache_max_mb * 2 ** 20))
+    analyze(train_df, test_df, feature_columns, path_save, params, executor, max_workers, cache, model_dir, draft,
+            dpi, dtype, bootstrap, bootstrap_jobs)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import platform
+import tempfile
+import joblib
+import numpy as np
+import sklearn
+
+class ArtifactCache:
+    """
+    Content-addressed on-disk cache of fitted scikit-learn estimators.
+
+    An entry is keyed by a SHA-256 hash of the training data, the estimator's
+    class and `get_params()`, and the Python, NumPy and scikit-learn versions,
+    so any change to the data, the hyperparameters or the libraries is a miss.
+    Entries are evicted least recently used first once the cache grows past
+    `max_bytes`; a hit refreshes the entry's modification time.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Directory holding the cached estimators; created if missing.
+    max_bytes : int, optional
+        Size limit of the cache in bytes (default is None, unbounded).
+    """
+
+    def __init__(self, cache_dir, max_bytes = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok = True)
+
+    def key(self, estimator, X, y = None):
+        """
+        Fingerprint of an unfitted estimator and its training data.
+        """
+        h = hashlib.sha256()
+        for part in (type(estimator).__module__, type(estimator).__qualname__,
+                     repr(sorted(estimator.get_params(deep = True).items())),
+                     platform.python_version(), np.__version__, sklearn.__version__):
+            h.update(part.encode())
+            h.update(b'\0')
+        for data in (X, y):
+            if data is None:
+                h.update(b'none')
+                continue
+            # Column names end up in the fitted estimator, so they are part of the key
+            if hasattr(data, 'columns'):
+                h.update(repr(list(data.columns)).encode())
+            array = np.ascontiguousarray(np.asarray(data))
+            h.update(f'{array.dtype.str}{array.shape}'.encode())
+            if array.dtype == object:
+                h.update(repr(array.tolist()).encode())
+            else:
+                h.update(memoryview(array).cast('B'))
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.joblib')
+
+    def load(self, key):
+        """
+        Return the cached estimator for `key`, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            estimator = joblib.load(path)
+        except (FileNotFoundError, EOFError):
+            return None
+        os.utime(path)
+        return estimator
+
+    def store(self, key, estimator):
+        """
+        Save a fitted estimator under `key` and evict old entries if needed.
+        """
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir = self.cache_dir, suffix = '.tmp')
+        os.close(fd)
+        try:
+            joblib.dump(estimator, tmp_path)
+            os.replace(tmp_path, self._path(key))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict()
+
+    def entries(self):
+        """
+        Cached entries as (path, size in bytes, modification time), oldest first.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.joblib'):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key = lambda entry: entry[2])
+
+    def evict(self):
+        """
+        Delete the least recently used entries until the cache fits in `max_bytes`.
+        """
+        if self.max_bytes is None:
+            return
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def fit(self, estimator, X, y = None):
+        """
+        Load `estimator` fitted on (X, y) from the cache, or fit and cache it.
+
+        Hit and miss counts are not updated here, since this may run in a
+        worker process; pass the returned flag to `record`.
+
+        Returns
+        -------
+        estimator : sklearn.base.BaseEstimator
+            The fitted estimator (a loaded copy on a hit).
+        hit : bool
+            Whether the estimator came from the cache.
+        """
+        key = self.key(estimator, X, y)
+        cached = self.load(key)
+        if cached is not None:
+            return cached, True
+
+        if y is None:
+            estimator.fit(X)
+        else:
+            estimator.fit(X, y)
+        self.store(key, estimator)
+        return estimator, False
+
+    def record(self, hit):
+        """
+        Count a hit or a miss.
+        """
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self):
+        """
+        Hit and miss counts with the current number and size of entries.
+        """
+        entries = self.entries()
+        return {
+            'Hits': self.hits,
+            'Misses': self.misses,
+            'Entries': len(entries),
+            'Size (MB)': sum(size for _, size, _ in entries) / 2 ** 20
+        }
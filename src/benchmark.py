@@ -0,0 +1,316 @@
+import datetime
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+from functools import partial
+import click
+from src.analysis import build_models
+from src.data_processing import wine_schema
+from src.frame_io import FORMATS, read_frame, write_frame_chunks
+from src.instrument import Tracer
+from src.read_csv import FEATURE_DTYPES
+
+STAGES = ('ingest', 'validate', 'split', 'train', 'score', 'plot')
+
+def generate_dataset(path_source, n_rows, path_save, jitter = 0.01, seed = 2025, chunksize = 1_000_000):
+    """
+    Write a synthetic wine dataset of `n_rows` rows by resampling and jittering real data.
+
+    Rows of the source are drawn with replacement and every feature gets
+    Gaussian noise with `jitter` times the column's standard deviation, clipped
+    at the column minimum, so the data keeps the schema, the feature
+    distributions and the class balance of the source without exact duplicates.
+    The quality scores are resampled unchanged. Rows are generated and written
+    `chunksize` at a time, so memory does not grow with `n_rows`.
+
+    Parameters
+    ----------
+    path_source : str
+        Raw wine data (CSV, Feather or Parquet) with the 11 features and 'quality'.
+    n_rows : int
+        Number of rows to generate.
+    path_save : str
+        Output file; the format is taken from its extension.
+    jitter : float, optional
+        Noise level relative to each feature's standard deviation (default is 0.01).
+    seed : int, optional
+        Seed of the resampling and the noise (default is 2025).
+    chunksize : int, optional
+        Rows generated per chunk (default is 1_000_000).
+
+    Returns
+    -------
+    int
+        Number of rows written.
+    """
+    import numpy as np
+    import pandas as pd
+
+    feature_columns = list(FEATURE_DTYPES)
+    source = read_frame(path_source, columns = feature_columns + ['quality'])
+    values = source[feature_columns].to_numpy(dtype = float)
+    quality = source['quality'].to_numpy()
+    scale = jitter * values.std(axis = 0)
+    lower = values.min(axis = 0)
+
+    def chunks():
+        rng = np.random.default_rng(seed)
+        for start in range(0, n_rows, chunksize):
+            n = min(chunksize, n_rows - start)
+            idx = rng.integers(len(source), size = n)
+            X = values[idx] + rng.standard_normal((n, len(feature_columns))) * scale
+            np.maximum(X, lower, out = X)
+            chunk = pd.DataFrame(X, columns = feature_columns)
+            chunk['quality'] = quality[idx]
+            yield chunk
+
+    return write_frame_chunks(chunks(), path_save)
+
+def benchmark_dataset(path_read, repeat = 1, max_train_rows = 100_000):
+    """
+    Time every pipeline stage on one dataset.
+
+    The stages mirror `data_processing.py` and `analysis.py`: reading the
+    file, validating it with the pipeline's schema and validation engine,
+    the stratified split, scaling and fitting the models on (at most
+    `max_train_rows` rows of) the train set, scoring the full test set with
+    every model, and plotting the ROC curves. Validation errors are not
+    logged. Each stage keeps its fastest run over `repeat` repetitions.
+
+    Parameters
+    ----------
+    path_read : str
+        Dataset written by `generate_dataset` (or raw wine data).
+    repeat : int, optional
+        Number of repetitions (default is 1).
+    max_train_rows : int, optional
+        Cap on the rows the models are fitted on, to keep large sizes tractable (default is 100_000).
+
+    Returns
+    -------
+    list[dict]
+        One record per stage with 'dataset', 'rows', 'stage', 'wall_s',
+        'cpu_s', 'max_rss_mb' (the process's peak RSS after the stage), and
+        'frame_mb' and 'dataset_mb', the memory of the ingested data as a
+        pandas frame and as a compact `WineDataset`.
+    """
+    import matplotlib.pyplot as plt
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+    from src.binary_metrics import positive_proba
+    from src.plot_roc import plot_roc_curves
+    from src.train_evaluate_models import train_evaluate_models
+    from src.val_data_handle_error import val_data_handle_error
+    from src.validation_engine import wine_failures
+    from src.wine_dataset import WineDataset, memory_report
+
+    feature_columns = list(FEATURE_DTYPES)
+    best = {}
+    memory = None
+    logging.disable(logging.ERROR)
+    try:
+        for _ in range(repeat):
+            tracer = Tracer('benchmark', trace_memory = False)
+            with tracer.span('ingest'):
+                df = read_frame(path_read)
+                df['quality_binary'] = df['quality'] >= 7
+                n_rows = len(df)
+            if memory is None:
+                memory = memory_report(df, WineDataset.from_frame(df, feature_columns))
+
+            with tracer.span('validate'):
+                validated_df = val_data_handle_error(df, wine_schema(),
+                                                     engine = partial(wine_failures,
+                                                                      feature_columns = feature_columns))
+
+            with tracer.span('split'):
+                train_df, test_df = train_test_split(validated_df, test_size = 0.2, random_state = 2025,
+                                                     stratify = validated_df['quality_binary'])
+
+            with tracer.span('train'):
+                if len(train_df) > max_train_rows:
+                    train_df = train_df.sample(max_train_rows, random_state = 2025)
+                train = WineDataset.from_frame(train_df, feature_columns)
+                test = WineDataset.from_frame(test_df, feature_columns)
+                scaler = StandardScaler().fit(train.X)
+                X_train_scaled = scaler.transform(train.X)
+                X_test_scaled = scaler.transform(test.X)
+                y_test = test.y
+                _, trained_models, curves = train_evaluate_models(build_models(), X_train_scaled, train.y,
+                                                                  X_test_scaled, y_test, return_curves = True)
+
+            with tracer.span('score'):
+                for model in trained_models.values():
+                    positive_proba(model, X_test_scaled)
+
+            with tracer.span('plot'), tempfile.TemporaryDirectory() as tmp_dir:
+                fig, _ = plot_roc_curves(trained_models, X_test_scaled, y_test, tmp_dir, curves = curves)
+                plt.close(fig)
+
+            for span in tracer.spans:
+                if span['name'] not in best or span['wall_s'] < best[span['name']]['wall_s']:
+                    best[span['name']] = span
+            del df, validated_df, train_df, test_df, train, test
+    finally:
+        logging.disable(logging.NOTSET)
+
+    return [{
+        'dataset': os.path.basename(path_read),
+        'rows': n_rows,
+        'stage': name,
+        'wall_s': best[name]['wall_s'],
+        'cpu_s': best[name]['cpu_s'],
+        'max_rss_mb': best[name]['max_rss_mb'],
+        'frame_mb': memory['frame_mb'],
+        'dataset_mb': memory['dataset_mb']
+    } for name in STAGES]
+
+def run_benchmarks(paths, repeat = 1, max_train_rows = 100_000, isolate = True):
+    """
+    Benchmark several datasets and collect the results with the environment.
+
+    Parameters
+    ----------
+    paths : list[str]
+        Datasets to benchmark, e.g. from smallest to largest.
+    repeat : int, optional
+        Number of repetitions per dataset (default is 1).
+    max_train_rows : int, optional
+        Cap on the rows the models are fitted on (default is 100_000).
+    isolate : bool, optional
+        Benchmark every dataset in a fresh process, so that the peak RSS of
+        one size is not carried over to the next (default is True).
+
+    Returns
+    -------
+    dict
+        'meta' (creation time, Python, library versions, platform, CPU count)
+        and 'results' (the records of `benchmark_dataset`).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+    import numpy as np
+    import pandas as pd
+    import sklearn
+
+    results = []
+    for path in paths:
+        if isolate:
+            with ProcessPoolExecutor(max_workers = 1, mp_context = get_context('spawn')) as pool:
+                results += pool.submit(benchmark_dataset, path, repeat, max_train_rows).result()
+        else:
+            results += benchmark_dataset(path, repeat, max_train_rows)
+
+    meta = {
+        'created': datetime.datetime.now().isoformat(timespec = 'seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'repeat': repeat,
+        'max_train_rows': max_train_rows
+    }
+    return {'meta': meta, 'results': results}
+
+def compare_runs(baseline, current, threshold = 0.2, min_seconds = 0.05):
+    """
+    Compare the stage timings of two benchmark runs.
+
+    A stage regresses when its wall time grows by more than `threshold`
+    (relative) and by more than `min_seconds` (absolute), so that the noise
+    of very fast stages is not reported. Stages are matched by row count and
+    stage name; stages missing from either run are ignored.
+
+    Parameters
+    ----------
+    baseline : dict
+        Baseline run, as returned by `run_benchmarks`.
+    current : dict
+        Run to check.
+    threshold : float, optional
+        Allowed relative slowdown (default is 0.2, i.e. 20%).
+    min_seconds : float, optional
+        Allowed absolute slowdown in seconds (default is 0.05).
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per matched stage with the baseline and current wall times,
+        their ratio and a 'regression' flag.
+    """
+    import pandas as pd
+
+    columns = ['rows', 'stage', 'wall_s']
+    merged = pd.merge(pd.DataFrame(baseline['results'])[columns], pd.DataFrame(current['results'])[columns],
+                      on = ['rows', 'stage'], suffixes = ('_baseline', '_current'))
+    merged['ratio'] = merged['wall_s_current'] / merged['wall_s_baseline']
+    merged['regression'] = ((merged['ratio'] > 1 + threshold)
+                            & (merged['wall_s_current'] - merged['wall_s_baseline'] > min_seconds))
+    return merged
+
+@click.group()
+def main():
+    """
+    Synthetic scale-up benchmarks of the pipeline stages.
+    """
+
+@main.command()
+@click.argument('path_source', type = str)
+@click.argument('path_save', type = str)
+@click.option('--rows', 'sizes', type = float, multiple = True, default = (1e4, 1e5, 1e6),
+              help = 'Dataset sizes to generate, e.g. --rows 1e4 --rows 1e8.')
+@click.option('--format', 'data_format', type = click.Choice(FORMATS), default = 'feather',
+              help = 'File format of the datasets.')
+@click.option('--jitter', type = float, default = 0.01, help = 'Noise relative to each feature\'s standard deviation.')
+@click.option('--seed', type = int, default = 2025)
+def generate(path_source, path_save, sizes, data_format, jitter, seed):
+    # Write one dataset per size, named wine_<rows>.<format>
+    os.makedirs(path_save, exist_ok = True)
+    for size in sizes:
+        path = os.path.join(path_save, f"wine_{int(size)}.{data_format}")
+        n_rows = generate_dataset(path_source, int(size), path, jitter, seed)
+        click.echo(f"Wrote {n_rows} rows to {path}")
+
+@main.command()
+@click.argument('paths', type = str, nargs = -1, required = True)
+@click.option('--output', type = str, required = True, help = 'JSON file of the results.')
+@click.option('--repeat', type = int, default = 1, help = 'Repetitions per dataset; the fastest run is kept.')
+@click.option('--max-train-rows', type = int, default = 100_000, help = 'Cap on the rows the models are fitted on.')
+@click.option('--isolate/--no-isolate', default = True, help = 'Benchmark every dataset in a fresh process.')
+def run(paths, output, repeat, max_train_rows, isolate):
+    run_results = run_benchmarks(list(paths), repeat, max_train_rows, isolate)
+    with open(output, 'w') as f:
+        json.dump(run_results, f, indent = 2)
+    import pandas as pd
+    table = pd.DataFrame(run_results['results']).pivot(index = 'rows', columns = 'stage', values = 'wall_s')
+    click.echo(table[list(STAGES)].round(3).to_string())
+    memory = pd.DataFrame(run_results['results']).groupby('rows')[['frame_mb', 'dataset_mb']].first()
+    click.echo("\nMemory of the ingested data (MB), as a pandas frame and as a compact dataset:")
+    click.echo(memory.round(2).to_string())
+
+@main.command()
+@click.argument('path_baseline', type = str)
+@click.argument('path_current', type = str)
+@click.option('--threshold', type = float, default = 0.2, help = 'Allowed relative slowdown of a stage.')
+@click.option('--min-seconds', type = float, default = 0.05, help = 'Allowed absolute slowdown of a stage.')
+def compare(path_baseline, path_current, threshold, min_seconds):
+    # Exit with status 1 if any stage regressed, so CI can gate on it
+    with open(path_baseline) as f:
+        baseline = json.load(f)
+    with open(path_current) as f:
+        current = json.load(f)
+    comparison = compare_runs(baseline, current, threshold, min_seconds)
+    click.echo(comparison.round(3).to_string(index = False))
+    n_regressions = int(comparison['regression'].sum())
+    if n_regressions:
+        click.echo(f"{n_regressions} stage(s) regressed by more than {threshold:.0%}.", err = True)
+        sys.exit(1)
+    click.echo("No regressions.")
+
+if __name__ == '__main__':
+    main()
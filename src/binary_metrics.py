@@ -0,0 +1,105 @@
+import numpy as np
+
+def positive_proba(model, X):
+    """
+    Return the positive-class probabilities and hard labels of a fitted classifier.
+
+    `predict_proba` is called once; the labels are derived from it the same
+    way sklearn's classifiers do it (the class with the largest probability),
+    so no separate `predict` call is needed.
+
+    Parameters
+    ----------
+    model : sklearn.base.ClassifierMixin
+        A fitted binary classifier exposing `predict_proba` and `classes_`.
+    X : array-like
+        Features to score.
+
+    Returns
+    -------
+    y_proba : numpy.ndarray
+        Probability of `model.classes_[1]` for every row.
+    y_pred : numpy.ndarray
+        Predicted labels, taken from `model.classes_`.
+    """
+    proba = model.predict_proba(X)
+    y_pred = model.classes_[np.argmax(proba, axis = 1)]
+    return proba[:, 1], y_pred
+
+def binary_metrics(y_true, y_score, y_pred, pos_label = 1, roc = True):
+    """
+    Compute classification metrics and the ROC curve from one sorted-score pass.
+
+    The scores are sorted once; the cumulative true/false positive counts at
+    every distinct threshold give the ROC curve and the AUC. Accuracy,
+    precision, recall and F1 come from the confusion counts of the hard labels,
+    so no sklearn metric function has to re-validate and re-scan the inputs.
+    Results match sklearn's `accuracy_score`, `precision_score`, `recall_score`,
+    `f1_score`, `roc_curve(drop_intermediate = False)` and `roc_auc_score`.
+
+    Parameters
+    ----------
+    y_true : array-like
+        True binary labels.
+    y_score : array-like
+        Scores for the positive class, e.g. from `positive_proba`.
+    y_pred : array-like
+        Hard predicted labels, e.g. from `positive_proba`.
+    pos_label : int or bool, optional
+        Label of the positive class (default is 1).
+    roc : bool, optional
+        Compute the ROC curve and AUC (default is True). Without it the scores
+        are not sorted, e.g. when `curves.model_curves` computes the curves of
+        several models at once.
+
+    Returns
+    -------
+    dict
+        Keys 'accuracy', 'precision', 'recall', 'f1', 'roc_auc', 'fpr', 'tpr'
+        and 'thresholds'; only the first four when `roc` is False.
+
+    Raises
+    ------
+    ValueError
+        If `y_true` contains a single class, since the ROC AUC is undefined.
+    """
+    y_true = np.asarray(y_true) == pos_label
+    y_pred = np.asarray(y_pred) == pos_label
+
+    n_pos = int(y_true.sum())
+    n_neg = y_true.size - n_pos
+
+    # Confusion counts for the hard labels
+    tp = int(np.count_nonzero(y_pred & y_true))
+    fp = int(np.count_nonzero(y_pred & ~y_true))
+    fn = n_pos - tp
+    tn = n_neg - fp
+
+    metrics = {
+        'accuracy': (tp + tn) / y_true.size,
+        'precision': tp / (tp + fp) if tp + fp else 0.0,
+        'recall': tp / n_pos if n_pos else 0.0,
+        'f1': 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 0.0
+    }
+    if not roc:
+        return metrics
+
+    if n_pos == 0 or n_neg == 0:
+        raise ValueError("Only one class present in y_true. ROC AUC score is not defined in that case.")
+    y_score = np.asarray(y_score, dtype = float)
+
+    # Single sort, highest score first
+    order = np.argsort(y_score, kind = 'mergesort')[::-1]
+    sorted_score = y_score[order]
+    sorted_true = y_true[order]
+
+    # Cumulative counts at the last position of every distinct score
+    distinct = np.r_[np.flatnonzero(np.diff(sorted_score)), sorted_true.size - 1]
+    tps = np.cumsum(sorted_true)[distinct]
+    fps = distinct + 1 - tps
+
+    fpr = np.r_[0.0, fps / n_neg]
+    tpr = np.r_[0.0, tps / n_pos]
+    thresholds = np.r_[np.inf, sorted_score[distinct]]
+    metrics.update(roc_auc = np.trapz(tpr, fpr), fpr = fpr, tpr = tpr, thresholds = thresholds)
+    return metrics
@@ -0,0 +1,180 @@
+import numpy as np
+from src.parallel import bounded_map
+
+METRICS = ('accuracy', 'precision', 'recall', 'f1', 'roc_auc')
+
+# Resampled rows per batch: a batch's index and weight matrices hold about this many entries
+BATCH_ENTRIES = 2 ** 22
+
+# Test set of the current process, set once by `_init`
+_STATE = {}
+
+def bootstrap_weights(rng, n_rows, n_boot):
+    """
+    Draw `n_boot` resamples of `n_rows` rows with replacement as one index matrix and count every row's draws.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+        Source of the resample indices.
+    n_rows : int
+        Number of rows of the data.
+    n_boot : int
+        Number of resamples.
+
+    Returns
+    -------
+    numpy.ndarray
+        Shape (n_boot, n_rows): how often each row appears in each resample.
+    """
+    indices = rng.integers(0, n_rows, size = (n_boot, n_rows))
+    indices += np.arange(n_boot)[:, None] * n_rows
+    return np.bincount(indices.ravel(), minlength = n_boot * n_rows).reshape(n_boot, n_rows).astype(np.float64)
+
+def label_metrics(weights, y_true, y_pred):
+    """
+    Accuracy, precision, recall and F1 of several models on weighted resamples.
+
+    Parameters
+    ----------
+    weights : numpy.ndarray
+        Row weights of every resample, shape (n_boot, n_rows).
+    y_true : numpy.ndarray
+        Boolean labels, shape (n_rows,).
+    y_pred : numpy.ndarray
+        Boolean predictions of every model, shape (n_rows, n_models).
+
+    Returns
+    -------
+    dict[str, numpy.ndarray]
+        'accuracy', 'precision', 'recall' and 'f1', each of shape (n_boot, n_models);
+        0 where the denominator is 0, like `binary_metrics`.
+    """
+    # All confusion counts of all resamples and models from a few matrix products
+    tp = weights @ (y_pred & y_true[:, None]).astype(np.float64)
+    fp = weights @ (y_pred & ~y_true[:, None]).astype(np.float64)
+    n_pos = (weights @ y_true.astype(np.float64))[:, None]
+    n = weights.sum(axis = 1)[:, None]
+    fn = n_pos - tp
+    tn = n - n_pos - fp
+
+    def ratio(num, den):
+        return np.divide(num, den, out = np.zeros_like(num), where = den > 0)
+
+    return {
+        'accuracy': (tp + tn) / n,
+        'precision': ratio(tp, tp + fp),
+        'recall': ratio(tp, n_pos),
+        'f1': ratio(2 * tp, 2 * tp + fp + fn)
+    }
+
+def rank_auc(weights, y_true, y_score):
+    """
+    ROC AUC of weighted resamples as the Mann-Whitney statistic with midranks.
+
+    The negatives are sorted by score once, and every positive's range of
+    lower and tied negatives is found once with `searchsorted`; each
+    resample then only takes a cumulative sum of its negative weights. A
+    positive wins against the negatives with lower scores and half of those
+    with the same score, which equals `binary_metrics`' trapezoidal AUC on
+    every resample.
+
+    Parameters
+    ----------
+    weights : numpy.ndarray
+        Row weights of every resample, shape (n_boot, n_rows).
+    y_true : numpy.ndarray
+        Boolean labels, shape (n_rows,).
+    y_score : numpy.ndarray
+        Positive-class scores of one model, shape (n_rows,).
+
+    Returns
+    -------
+    numpy.ndarray
+        AUC of every resample; NaN for a resample with a single class.
+    """
+    pos = np.flatnonzero(y_true)
+    neg = np.flatnonzero(~y_true)
+    neg = neg[np.argsort(y_score[neg], kind = 'mergesort')]
+    neg_score = y_score[neg]
+    below = np.searchsorted(neg_score, y_score[pos], side = 'left')
+    tied_or_below = np.searchsorted(neg_score, y_score[pos], side = 'right')
+
+    # Negative weight up to every sorted negative, with a leading 0
+    neg_cum = np.zeros((len(weights), len(neg) + 1))
+    np.cumsum(weights[:, neg], axis = 1, out = neg_cum[:, 1:])
+    pos_weights = weights[:, pos]
+
+    wins = np.sum(pos_weights * (neg_cum[:, below] + neg_cum[:, tied_or_below]), axis = 1) / 2
+    pairs = pos_weights.sum(axis = 1) * neg_cum[:, -1]
+    return np.divide(wins, pairs, out = np.full_like(wins, np.nan), where = pairs > 0)
+
+def _init(y_true, scores, y_pred):
+    _STATE.update(y_true = y_true, scores = scores, y_pred = y_pred)
+
+def _bootstrap_batch(item):
+    # Metrics of one batch of resamples; runs in a worker process when n_jobs > 1
+    seed, n_boot = item
+    y_true, scores = _STATE['y_true'], _STATE['scores']
+    weights = bootstrap_weights(np.random.default_rng(seed), len(y_true), n_boot)
+    values = label_metrics(weights, y_true, _STATE['y_pred'])
+    values['roc_auc'] = np.column_stack([rank_auc(weights, y_true, scores[:, j]) for j in range(scores.shape[1])])
+    return values
+
+def bootstrap_metrics(y_true, scores, y_pred, names = None, n_boot = 1000, alpha = 0.05, seed = 2025,
+                      n_jobs = 1, pos_label = 1):
+    """
+    Percentile bootstrap confidence intervals of accuracy, precision, recall, F1 and ROC AUC for several models.
+
+    All models are scored on the same resamples, drawn batch by batch as one
+    index matrix each and turned into row weights, so every metric of every
+    resample is a vectorized NumPy computation (matrix products for the
+    label metrics, `rank_auc` for the AUC) instead of a call to an sklearn
+    metric function. The batches are seeded from `seed` alone, so the
+    intervals do not depend on `n_jobs`.
+
+    Parameters
+    ----------
+    y_true : array-like
+        True binary labels of the test set.
+    scores : numpy.ndarray
+        Positive-class scores, one column per model.
+    y_pred : numpy.ndarray
+        Hard predicted labels, one column per model.
+    names : list[str], optional
+        Model names, in column order (default is 0, 1, ...).
+    n_boot : int, optional
+        Number of resamples (default is 1000).
+    alpha : float, optional
+        1 - confidence level of the intervals (default is 0.05).
+    seed : int, optional
+        Seed of the resamples (default is 2025).
+    n_jobs : int, optional
+        Number of worker processes sharing the batches (default is 1, no pool).
+    pos_label : int or bool, optional
+        Label of the positive class (default is 1).
+
+    Returns
+    -------
+    dict[str, dict[str, tuple[float, float]]]
+        (lower, upper) bound of every metric in `METRICS`, per model. Resamples
+        with a single class are left out of the AUC interval.
+    """
+    y_true = np.asarray(y_true) == pos_label
+    scores = np.asarray(scores, dtype = float).reshape(len(y_true), -1)
+    y_pred = np.asarray(y_pred).reshape(len(y_true), -1) == pos_label
+    names = list(range(scores.shape[1])) if names is None else list(names)
+
+    batch = max(1, min(n_boot, BATCH_ENTRIES // max(len(y_true), 1)))
+    sizes = [min(batch, n_boot - start) for start in range(0, n_boot, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    parts = list(bounded_map(_bootstrap_batch, zip(seeds, sizes), n_jobs, initializer = _init,
+                             initargs = (y_true, scores, y_pred)))
+    intervals = {name: {} for name in names}
+    for metric in METRICS:
+        values = np.concatenate([part[metric] for part in parts])
+        lower, upper = np.nanpercentile(values, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis = 0)
+        for j, name in enumerate(names):
+            intervals[name][metric] = (float(lower[j]), float(upper[j]))
+    return intervals
@@ -0,0 +1,338 @@
+import os
+import time
+import click
+
+# Node visits per traversal step; row blocks are sized so that all trees
+# times the block's rows stay within this many nodes
+BLOCK_NODES = 2 ** 16
+
+def _float32_floor(threshold):
+    """
+    Largest float32 not above each float64 threshold.
+
+    sklearn compares float32 features with float64 thresholds; for a float32
+    `x`, `x <= t` holds exactly when `x <= _float32_floor(t)`, so the
+    compiled comparison stays in float32 without flipping any split.
+    """
+    import numpy as np
+    rounded = threshold.astype(np.float32)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+class CompiledForest:
+    """
+    Fitted decision trees flattened into contiguous NumPy node arrays, with a vectorized batch predictor.
+
+    The nodes of all trees are concatenated, breadth first per tree so
+    that the right child of a split directly follows its left child:
+    `feature` and `threshold` of every split, `left`, the left child of
+    every node, and `value`, the class probabilities of every node. A leaf
+    is its own left child with an infinite threshold. `predict_proba` walks
+    all trees at once, one level per step, for a block of rows: each step
+    gathers the split feature of every (tree, row) pair and moves to
+    `left + (x > threshold)`, so a batch costs `max_depth` array operations
+    instead of one Python-level call per tree. Probabilities are averaged
+    over the trees like a `RandomForestClassifier`'s (for one tree they are
+    the tree's own).
+
+    Use `compile_trees` to build one from a fitted model.
+
+    Parameters
+    ----------
+    feature : numpy.ndarray
+        Split feature per node (0 for leaves).
+    threshold : numpy.ndarray
+        Split threshold per node, in float32 (see `_float32_floor`; inf for leaves).
+    left : numpy.ndarray
+        Left child per node, as a global node id; the right child is the next node.
+    value : numpy.ndarray
+        Class probabilities per node, shape (n_nodes, n_classes).
+    roots : numpy.ndarray
+        Root node of every tree.
+    max_depth : int
+        Depth of the deepest tree.
+    classes : numpy.ndarray
+        Class labels, like the model's `classes_`.
+    n_features : int
+        Number of input features.
+    """
+
+    def __init__(self, feature, threshold, left, value, roots, max_depth, classes, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.n_features_in_ = int(n_features)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in [self.feature, self.threshold, self.left, self.value, self.roots])
+
+    def apply(self, X):
+        """
+        Leaf node (global id) reached by every row in every tree, shape (n_trees, n_rows).
+        """
+        import numpy as np
+        X = self._check(X)
+        block = max(1, BLOCK_NODES // self.n_trees)
+        return np.concatenate([self._leaves(X[start:start + block]) for start in range(0, max(len(X), 1), block)],
+                              axis = 1)
+
+    def predict_proba(self, X):
+        """
+        Class probabilities, shape (n_rows, n_classes), as the model's `predict_proba`.
+        """
+        import numpy as np
+        X = self._check(X)
+        proba = np.empty((len(X), self.value.shape[1]))
+        block = max(1, BLOCK_NODES // self.n_trees)
+        for start in range(0, len(X), block):
+            leaves = self._leaves(X[start:start + block])
+            # Sum tree by tree, like the model averages its trees
+            proba[start:start + block] = self.value[leaves].sum(axis = 0)
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        import numpy as np
+        return self.classes_[np.argmax(self.predict_proba(X), axis = 1)]
+
+    def _check(self, X):
+        import numpy as np
+        # sklearn trees compare float32 features as well
+        X = np.ascontiguousarray(X, dtype = np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected rows of {self.n_features_in_} features, got shape {X.shape}.")
+        if np.isnan(X).any():
+            raise ValueError("Input X contains NaN.")
+        return X
+
+    def _leaves(self, X):
+        import numpy as np
+        n_rows = len(X)
+        flat = X.ravel()
+        row_start = np.arange(n_rows, dtype = np.intp) * self.n_features_in_
+        nodes = np.repeat(self.roots[:, None], n_rows, axis = 1)
+        for _ in range(self.max_depth):
+            right = flat[self.feature[nodes] + row_start] > self.threshold[nodes]
+            nodes = self.left[nodes]
+            nodes += right
+        return nodes
+
+    def save(self, path):
+        """
+        Write the node arrays to an uncompressed .npz file.
+        """
+        import numpy as np
+        np.savez(path, feature = self.feature, threshold = self.threshold, left = self.left,
+                 value = self.value, roots = self.roots, max_depth = self.max_depth, classes = self.classes_,
+                 n_features = self.n_features_in_)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a forest written by `save`.
+        """
+        import numpy as np
+        with np.load(path, allow_pickle = False) as arrays:
+            return cls(arrays['feature'], arrays['threshold'], arrays['left'], arrays['value'],
+                       arrays['roots'], int(arrays['max_depth']), arrays['classes'], int(arrays['n_features']))
+
+def is_tree_model(model):
+    """
+    True for a fitted decision tree or an ensemble whose `estimators_` are all decision trees.
+    """
+    trees = getattr(model, 'estimators_', [model])
+    return len(trees) > 0 and all(hasattr(tree, 'tree_') for tree in trees)
+
+def compile_trees(model):
+    """
+    Flatten a fitted tree model into a `CompiledForest`.
+
+    Parameters
+    ----------
+    model : object
+        A fitted `DecisionTreeClassifier`, `RandomForestClassifier` or
+        `ChunkTreeEnsemble` (trees fitted on chunks missing a class are
+        mapped onto the ensemble's classes).
+
+    Returns
+    -------
+    CompiledForest
+        Gives the model's `predict_proba` up to floating-point summation order.
+
+    Raises
+    ------
+    ValueError
+        If the model is not a fitted tree model or has several outputs.
+    """
+    import numpy as np
+    if not is_tree_model(model):
+        raise ValueError(f"{type(model).__name__} is not a fitted tree model.")
+    trees = getattr(model, 'estimators_', [model])
+    classes = np.asarray(model.classes_)
+
+    features, thresholds, lefts, values, roots = [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        t = tree.tree_
+        if t.n_outputs != 1:
+            raise ValueError("Only single-output trees can be compiled.")
+
+        # Renumber breadth first, so that the children of every split are adjacent
+        order = [0]
+        for node in order:
+            if t.children_left[node] != -1:
+                order += [t.children_left[node], t.children_right[node]]
+        order = np.array(order)
+        new_id = np.empty(t.node_count, dtype = np.intp)
+        new_id[order] = np.arange(t.node_count)
+        leaf = t.children_left[order] == -1
+
+        # A leaf is its own left child with an infinite threshold, so finished rows stay put
+        lefts.append(np.where(leaf, np.arange(t.node_count), new_id[t.children_left[order]]) + offset)
+        features.append(np.where(leaf, 0, t.feature[order]))
+        thresholds.append(np.where(leaf, np.float32(np.inf), _float32_floor(t.threshold[order])))
+
+        # Normalized like the tree's predict_proba, on the model's class columns
+        value = t.value[order, 0, :]
+        normalizer = value.sum(axis = 1, keepdims = True)
+        value = value / np.where(normalizer == 0, 1, normalizer)
+        if value.shape[1] != len(classes):
+            full = np.zeros((t.node_count, len(classes)))
+            full[:, np.searchsorted(classes, tree.classes_)] = value
+            value = full
+        values.append(value)
+        roots.append(offset)
+        offset += t.node_count
+
+    n_features = model.n_features_in_ if hasattr(model, 'n_features_in_') else trees[0].n_features_in_
+    return CompiledForest(np.concatenate(features).astype(np.intp),
+                          np.concatenate(thresholds).astype(np.float32),
+                          np.concatenate(lefts).astype(np.intp),
+                          np.ascontiguousarray(np.concatenate(values)),
+                          np.array(roots, dtype = np.intp),
+                          max(tree.tree_.max_depth for tree in trees),
+                          classes, n_features)
+
+def export_compiled(model_dir, names = None):
+    """
+    Compile the tree models of a model directory and register them in its manifest.
+
+    Every tree model is written as `<model file>.compiled.npz` next to its
+    joblib file, so `model_store.load_models(..., compiled = True)` can
+    return the compiled predictor instead.
+
+    Parameters
+    ----------
+    model_dir : str
+        Directory written by `model_store.save_models`.
+    names : list[str], optional
+        Only compile these models (default is every tree model).
+
+    Returns
+    -------
+    dict[str, CompiledForest]
+        The compiled models, keyed by name.
+    """
+    import json
+    from src.model_store import MANIFEST, load_models
+
+    _, models, _ = load_models(model_dir, names)
+    with open(os.path.join(model_dir, MANIFEST)) as f:
+        manifest = json.load(f)
+
+    compiled = {}
+    for name, model in models.items():
+        if not is_tree_model(model):
+            continue
+        compiled[name] = compile_trees(model)
+        file = os.path.splitext(manifest['models'][name])[0] + '.compiled.npz'
+        compiled[name].save(os.path.join(model_dir, file))
+        manifest.setdefault('compiled', {})[name] = file
+
+    with open(os.path.join(model_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent = 2)
+    return compiled
+
+def benchmark_compiled(models, compiled, batch_sizes, repeat = 3, seed = 2025):
+    """
+    Time `predict_proba` of sklearn models and of their compiled forests on standardized random batches.
+
+    Parameters
+    ----------
+    models : dict[str, object]
+        Fitted tree models.
+    compiled : dict[str, CompiledForest]
+        Their compiled forests, keyed alike.
+    batch_sizes : list[int]
+        Rows per call.
+    repeat : int, optional
+        Calls per batch size; the fastest is kept (default is 3).
+    seed : int, optional
+        Seed of the random batches (default is 2025).
+
+    Returns
+    -------
+    list[dict]
+        One record per model and batch size, with the seconds per call of
+        both predictors, the speedup and the largest probability difference.
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    records = []
+    for name, model in models.items():
+        for batch_size in batch_sizes:
+            X = rng.standard_normal((batch_size, compiled[name].n_features_in_)).astype(np.float32)
+            timings = {}
+            for label, predictor in [('sklearn', model), ('compiled', compiled[name])]:
+                best = np.inf
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    proba = predictor.predict_proba(X)
+                    best = min(best, time.perf_counter() - start)
+                timings[label] = (best, proba)
+            records.append({
+                'Model': name,
+                'Batch Size': batch_size,
+                'sklearn (s)': timings['sklearn'][0],
+                'Compiled (s)': timings['compiled'][0],
+                'Speedup': timings['sklearn'][0] / timings['compiled'][0],
+                'Max Abs Diff': float(np.abs(timings['sklearn'][1] - timings['compiled'][1]).max())
+            })
+    return records
+
+@click.command()
+@click.argument('model_dir', type = str)
+@click.option('--benchmark', 'path_benchmark', type = str, default = None,
+              help = 'CSV file where sklearn and compiled prediction times are written.')
+@click.option('--batch-sizes', type = str, default = '1,10,100,1000,10000,100000,1000000',
+              help = 'Comma-separated rows per call of the benchmark.')
+@click.option('--repeat', type = int, default = 3, help = 'Calls per batch size of the benchmark; the fastest is kept.')
+def main(model_dir, path_benchmark, batch_sizes, repeat):
+    import pandas as pd
+    from src.model_store import load_models
+
+    compiled = export_compiled(model_dir)
+    for name, forest in compiled.items():
+        click.echo(f"Compiled {name}: {forest.n_trees} trees, depth {forest.max_depth}, "
+                   f"{forest.nbytes / 2 ** 20:.1f} MB")
+    if path_benchmark is None:
+        return
+
+    _, models, _ = load_models(model_dir, list(compiled))
+    records = benchmark_compiled(models, compiled, [int(size) for size in batch_sizes.split(',')], repeat)
+    results = pd.DataFrame(records)
+    results.to_csv(path_benchmark, index = False)
+    click.echo(results.to_string(index = False))
+
+if __name__ == '__main__':
+    main()
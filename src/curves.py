@@ -0,0 +1,199 @@
+import numpy as np
+
+def score_matrix(trained_models, X):
+    """
+    Stack the positive-class probabilities of several fitted models into one matrix.
+
+    Parameters
+    ----------
+    trained_models : dict
+        Fitted binary classifiers keyed by name.
+    X : array-like
+        Features to score.
+
+    Returns
+    -------
+    scores : numpy.ndarray
+        Array of shape (n_samples, n_models), one column per model in the order of `trained_models`.
+    """
+    from src.binary_metrics import positive_proba
+    return np.column_stack([positive_proba(model, X)[0] for model in trained_models.values()])
+
+def downsample_indices(fpr, tpr, n_points):
+    """
+    Pick at most `n_points` points of a ROC curve, evenly spaced along its length.
+
+    fpr + tpr grows monotonically from 0 to 2 along the curve, so taking the
+    first point past each of `n_points` evenly spaced values of it keeps the
+    shape of the curve (both ends and every sharp corner region) while
+    thinning out the long straight runs of a large test set.
+
+    Parameters
+    ----------
+    fpr, tpr : array-like
+        The curve, ordered by decreasing threshold.
+    n_points : int
+        Maximum number of points to keep (at least 2).
+
+    Returns
+    -------
+    numpy.ndarray
+        Sorted indices of the points to keep, always including the first and last point.
+    """
+    fpr = np.asarray(fpr, dtype = float)
+    tpr = np.asarray(tpr, dtype = float)
+    if fpr.size <= n_points:
+        return np.arange(fpr.size)
+    length = fpr + tpr
+    idx = np.searchsorted(length, np.linspace(length[0], length[-1], n_points))
+    return np.unique(np.r_[0, np.minimum(idx, fpr.size - 1), fpr.size - 1])
+
+def model_curves(y_true, scores, names = None, pos_label = 1, n_points = None, n_bins = 10):
+    """
+    Compute ROC, precision-recall and calibration curves of several models in one batched pass.
+
+    Every score column is sorted once (a single `argsort` along axis 0); the
+    cumulative true/false positive counts of all models are then computed on
+    the whole matrix, and the AUC, average precision, best (Youden) threshold
+    and calibration bins are reduced per column without a Python loop. Only
+    the final curves, whose lengths differ per model, are sliced per model.
+
+    Curves match sklearn's `roc_curve(drop_intermediate = False)`,
+    `roc_auc_score`, `precision_recall_curve` (in decreasing-threshold order,
+    starting at recall 0 and precision 1), `average_precision_score` and
+    `calibration_curve(strategy = 'uniform')`.
+
+    Parameters
+    ----------
+    y_true : array-like
+        True binary labels, shape (n_samples,).
+    scores : array-like
+        Positive-class scores, shape (n_samples, n_models), e.g. from `score_matrix`.
+    names : list[str], optional
+        Model names, one per column (default is '0', '1', ...).
+    pos_label : int or bool, optional
+        Label of the positive class (default is 1).
+    n_points : int, optional
+        Downsample every ROC and PR curve to at most this many points with
+        `downsample_indices` (default is None, keep every threshold). The
+        AUC, average precision and best threshold use all thresholds.
+    n_bins : int, optional
+        Number of uniform probability bins of the calibration curve (default is 10).
+
+    Returns
+    -------
+    dict[str, dict]
+        For every model a dictionary with 'fpr', 'tpr', 'thresholds', 'roc_auc',
+        'precision', 'recall', 'average_precision', 'best_threshold', 'youden_j',
+        'brier_score', 'prob_true', 'prob_pred' and 'bin_count' (the calibration
+        curve, empty bins left out).
+
+    Raises
+    ------
+    ValueError
+        If `y_true` contains a single class, or the shapes do not match.
+    """
+    y_true = np.asarray(y_true) == pos_label
+    scores = np.asarray(scores, dtype = float)
+    if scores.ndim == 1:
+        scores = scores[:, None]
+    n_samples, n_models = scores.shape
+    if y_true.shape != (n_samples,):
+        raise ValueError(f"y_true has shape {y_true.shape}, expected ({n_samples},).")
+    names = [str(i) for i in range(n_models)] if names is None else list(names)
+
+    n_pos = int(y_true.sum())
+    n_neg = n_samples - n_pos
+    if n_pos == 0 or n_neg == 0:
+        raise ValueError("Only one class present in y_true. ROC AUC score is not defined in that case.")
+
+    # One sort per column, highest score first
+    order = np.argsort(scores, axis = 0, kind = 'mergesort')[::-1]
+    sorted_score = np.take_along_axis(scores, order, axis = 0)
+    sorted_true = y_true[order]
+
+    # Cumulative counts; a threshold ends at the last row of each run of equal scores
+    tps = np.cumsum(sorted_true, axis = 0)
+    fps = np.arange(1, n_samples + 1)[:, None] - tps
+    is_last = np.ones_like(sorted_true)
+    is_last[:-1] = sorted_score[1:] != sorted_score[:-1]
+
+    # Counts at the previous threshold of every row, for the trapezoids and steps
+    rows = np.arange(n_samples)[:, None]
+    last_row = np.maximum.accumulate(np.where(is_last, rows, -1), axis = 0)
+    prev_row = np.vstack([np.full((1, n_models), -1), last_row[:-1]])
+    has_prev = prev_row >= 0
+    prev_tps = np.where(has_prev, np.take_along_axis(tps, np.maximum(prev_row, 0), axis = 0), 0)
+    prev_fps = np.where(has_prev, np.take_along_axis(fps, np.maximum(prev_row, 0), axis = 0), 0)
+
+    roc_auc = np.where(is_last, (fps - prev_fps) * (tps + prev_tps), 0).sum(axis = 0) / (2.0 * n_pos * n_neg)
+    precision_all = tps / np.arange(1, n_samples + 1)[:, None]
+    average_precision = np.where(is_last, (tps - prev_tps) * precision_all, 0).sum(axis = 0) / n_pos
+
+    # Threshold maximising Youden's J = TPR - FPR
+    youden = np.where(is_last, tps / n_pos - fps / n_neg, -np.inf)
+    best_row = np.argmax(youden, axis = 0)
+    cols = np.arange(n_models)
+    best_threshold = sorted_score[best_row, cols]
+    youden_j = youden[best_row, cols]
+
+    # Calibration: uniform bins, all models counted with one bincount over offset bin ids
+    edges = np.linspace(0.0, 1.0, n_bins + 1)
+    bin_ids = np.searchsorted(edges[1:-1], scores) + cols * n_bins
+    size = n_models * n_bins
+    bin_count = np.bincount(bin_ids.ravel(), minlength = size).reshape(n_models, n_bins)
+    bin_score = np.bincount(bin_ids.ravel(), weights = scores.ravel(), minlength = size).reshape(n_models, n_bins)
+    bin_true = np.bincount(bin_ids.ravel(), weights = np.repeat(y_true, n_models).astype(float),
+                           minlength = size).reshape(n_models, n_bins)
+    brier_score = np.mean((scores - y_true[:, None]) ** 2, axis = 0)
+
+    curves = {}
+    for j, name in enumerate(names):
+        distinct = np.flatnonzero(is_last[:, j])
+        tp = tps[distinct, j]
+        fp = fps[distinct, j]
+        fpr = np.r_[0.0, fp / n_neg]
+        tpr = np.r_[0.0, tp / n_pos]
+        thresholds = np.r_[np.inf, sorted_score[distinct, j]]
+        precision = np.r_[1.0, tp / (tp + fp)]
+        keep = slice(None) if n_points is None else downsample_indices(fpr, tpr, n_points)
+        nonempty = bin_count[j] > 0
+        curves[name] = {
+            'fpr': fpr[keep],
+            'tpr': tpr[keep],
+            'thresholds': thresholds[keep],
+            'roc_auc': float(roc_auc[j]),
+            'precision': precision[keep],
+            'recall': tpr[keep],
+            'average_precision': float(average_precision[j]),
+            'best_threshold': float(best_threshold[j]),
+            'youden_j': float(youden_j[j]),
+            'brier_score': float(brier_score[j]),
+            'prob_true': bin_true[j, nonempty] / bin_count[j, nonempty],
+            'prob_pred': bin_score[j, nonempty] / bin_count[j, nonempty],
+            'bin_count': bin_count[j, nonempty]
+        }
+    return curves
+
+def curve_summary(curves):
+    """
+    Tabulate the scalar results of `model_curves`, one row per model.
+
+    Parameters
+    ----------
+    curves : dict[str, dict]
+        As returned by `model_curves`.
+
+    Returns
+    -------
+    list[dict]
+        Rows with the model name, ROC AUC, average precision, Youden threshold and J, and Brier score.
+    """
+    return [{
+        'Model': name,
+        'ROC AUC': curve['roc_auc'],
+        'Average Precision': curve['average_precision'],
+        'Youden Threshold': curve['best_threshold'],
+        'Youden J': curve['youden_j'],
+        'Brier Score': curve['brier_score']
+    } for name, curve in curves.items()]
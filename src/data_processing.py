@@ -1,107 +1,209 @@
 import click
-import numpy as np
-import pandas as pd
-import pandera.pandas as pa
-from pandera import extensions
-from sklearn.model_selection import train_test_split
-from scipy.stats import kstest, norm
-from src.val_data_handle_error import val_data_handle_error
+import logging
+from functools import partial
+from src.read_csv import read_csv_chunks
+from src.frame_io import FORMATS, frame_format, read_frame, write_frame
+from src.instrument import stage, traced, traced_command
 
-@click.command()
-@click.argument('path_read', type = str)
-@click.argument('path_save', type = str)
-@click.option('--delim', type = str)
-def main(path_read, path_save, delim = ","):
-    # Read the csv file from path_read, which can be a URL or filepath
-    df = pd.read_csv(path_read, sep=delim)
-    df['quality_binary'] = df['quality'] >= 7
-    
-    # Register custom checks
-    @extensions.register_check_method(statistics = ['iqr_mult'])
-    def outlier_check(df, iqr_mult = 3):
-        q1 = df.quantile(0.25)
-        q3 = df.quantile(0.75)
-        iqr = q3 - q1
-        lower = q1 - iqr_mult * iqr
-        upper = q3 + iqr_mult * iqr
-        return (df >= lower) & (df <= upper)
-
-    @extensions.register_check_method()
-    def dist_check(df):
-        z = (df - df.mean()) / df.std()
-        stat, p = kstest(z, 'norm')
-        return p > 0.05
-
-    @extensions.register_check_method()
-    def target_corr_check(df):
-        corr = df.corr(numeric_only = True)['quality_binary'].drop('quality_binary')
-        return corr.abs().max() < 0.95
-
-    @extensions.register_check_method()
-    def feature_corr_check(df):
-        corr = df.drop(columns = 'quality_binary').corr(numeric_only = True)
-        upper = np.triu(corr, k = 1)
-        return np.abs(upper).max() < 0.95
-        
-    # Build schema
-    # Used pa.Check.outlier_check() to check outliers in numerical features
-    # nullable = False to check for null values
-    schema = pa.DataFrameSchema(
+def wine_schema(feature_dtype = float, quality_dtype = int):
+    """
+    Pandera schema of the wine data with the target column.
+
+    Parameters
+    ----------
+    feature_dtype : type, optional
+        Dtype of the 11 feature columns (default is float; float32 for chunked ingestion).
+    quality_dtype : type, optional
+        Dtype of the quality column (default is int; int8 for chunked ingestion).
+
+    Returns
+    -------
+    pandera.DataFrameSchema
+        The schema used to validate the full data before the split.
+    """
+    import pandera.pandas as pa
+
+    # nullable = False to check for null values; the outlier, duplicate and
+    # quality distribution checks run in the vectorized validation engine
+    return pa.DataFrameSchema(
         {
-            'fixed acidity': pa.Column(float, pa.Check.outlier_check(),nullable = False),
-            'volatile acidity': pa.Column(float, pa.Check.outlier_check(),nullable = False),
-            'citric acid': pa.Column(float, pa.Check.outlier_check(),nullable = False),
-            'residual sugar': pa.Column(float, pa.Check.outlier_check(),nullable = False),
-            'chlorides': pa.Column(float, pa.Check.outlier_check(),nullable = False),
-            'free sulfur dioxide': pa.Column(float, pa.Check.outlier_check(),nullable = False),
-            'total sulfur dioxide': pa.Column(float, pa.Check.outlier_check(),nullable = False),
-            'density': pa.Column(float, pa.Check.outlier_check(),nullable = False),
-            'pH': pa.Column(float, pa.Check.outlier_check(),nullable = False),
-            'sulphates': pa.Column(float, pa.Check.outlier_check(),nullable = False),
-            'alcohol': pa.Column(float, pa.Check.outlier_check(),nullable = False),      
-            'quality': pa.Column(int, checks = [pa.Check.between(0, 10), pa.Check.dist_check()],nullable = False),
+            'fixed acidity': pa.Column(feature_dtype, nullable = False),
+            'volatile acidity': pa.Column(feature_dtype, nullable = False),
+            'citric acid': pa.Column(feature_dtype, nullable = False),
+            'residual sugar': pa.Column(feature_dtype, nullable = False),
+            'chlorides': pa.Column(feature_dtype, nullable = False),
+            'free sulfur dioxide': pa.Column(feature_dtype, nullable = False),
+            'total sulfur dioxide': pa.Column(feature_dtype, nullable = False),
+            'density': pa.Column(feature_dtype, nullable = False),
+            'pH': pa.Column(feature_dtype, nullable = False),
+            'sulphates': pa.Column(feature_dtype, nullable = False),
+            'alcohol': pa.Column(feature_dtype, nullable = False),      
+            'quality': pa.Column(quality_dtype, checks = [pa.Check.between(0, 10)], nullable = False),
             'quality_binary': pa.Column(bool, nullable = False)
         },
-        checks = [ # Check duplicate rows
-                pa.Check(lambda df: ~df.duplicated().any(), element_wise = False, error = 'Duplicate rows detected.')],
-                drop_invalid_rows = False)
+        drop_invalid_rows = False)
+
+def load_data(path_read, delim = ",", chunksize = None, sketches = None):
+    """
+    Read the raw wine data and derive the binary target.
+
+    Parameters
+    ----------
+    path_read : str
+        URL or path of the raw data (CSV, Feather or Parquet).
+    delim : str, optional
+        Field delimiter of CSV input (default is ',').
+    chunksize : int, optional
+        Stream a CSV file this many rows at a time with compact float32/int8
+        dtypes (default is None, read it whole).
+    sketches : dict[str, QuantileSketch], optional
+        Sketches of the feature columns, updated in place with the data.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The raw data with the boolean 'quality_binary' column (quality >= 7).
+    """
+    import pandas as pd
+    from src.quantile_sketch import sketch_chunks
+
+    # Read the data from path_read, which can be a URL or filepath (CSV, Feather or Parquet)
+    with stage('read_data') as span:
+        if chunksize is None or frame_format(path_read) != 'csv':
+            df = read_frame(path_read, delim = delim)
+            df['quality_binary'] = df['quality'] >= 7
+            for col, sketch in (sketches or {}).items():
+                sketch.update(df[col].to_numpy())
+        else:
+            # Streaming mode: parse chunk by chunk and derive the target per chunk,
+            # so only the compact typed frame is ever held in full. Sketches are
+            # built from the chunks as they stream past; the outliers are still
+            # flagged on the full frame in process_data
+            chunks = read_csv_chunks(path_read, delim, chunksize, add_target = True)
+            if sketches is not None:
+                chunks = sketch_chunks(chunks, sketches)
+            df = pd.concat(chunks, ignore_index = True)
+        if span is not None:
+            span['rows'] = len(df)
+    return df
+
+@traced()
+def process_data(df, feature_columns, bounds = None, split = 'random'):
+    """
+    Validate the wine data, drop the invalid rows and split it into train and test sets.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Data from `load_data`.
+    feature_columns : list[str]
+        The 11 feature columns.
+    bounds : tuple of numpy.ndarray, optional
+        Lower and upper outlier bounds per feature, e.g. from sketches
+        (default is None, exact IQR bounds of `df`). Either way the rows are
+        flagged on the whole of `df`, which is held in memory anyway for the
+        schema, duplicate and split steps, so sketched bounds save the exact
+        quartiles but not memory.
+    split : str, optional
+        'random' for a shuffled `train_test_split`, or 'hash' to assign each
+        row from a seeded hash of its contents (`hash_split.hash_test_mask`),
+        stable across runs and appended rows and in file order (default is 'random').
+
+    Returns
+    -------
+    train_df, test_df : pandas.DataFrame
+        The stratified 80/20 split of the valid rows; features of the train
+        set that correlate too strongly with the target or each other are
+        checked as well.
+    """
+    import numpy as np
+    import pandera.pandas as pa
+    from sklearn.model_selection import train_test_split
+    from src.hash_split import SplitBalance, hash_test_mask
+    from src.val_data_handle_error import val_data_handle_error
+    from src.validation_engine import wine_failures, correlation_failure_cases
+
+    # Compact float32/int8 data (chunked ingestion) is validated with matching dtypes
+    if df['alcohol'].dtype == np.float32:
+        feature_dtype, quality_dtype = np.float32, np.int8
+    else:
+        feature_dtype, quality_dtype = float, int
+
+    # Build schema
+    schema = wine_schema(feature_dtype, quality_dtype)
     
     # Validate the dataframe
-    validated_df = val_data_handle_error(df, schema)
-    
-        # Separate features and target
-    feature_columns = ['fixed acidity', 'volatile acidity', 'citric acid', 'residual sugar',
-                       'chlorides', 'free sulfur dioxide', 'total sulfur dioxide', 'density',
-                       'pH', 'sulphates', 'alcohol']
+    validated_df = val_data_handle_error(df, schema,
+                                         engine = partial(wine_failures, feature_columns = feature_columns,
+                                                          bounds = bounds))
 
-    X = validated_df[feature_columns]
-    y = validated_df['quality_binary']
-
-        # Split into train and test
-    train_df, test_df = train_test_split(validated_df, test_size = 0.2, random_state = 2025, 
-                                             stratify = validated_df['quality_binary'])
+    # Split into train and test
+    with stage('split', mode = split) as span:
+        if split == 'hash':
+            test = hash_test_mask(validated_df, feature_columns + ['quality'], 'quality_binary',
+                                  test_size = 0.2, seed = 2025)
+            train_df, test_df = validated_df[~test], validated_df[test]
+            balance = SplitBalance().update(validated_df['quality_binary'], test).report()
+            logging.info('Hash split class balance:\n' + balance.to_string(index = False))
+            if span is not None:
+                span['test_fraction'] = balance['test_fraction'].tolist()
+        else:
+            train_df, test_df = train_test_split(validated_df, test_size = 0.2, random_state = 2025,
+                                                 stratify = validated_df['quality_binary'])
 
     schema_corr = pa.DataFrameSchema(
-    {'fixed acidity': pa.Column(float),
-    'volatile acidity': pa.Column(float),
-    'citric acid': pa.Column(float),
-    'residual sugar': pa.Column(float),
-    'chlorides': pa.Column(float),
-    'free sulfur dioxide': pa.Column(float),
-    'total sulfur dioxide': pa.Column(float),
-    'density': pa.Column(float),
-    'pH': pa.Column(float),
-    'sulphates': pa.Column(float),
-    'alcohol': pa.Column(float),
-    'quality': pa.Column(int),
+    {'fixed acidity': pa.Column(feature_dtype),
+    'volatile acidity': pa.Column(feature_dtype),
+    'citric acid': pa.Column(feature_dtype),
+    'residual sugar': pa.Column(feature_dtype),
+    'chlorides': pa.Column(feature_dtype),
+    'free sulfur dioxide': pa.Column(feature_dtype),
+    'total sulfur dioxide': pa.Column(feature_dtype),
+    'density': pa.Column(feature_dtype),
+    'pH': pa.Column(feature_dtype),
+    'sulphates': pa.Column(feature_dtype),
+    'alcohol': pa.Column(feature_dtype),
+    'quality': pa.Column(quality_dtype),
     'quality_binary':   pa.Column(bool)},
-     checks = [pa.Check.target_corr_check(),
-              pa.Check.feature_corr_check()],
      drop_invalid_rows = False)
     
-    train_df = val_data_handle_error(train_df, schema_corr)
-    train_df.to_csv(path_save+"/train_data.csv", index = False)
-    test_df.to_csv(path_save+"/test_data.csv", index = False)    
+    # Target and feature correlation checks share one correlation matrix
+    train_df = val_data_handle_error(train_df, schema_corr, engine = correlation_failure_cases)
+    return train_df, test_df
+
+@click.command()
+@click.argument('path_read', type = str)
+@click.argument('path_save', type = str)
+@click.option('--delim', type = str)
+@click.option('--chunksize', type = int, default = None,
+              help = 'Read a CSV file this many rows at a time, with compact float32/int8 dtypes.')
+@click.option('--format', 'data_format', type = click.Choice(FORMATS), default = 'csv',
+              help = 'File format of the train and test data.')
+@click.option('--outlier-mode', type = click.Choice(['exact', 'sketch']), default = 'exact',
+              help = 'Exact IQR bounds, or approximate bounds from streaming quantile sketches.')
+@click.option('--sketch-eps', type = float, default = 0.01,
+              help = 'Target rank error of the quantile sketches.')
+@click.option('--split', type = click.Choice(['random', 'hash']), default = 'random',
+              help = 'Shuffled stratified split, or a stable split by a seeded hash of each row.')
+@traced_command('data_processing')
+def main(path_read, path_save, delim = ",", chunksize = None, data_format = 'csv',
+         outlier_mode = 'exact', sketch_eps = 0.01, split = 'random'):
+    from src.quantile_sketch import QuantileSketch, sketch_bounds
+
+    feature_columns = ['fixed acidity', 'volatile acidity', 'citric acid', 'residual sugar',
+                       'chlorides', 'free sulfur dioxide', 'total sulfur dioxide', 'density',
+                       'pH', 'sulphates', 'alcohol']
+    sketches = None
+    if outlier_mode == 'sketch':
+        sketches = {col: QuantileSketch(sketch_eps, seed = 2025) for col in feature_columns}
+
+    df = load_data(path_read, delim, chunksize, sketches)
+    bounds = None if sketches is None else sketch_bounds(sketches, feature_columns)
+    train_df, test_df = process_data(df, feature_columns, bounds, split)
+
+    with stage('write_data'):
+        write_frame(train_df, path_save+"/train_data."+data_format)
+        write_frame(test_df, path_save+"/test_data."+data_format)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,25 +1,54 @@
-import pandas as pd
 import click
-import altair as alt
+from src.frame_io import read_frame
+from src.instrument import stage, traced, traced_command
+
+@traced()
+def eda_report(train_df, feature_columns, path_save, draft = False, scale_factor = 1, n_jobs = None,
+               rank_mode = 'auto', threads = None):
+    """
+    Write the summary table, the correlation heatmap and the feature histograms of the train data.
+
+    The summary, correlations and histogram bins come from one
+    `eda_stats.compute_eda_stats` call (cached in `eda_stats.STATS_CACHE` for
+    later calls on the same data, and reusing the Pearson matrix of the
+    correlation check of `data_processing.py` when both run in the same
+    process), so the charts only carry the aggregated cells and bins, and
+    both charts are rendered at the same time in worker processes (see
+    `render.render_charts`).
+
+    Parameters
+    ----------
+    train_df : pandas.DataFrame or WineDataset
+        Train data with `feature_columns` and 'quality_binary'.
+    feature_columns : list[str]
+        The feature columns to summarize.
+    path_save : str
+        Directory of summary_table.csv, eda_heatmap.png and eda_hists.png.
+    draft : bool, optional
+        Write eda_heatmap.svg and eda_hists.svg instead of PNG files (default is False).
+    scale_factor : float, optional
+        Resolution multiplier of the PNG files (default is 1).
+    n_jobs : int, optional
+        Number of rendering processes (default is one per chart, at most the number of CPUs).
+    rank_mode : {'auto', 'exact', 'approx'}, optional
+        How the Spearman ranks are computed (default is 'auto', approximate only for huge inputs).
+    threads : int, optional
+        Number of threads computing the statistics (default is the number of CPUs).
+    """
+    import altair as alt
+    from src.eda_stats import compute_eda_stats
+    from src.render import render_charts
+
+    # Isolate target and correlates
+    dist_feats = ['alcohol', 'sulphates', 'volatile acidity']
+
+    with stage('eda_stats'):
+        stats = compute_eda_stats(train_df, feature_columns + ['quality_binary'], rank_mode = rank_mode,
+                                  n_jobs = threads)
+    stats.select(feature_columns).summary.round(3).to_csv(path_save+"/summary_table.csv")
 
-@click.command()
-@click.argument('path_read', type = str)
-@click.argument('path_save', type = str)
-def main(path_read, path_save):  
-    train_df = pd.read_csv(path_read)
-    feature_columns = ['fixed acidity', 'volatile acidity', 'citric acid', 'residual sugar',
-                       'chlorides', 'free sulfur dioxide', 'total sulfur dioxide', 'density',
-                       'pH', 'sulphates', 'alcohol']  
-    train_df[feature_columns].describe().round(3).to_csv(path_save+"/summary_table.csv")
-    
-    # Split into X and y
-    X_train = train_df[feature_columns]
-    y_train = train_df['quality_binary']
-    
     # Create correlation data frame in long format
-    corr_df = pd.concat([X_train, y_train], axis=1).corr('spearman').stack().reset_index()
-    corr_df.columns = ['feature_1', 'feature_2', 'correlation']
-    corr_df.loc[corr_df['correlation'] == 1, 'correlation'] = 0 # Remove diagonal
+    corr_df = stats.corr_table()
 
     # Create correlation heatmap
     corr_heatmap = alt.Chart(
@@ -30,36 +59,52 @@ def main(path_read, path_save):
     color = alt.Color('correlation').scale(scheme = 'blueorange', domain = (-1,1)).title('Correlation'),
     tooltip = alt.Tooltip('correlation:Q', format = '.2f'))
 
-    # Save correlation heatmap
-    corr_heatmap.save(path_save+"/eda_heatmap.png")
-
-    # Isolate target and correlates
-    dist_feats = ['quality_binary', 'alcohol', 'sulphates', 'volatile acidity']
-
-    # Create density data frame
-    dist_df = pd.concat([X_train, y_train], axis=1)
-    dist_df = dist_df[dist_feats]
-
-    # Replace boolean with descriptive strings
-    dist_df['quality_binary'] = dist_df['quality_binary'].map({
+    # Bin counts per feature and class, with descriptive class names
+    hist_df = stats.select(dist_feats).histograms
+    hist_df['quality_binary'] = hist_df['quality_binary'].map({
                                 True: 'High Quality Wine',
                                 False: 'Low Quality Wine'})
 
-    # Create overlaid histograms for each correlated feature
-    feature_hists = alt.Chart(dist_df).mark_bar(opacity = 0.5).encode(
-                    x = alt.X(alt.repeat('column')).type('quantitative').bin(maxbins = 25).axis(format = '.1f'),
-                    y = alt.Y('count()').stack(False),
-                    color = alt.Color('quality_binary:N').title('Wine Quality')
-                    ).properties(
-                    width = 250,
-                    height = 200,
-                    ).repeat(
-                    column = ['alcohol', 'sulphates', 'volatile acidity']
-                    ).resolve_scale(
+    # Create overlaid histograms for each correlated feature from the pre-binned counts
+    base_hist = alt.Chart(hist_df).mark_bar(opacity = 0.5).encode(
+                x2 = 'bin_end:Q',
+                y = alt.Y('count:Q').stack(False).title('Count of Records'),
+                color = alt.Color('quality_binary:N').title('Wine Quality')
+                ).properties(
+                width = 250,
+                height = 200)
+    feature_hists = alt.hconcat(*[
+                    base_hist.transform_filter(alt.datum.feature == feat).encode(
+                    x = alt.X('bin_start:Q').bin('binned').axis(format = '.1f').title(f'{feat} (binned)'))
+                    for feat in dist_feats
+                    ]).resolve_scale(
                     y = 'shared')
 
-    # Display histograms
-    feature_hists.save(path_save+"/eda_hists.png")
+    # Render both charts in parallel
+    with stage('render_charts'):
+        render_charts({'eda_heatmap': corr_heatmap, 'eda_hists': feature_hists}, path_save, draft,
+                      scale_factor, n_jobs)
+
+@click.command()
+@click.argument('path_read', type = str)
+@click.argument('path_save', type = str)
+@click.option('--draft', is_flag = True, help = 'Write quick vector SVG charts instead of PNG files.')
+@click.option('--scale-factor', type = float, default = 1, help = 'Resolution multiplier of the PNG charts.')
+@click.option('--n-jobs', type = int, default = None,
+              help = 'Number of chart rendering processes (default is one per chart, at most the number of CPUs).')
+@click.option('--rank-mode', type = click.Choice(['auto', 'exact', 'approx']), default = 'auto',
+              help = 'Exact or approximate Spearman ranks (auto: approximate above a million rows).')
+@click.option('--threads', type = int, default = None,
+              help = 'Number of threads computing the statistics (default is the number of CPUs).')
+@traced_command('eda')
+def main(path_read, path_save, draft, scale_factor, n_jobs, rank_mode, threads):  
+    feature_columns = ['fixed acidity', 'volatile acidity', 'citric acid', 'residual sugar',
+                       'chlorides', 'free sulfur dioxide', 'total sulfur dioxide', 'density',
+                       'pH', 'sulphates', 'alcohol']  
+    # Only load the features and target; Feather files are memory-mapped
+    with stage('read_frame'):
+        train_df = read_frame(path_read, columns = feature_columns + ['quality_binary'])
+    eda_report(train_df, feature_columns, path_save, draft, scale_factor, n_jobs, rank_mode, threads)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,382 @@
+import hashlib
+import math
+import os
+from collections import OrderedDict
+import numpy as np
+
+SUMMARY_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+# Above this many rows, rank_mode = 'auto' ranks approximately instead of sorting every column
+APPROX_RANK_ROWS = 1_000_000
+
+class EdaStats:
+    """
+    Summary statistics, correlation matrices and per-class histograms of a set of columns.
+
+    Parameters
+    ----------
+    columns : list[str]
+        The columns, in matrix order.
+    summary : pandas.DataFrame
+        `DataFrame.describe()` of the columns.
+    pearson, spearman : numpy.ndarray
+        Correlation matrices of shape (n_columns, n_columns).
+    histograms : pandas.DataFrame
+        Per-class histograms in the layout of `render.histogram_table`.
+    target : str
+        Column the histograms are split by.
+    rank_mode : str
+        'exact' or 'approx', how the Spearman ranks were computed.
+    """
+
+    def __init__(self, columns, summary, pearson, spearman, histograms, target, rank_mode):
+        self.columns = list(columns)
+        self.summary = summary
+        self.pearson = pearson
+        self.spearman = spearman
+        self.histograms = histograms
+        self.target = target
+        self.rank_mode = rank_mode
+
+    def select(self, columns, hist_columns = None):
+        """
+        The statistics of a subset of the columns, in the order given.
+
+        The histograms are those of `hist_columns`, in that order (default is
+        those of `columns` that have one).
+        """
+        import pandas as pd
+        positions = [self.columns.index(column) for column in columns]
+        grid = np.ix_(positions, positions)
+        if hist_columns is None:
+            hist_columns = [column for column in columns if column in set(self.histograms['feature'])]
+        histograms = pd.concat([self.histograms[self.histograms['feature'] == column] for column in hist_columns],
+                               ignore_index = True)
+        return EdaStats(columns, self.summary[list(columns)], self.pearson[grid], self.spearman[grid], histograms,
+                        self.target, self.rank_mode)
+
+    def corr_table(self, method = 'spearman'):
+        """
+        The correlation matrix in the long format of `render.corr_table`.
+        """
+        from src.render import corr_frame
+        return corr_frame(self.spearman if method == 'spearman' else self.pearson, self.columns)
+
+class PearsonStats:
+    """
+    The Pearson matrix of a set of columns alone, as cached by `pearson_matrix`.
+
+    Parameters
+    ----------
+    columns : list[str]
+        The columns, in matrix order.
+    pearson : numpy.ndarray
+        Correlation matrix of shape (n_columns, n_columns).
+    """
+
+    def __init__(self, columns, pearson):
+        self.columns = list(columns)
+        self.pearson = pearson
+
+class StatsCache:
+    """
+    In-memory least recently used cache of `EdaStats`, keyed by the content of the columns.
+
+    Every column is fingerprinted by a hash of its name and float64 values, so
+    two calls on the same data hit the same entry even when the frames are
+    different objects, and a call for a subset of an entry's columns is
+    answered from that entry. This lets repeated EDA runs on the same data in
+    one process (e.g. a report and then a subset of its columns) share one
+    computation. The Pearson matrix does not depend on any option, so it is
+    also looked up across entries on its own: the correlation check of the
+    data processing and the EDA compute it once between them.
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        Number of entries kept (default is 4).
+    """
+
+    def __init__(self, max_entries = 4):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fingerprints, hist_fingerprints, options):
+        """
+        Cached statistics covering `fingerprints` and the histograms of `hist_fingerprints`, or None.
+        """
+        for key, (entry_fingerprints, entry_hist, stats) in self.entries.items():
+            if key[0] == options and set(fingerprints) <= entry_fingerprints and set(hist_fingerprints) <= entry_hist:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return stats
+        self.misses += 1
+        return None
+
+    def pearson(self, columns, fingerprints):
+        """
+        Cached Pearson matrix of `columns` (with `fingerprints`), in that order, or None.
+
+        Any entry covering the columns answers, whatever its options; the
+        lookup is not counted in `hits` and `misses`.
+        """
+        for key, (entry_fingerprints, _, stats) in self.entries.items():
+            if set(fingerprints) <= entry_fingerprints:
+                self.entries.move_to_end(key)
+                positions = [stats.columns.index(column) for column in columns]
+                return stats.pearson[np.ix_(positions, positions)]
+        return None
+
+    def put(self, fingerprints, hist_fingerprints, options, stats):
+        key = (options, tuple(fingerprints))
+        self.entries[key] = (set(fingerprints), set(hist_fingerprints), stats)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last = False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+# Shared by every caller in the process
+STATS_CACHE = StatsCache()
+
+def column_fingerprint(name, values):
+    """
+    Hash of a column's name and float64 values.
+    """
+    h = hashlib.blake2b(digest_size = 16)
+    h.update(name.encode())
+    h.update(b'\0')
+    h.update(memoryview(np.ascontiguousarray(values, dtype = float)).cast('B'))
+    return h.hexdigest()
+
+def pearson_matrix(df, columns, cache = None):
+    """
+    Pearson correlation matrix of some columns, shared with `compute_eda_stats` through the cache.
+
+    A matrix already computed for these columns (or a superset), by an
+    earlier call or by the EDA statistics, is reused; otherwise it is
+    computed with one `np.corrcoef` call, or pairwise by pandas if there are
+    missing values, and cached for the EDA. Nothing but the matrix is computed.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Data with `columns`.
+    columns : list[str]
+        Columns to correlate.
+    cache : StatsCache, optional
+        Cache of the results (default is the process-wide `STATS_CACHE`).
+
+    Returns
+    -------
+    numpy.ndarray
+        Correlation matrix of shape (n_columns, n_columns); constant columns give NaN.
+    """
+    columns = list(columns)
+    cache = STATS_CACHE if cache is None else cache
+    arrays = {column: df[column].to_numpy(dtype = float) for column in columns}
+    fingerprints = [column_fingerprint(column, arrays[column]) for column in columns]
+    pearson = cache.pearson(columns, fingerprints)
+    if pearson is not None:
+        return pearson
+
+    values = np.column_stack(list(arrays.values()))
+    if np.isnan(values).any():
+        pearson = df[columns].astype(float).corr().to_numpy()
+    else:
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            pearson = np.atleast_2d(np.corrcoef(values, rowvar = False))
+    cache.put(fingerprints, [], ('pearson',), PearsonStats(columns, pearson))
+    return pearson
+
+def approx_ranks(values, n_cells = 2 ** 20, tail = 0.001, rank_sample = 100_000):
+    """
+    Approximate average ranks of every column, without sorting the columns.
+
+    The body of each column, between its `tail` and 1 - `tail` quantiles
+    (taken from an evenly strided sample of at most `rank_sample` rows), is
+    cut into `n_cells` equal-width cells and counted with one `bincount`;
+    every value gets the average rank of its cell, so only values closer
+    than a cell width are treated as ties. The few values in the tails are
+    ranked exactly, so outliers do not coarsen the grid. This costs a few
+    linear passes per column instead of an argsort and a scatter.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Array of shape (n_samples, n_columns).
+    n_cells : int, optional
+        Number of cells of the body of each column (default is 2 ** 20).
+    tail : float, optional
+        Share of each tail ranked exactly, going by the sample (default is 0.001).
+    rank_sample : int, optional
+        Rows sampled for the body's extent (default is 100_000).
+
+    Returns
+    -------
+    numpy.ndarray
+        Float ranks, same shape as `values`.
+    """
+    from src.render import average_ranks
+
+    n = len(values)
+    step = max(1, n // rank_sample)
+    ranks = np.empty(values.shape)
+    for j in range(values.shape[1]):
+        column = np.ascontiguousarray(values[:, j])
+        lo, hi = np.quantile(column[::step], [tail, 1 - tail])
+        below = column < lo
+        above = column > hi
+        inside = ~(below | above)
+        n_below = int(np.count_nonzero(below))
+        n_inside = n - n_below - int(np.count_nonzero(above))
+
+        if hi > lo:
+            cells = ((column[inside] - lo) * ((n_cells - 1) / (hi - lo))).astype(np.int64)
+            counts = np.bincount(cells, minlength = n_cells)
+            ranks[inside, j] = n_below + (np.cumsum(counts) - counts + (counts + 1) / 2)[cells]
+        else:
+            ranks[inside, j] = n_below + (n_inside + 1) / 2
+        # The tails, ranked exactly below and above the body
+        if n_below:
+            ranks[below, j] = average_ranks(column[below, None])[:, 0]
+        if n_below + n_inside < n:
+            ranks[above, j] = n_below + n_inside + average_ranks(column[above, None])[:, 0]
+    return ranks
+
+def _standardize(centered, sum_sq):
+    # Columns scaled so that Z.T @ Z is their correlation matrix (constant columns give NaN, like corrcoef)
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        return centered / np.sqrt(sum_sq)
+
+def _block_stats(block, codes, n_groups, hist_columns, rank_mode, rank_cells, rank_sample, maxbins):
+    """
+    Everything computed column-wise for one block of columns; runs in a worker thread.
+    """
+    from src.render import average_ranks, bin_counts
+
+    values = np.column_stack([np.asarray(column, dtype = float) for _, column in block])
+    n = len(values)
+    mean = values.mean(axis = 0)
+    centered = values - mean
+    sum_sq = np.einsum('ij,ij->j', centered, centered)
+    summary = np.vstack([
+        np.full(len(block), float(n)),
+        mean,
+        np.sqrt(sum_sq / (n - 1)) if n > 1 else np.full(len(block), np.nan),
+        values.min(axis = 0),
+        np.quantile(values, [0.25, 0.5, 0.75], axis = 0),
+        values.max(axis = 0)
+    ])
+
+    ranks = average_ranks(values) if rank_mode == 'exact' else approx_ranks(values, rank_cells, rank_sample = rank_sample)
+    ranks -= ranks.mean(axis = 0)
+    rank_sum_sq = np.einsum('ij,ij->j', ranks, ranks)
+
+    # Binned from the original columns, so float32 data gets its ulp-tolerant edges
+    histograms = {name: bin_counts(np.asarray(column), codes, n_groups, maxbins)
+                  for name, column in block if name in hist_columns}
+    return summary, _standardize(centered, sum_sq), _standardize(ranks, rank_sum_sq), histograms
+
+def compute_eda_stats(df, columns, target = 'quality_binary', hist_columns = None, rank_mode = 'auto',
+                      n_jobs = None, rank_cells = 2 ** 20, rank_sample = 100_000, maxbins = 25, cache = None):
+    """
+    Compute summary statistics, Pearson and Spearman matrices and per-class histograms in one pass per column block.
+
+    The columns are split into `n_jobs` blocks, processed in a thread pool
+    (NumPy's sorts and reductions release the GIL): every block is converted
+    to float64 once and yields its `describe()` rows, its standardized values
+    and ranks, and the histograms of its columns by `target`. Both correlation
+    matrices are then single matrix products of the standardized blocks.
+    Results are cached in `cache`, so later calls on the same columns (or a
+    subset of them) reuse them, and a Pearson matrix cached by
+    `pearson_matrix` is reused rather than computed again.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame or WineDataset
+        Data with `columns` and `target`, without missing values.
+    columns : list[str]
+        Columns to summarize and correlate; may include `target`.
+    target : str, optional
+        Column the histograms are split by (default is 'quality_binary').
+    hist_columns : list[str], optional
+        Columns to histogram (default is every column but `target`).
+    rank_mode : {'auto', 'exact', 'approx'}, optional
+        Spearman ranks from a full sort of every column, from `approx_ranks`,
+        or exact up to `APPROX_RANK_ROWS` rows and approximate beyond (default is 'auto').
+    n_jobs : int, optional
+        Number of threads (default is the number of CPUs, at most one per column).
+    rank_cells, rank_sample : int, optional
+        Parameters of `approx_ranks` (default is 2 ** 20 and 100_000).
+    maxbins : int, optional
+        Maximum number of histogram bins per column (default is 25).
+    cache : StatsCache, optional
+        Cache of the results (default is the process-wide `STATS_CACHE`).
+
+    Returns
+    -------
+    EdaStats
+        Statistics of `columns`, in that order.
+
+    Raises
+    ------
+    ValueError
+        If `rank_mode` is unknown or the columns contain missing values.
+    """
+    import pandas as pd
+    from concurrent.futures import ThreadPoolExecutor
+    from src.render import histogram_frame
+    from src.wine_dataset import WineDataset
+
+    if isinstance(df, WineDataset):
+        df = df.frame()
+    columns = list(columns)
+    hist_columns = [c for c in columns if c != target] if hist_columns is None else list(hist_columns)
+    if rank_mode == 'auto':
+        rank_mode = 'exact' if len(df) <= APPROX_RANK_ROWS else 'approx'
+    if rank_mode not in ('exact', 'approx'):
+        raise ValueError(f"Unknown rank_mode '{rank_mode}'; use 'auto', 'exact' or 'approx'.")
+    cache = STATS_CACHE if cache is None else cache
+
+    # Look up the columns by content; the target's content is part of the options
+    all_columns = list(dict.fromkeys(columns + hist_columns))
+    arrays = {column: df[column].to_numpy() for column in dict.fromkeys(all_columns + [target])}
+    fingerprints = {column: column_fingerprint(column, values) for column, values in arrays.items()}
+    options = (rank_mode, rank_cells, rank_sample, maxbins, fingerprints[target])
+    stats = cache.get([fingerprints[c] for c in columns], [fingerprints[c] for c in hist_columns], options)
+    if stats is not None:
+        return stats.select(columns, hist_columns)
+
+    if any(pd.isna(values).any() for values in arrays.values()):
+        raise ValueError("EDA statistics need columns without missing values.")
+
+    codes, groups = pd.factorize(arrays[target], sort = True)
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(all_columns))
+    size = math.ceil(len(all_columns) / n_jobs)
+    blocks = [[(name, arrays[name]) for name in all_columns[i:i + size]] for i in range(0, len(all_columns), size)]
+    args = (codes, len(groups), set(hist_columns), rank_mode, rank_cells, rank_sample, maxbins)
+    if n_jobs == 1:
+        parts = [_block_stats(block, *args) for block in blocks]
+    else:
+        with ThreadPoolExecutor(max_workers = n_jobs) as pool:
+            parts = list(pool.map(lambda block: _block_stats(block, *args), blocks))
+
+    # Both correlation matrices are one product of the standardized blocks, unless the Pearson one is cached
+    summary = pd.DataFrame(np.hstack([part[0] for part in parts]), index = SUMMARY_INDEX, columns = all_columns)
+    z = np.hstack([part[1] for part in parts])
+    z_rank = np.hstack([part[2] for part in parts])
+    pearson = cache.pearson(all_columns, [fingerprints[c] for c in all_columns])
+    if pearson is None:
+        pearson = np.clip(z.T @ z, -1, 1)
+    spearman = np.clip(z_rank.T @ z_rank, -1, 1)
+    counts = {name: edges_counts for part in parts for name, edges_counts in part[3].items()}
+    histograms = pd.concat([histogram_frame(column, target, groups, *counts[column]) for column in hist_columns],
+                           ignore_index = True)
+
+    stats = EdaStats(all_columns, summary, pearson, spearman, histograms, target, rank_mode)
+    cache.put([fingerprints[c] for c in all_columns], [fingerprints[c] for c in hist_columns], options, stats)
+    return stats.select(columns, hist_columns)
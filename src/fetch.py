@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import urllib.error
+import urllib.parse
+import click
+
+# Default directory of downloaded source files; `make clean` removes the rest of data/ but keeps it
+CACHE_DIR = os.path.join('data', 'cache')
+
+# Bytes copied per read of a response
+BLOCK_SIZE = 2 ** 20
+
+def is_url(path):
+    """
+    True for an http(s) URL, False for a local path.
+    """
+    return urllib.parse.urlsplit(str(path)).scheme in ('http', 'https')
+
+def cache_path(url, cache_dir = CACHE_DIR):
+    """
+    File of the cached copy of `url`: a hash of the URL followed by its file name, so the extension is kept.
+    """
+    name = os.path.basename(urllib.parse.urlsplit(url).path) or 'index'
+    return os.path.join(cache_dir, hashlib.sha256(url.encode()).hexdigest()[:16] + '-' + name)
+
+def _read_meta(path):
+    try:
+        with open(path + '.json') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_meta(path, meta):
+    # Replace the metadata atomically, so an interrupted write never leaves half a file
+    with open(path + '.json.tmp', 'w') as f:
+        json.dump(meta, f, indent = 2)
+    os.replace(path + '.json.tmp', path + '.json')
+
+def _content_range(response):
+    # (first byte, total size or None) of a 206 response
+    match = re.fullmatch(r'bytes (\d+)-\d+/(\d+|\*)', response.headers.get('Content-Range', '').strip())
+    if match is None:
+        return None, None
+    return int(match[1]), None if match[2] == '*' else int(match[2])
+
+def fetch(url, cache_dir = CACHE_DIR, timeout = 60, revalidate = True):
+    """
+    Download a URL into an on-disk cache and return the path of the local copy.
+
+    The cache holds one file per URL, next to a JSON record of its `ETag`
+    and `Last-Modified` validators. A cached copy is revalidated with a
+    conditional request (`If-None-Match` / `If-Modified-Since`), so an
+    unchanged source costs one 304 response instead of a download. A
+    download goes to a `.part` file first; if it is interrupted, the next
+    call asks for the remaining bytes only (`Range` with `If-Range`, so a
+    source changed in between is downloaded anew) and appends them. The
+    previous copy stays in place until the new one is complete, and is used
+    as is when the server cannot be reached.
+
+    Parameters
+    ----------
+    url : str
+        http(s) URL of the file.
+    cache_dir : str, optional
+        Cache directory (default is `CACHE_DIR`).
+    timeout : float, optional
+        Socket timeout in seconds (default is 60).
+    revalidate : bool, optional
+        Ask the server whether a cached copy is still current (default is
+        True). If False, a cached copy is returned without any request.
+
+    Returns
+    -------
+    str
+        Path of the cached file.
+
+    Raises
+    ------
+    urllib.error.URLError
+        If the server cannot be reached and nothing is cached, or answers with an error.
+    urllib.error.ContentTooShortError
+        If the connection ends before the announced size; the bytes received are kept for the next call.
+    """
+    import urllib.request
+    os.makedirs(cache_dir, exist_ok = True)
+    path = cache_path(url, cache_dir)
+    part = path + '.part'
+    meta = _read_meta(path)
+    cached = bool(meta) and os.path.exists(path)
+    if cached and not revalidate:
+        return path
+
+    headers = {}
+    if cached:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    # Resuming is only safe when the server can tell whether the partial bytes are still current
+    part_meta = _read_meta(part)
+    validator = part_meta.get('etag') or part_meta.get('last_modified')
+    offset = os.path.getsize(part) if validator and os.path.exists(part) else 0
+    if offset:
+        headers['Range'] = f'bytes={offset}-'
+        headers['If-Range'] = validator
+
+    try:
+        response = urllib.request.urlopen(urllib.request.Request(url, headers = headers), timeout = timeout)
+    except urllib.error.HTTPError as error:
+        error.close()
+        if error.code == 304 and cached:
+            logging.info(f'{url} not modified, using {path}')
+            return path
+        if error.code == 416 and offset:
+            # The partial file does not fit the source any more: start over
+            os.remove(part + '.json')
+            return fetch(url, cache_dir, timeout, revalidate)
+        raise
+    except urllib.error.URLError as error:
+        if cached:
+            logging.warning(f'{url} unreachable ({error.reason}), using cached {path}')
+            return path
+        raise
+
+    with response:
+        start, total = _content_range(response) if response.status == 206 else (0, None)
+        if start != offset:
+            # A full response, or a range the partial file does not end at: download from the start
+            offset = 0
+        if total is None and response.headers.get('Content-Length') is not None:
+            total = offset + int(response.headers['Content-Length'])
+
+        # Record the validators first, so an interrupted download can be resumed
+        part_meta = {'url': url, 'etag': response.headers.get('ETag'),
+                     'last_modified': response.headers.get('Last-Modified'), 'size': total}
+        _write_meta(part, part_meta)
+        with open(part, 'ab' if offset else 'wb') as f:
+            shutil.copyfileobj(response, f, BLOCK_SIZE)
+            size = f.tell()
+
+    if total is not None and size < total:
+        raise urllib.error.ContentTooShortError(f'{url}: got {size} of {total} bytes, resume with another fetch', None)
+    # The previous copy stays usable until the new one is complete
+    os.replace(part, path)
+    _write_meta(path, {**part_meta, 'size': size})
+    os.remove(part + '.json')
+    logging.info(f'Fetched {url} to {path}' + (f' (resumed at byte {offset})' if offset else ''))
+    return path
+
+async def _fetch_concurrently(urls, max_concurrency, **kwargs):
+    # Blocking downloads in worker threads, at most `max_concurrency` at a time
+    import asyncio
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch_one(url):
+        async with semaphore:
+            return await asyncio.to_thread(fetch, url, **kwargs)
+
+    return await asyncio.gather(*(fetch_one(url) for url in urls))
+
+def fetch_all(paths, cache_dir = CACHE_DIR, max_concurrency = 4, timeout = 60, revalidate = True):
+    """
+    Fetch several sources concurrently with `fetch`; local paths are passed through.
+
+    Parameters
+    ----------
+    paths : list[str]
+        URLs and local paths. A URL listed several times is fetched once.
+    cache_dir, timeout, revalidate
+        As in `fetch`.
+    max_concurrency : int, optional
+        Most downloads in flight at a time (default is 4).
+
+    Returns
+    -------
+    list[str]
+        Local path of every entry of `paths`, in order.
+    """
+    import asyncio
+    urls = list(dict.fromkeys(path for path in paths if is_url(path)))
+    local = dict(zip(urls, asyncio.run(_fetch_concurrently(urls, max_concurrency, cache_dir = cache_dir,
+                                                            timeout = timeout, revalidate = revalidate))))
+    return [local.get(path, path) for path in paths]
+
+@click.command()
+@click.argument('urls', nargs = -1, required = True, type = str)
+@click.option('--cache-dir', type = str, default = CACHE_DIR, help = 'Directory of the cached downloads.')
+@click.option('--max-concurrency', type = int, default = 4, help = 'Most downloads in flight at a time.')
+@click.option('--offline', is_flag = True, help = 'Use cached copies without asking the server.')
+def main(urls, cache_dir, max_concurrency, offline):
+    # Fetch the URLs into the cache and print the path of every local copy
+    for path in fetch_all(urls, cache_dir, max_concurrency, revalidate = not offline):
+        click.echo(path)
+
+if __name__ == '__main__':
+    main()
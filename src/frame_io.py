@@ -0,0 +1,178 @@
+import os
+
+FORMATS = ('csv', 'feather', 'parquet')
+_SUFFIXES = {'.feather': 'feather', '.arrow': 'feather', '.parquet': 'parquet', '.pq': 'parquet'}
+
+def frame_format(path):
+    """
+    Infer the storage format of a data file from its extension.
+
+    Parameters
+    ----------
+    path : str
+        File path or URL.
+
+    Returns
+    -------
+    str
+        'feather' for .feather/.arrow, 'parquet' for .parquet/.pq and 'csv' otherwise.
+    """
+    return _SUFFIXES.get(os.path.splitext(str(path))[1].lower(), 'csv')
+
+def frame_parts(path):
+    """
+    The part files of a sharded frame directory (e.g. from `hash_split`), in name order.
+    """
+    return sorted(os.path.join(path, name) for name in os.listdir(path) if not name.startswith('.'))
+
+def read_frame(path, columns = None, delim = ","):
+    """
+    Read a data frame written by `write_frame`, picking the reader from the extension.
+
+    Feather files are memory-mapped and converted with one block per column,
+    so numeric columns without missing values are zero-copy, read-only views
+    of the file rather than parsed copies. Only `columns` are read from
+    Feather and Parquet files. A directory is read as the concatenation of
+    its part files (`frame_parts`).
+
+    Parameters
+    ----------
+    path : str
+        Path of a CSV, Feather or Parquet file or of a directory of parts. CSV
+        may also be a URL.
+    columns : list[str], optional
+        Columns to load (default is all columns).
+    delim : str, optional
+        Field delimiter, only used for CSV (default is ',').
+
+    Returns
+    -------
+    pandas.DataFrame
+        The loaded frame.
+    """
+    if os.path.isdir(path):
+        import pandas as pd
+        return pd.concat([read_frame(part, columns, delim) for part in frame_parts(path)], ignore_index = True)
+
+    fmt = frame_format(path)
+    if fmt == 'csv':
+        import pandas as pd
+        return pd.read_csv(path, sep = delim, usecols = columns)
+
+    if fmt == 'feather':
+        from pyarrow import feather
+        table = feather.read_table(path, columns = columns, memory_map = True)
+    else:
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns = columns, memory_map = True)
+    return table.to_pandas(split_blocks = True)
+
+def iter_frame_chunks(path, chunksize = 100_000, columns = None, delim = ","):
+    """
+    Read a data file in chunks of at most `chunksize` rows, picking the reader from the extension.
+
+    CSV is parsed incrementally, Feather is memory-mapped and sliced, and
+    Parquet is read batch by batch, so only one chunk is in memory at a time.
+    The parts of a directory are read one after the other.
+
+    Parameters
+    ----------
+    path : str
+        Path of a CSV, Feather or Parquet file or of a directory of parts. CSV
+        may also be a URL.
+    chunksize : int, optional
+        Maximum number of rows per chunk (default is 100_000).
+    columns : list[str], optional
+        Columns to load (default is all columns).
+    delim : str, optional
+        Field delimiter, only used for CSV (default is ',').
+
+    Yields
+    ------
+    pandas.DataFrame
+        The chunks, in file order.
+    """
+    if os.path.isdir(path):
+        for part in frame_parts(path):
+            yield from iter_frame_chunks(part, chunksize, columns, delim)
+        return
+
+    fmt = frame_format(path)
+    if fmt == 'csv':
+        import pandas as pd
+        yield from pd.read_csv(path, sep = delim, usecols = columns, chunksize = chunksize)
+    elif fmt == 'feather':
+        from pyarrow import feather
+        table = feather.read_table(path, columns = columns, memory_map = True)
+        for offset in range(0, table.num_rows, chunksize):
+            yield table.slice(offset, chunksize).to_pandas()
+    else:
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path, memory_map = True).iter_batches(batch_size = chunksize, columns = columns):
+            yield batch.to_pandas()
+
+def write_frame(df, path, index = False):
+    """
+    Write a data frame as CSV, Feather or Parquet, picking the writer from the extension.
+
+    Feather files are written uncompressed so that `read_frame` can memory-map them.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The frame to write.
+    path : str
+        Destination file path.
+    index : bool, optional
+        Keep the index (default is False). Ignored for Feather, which cannot store it.
+    """
+    fmt = frame_format(path)
+    if fmt == 'csv':
+        df.to_csv(path, index = index)
+    elif fmt == 'feather':
+        df.reset_index(drop = True).to_feather(path, compression = 'uncompressed')
+    else:
+        df.to_parquet(path, index = index)
+
+def write_frame_chunks(chunks, path):
+    """
+    Write an iterable of data frames to a single file, one chunk at a time.
+
+    Only one chunk is held in memory. All chunks must share the columns and
+    dtypes of the first one.
+
+    Parameters
+    ----------
+    chunks : iterable of pandas.DataFrame
+        The chunks to write, in order.
+    path : str
+        Destination file path; the format is taken from its extension.
+
+    Returns
+    -------
+    int
+        Number of rows written.
+    """
+    fmt = frame_format(path)
+    n_rows = 0
+    writer = None
+    try:
+        for i, chunk in enumerate(chunks):
+            n_rows += len(chunk)
+            if fmt == 'csv':
+                chunk.to_csv(path, index = False, mode = 'w' if i == 0 else 'a', header = i == 0)
+                continue
+
+            import pyarrow as pa
+            table = pa.Table.from_pandas(chunk, preserve_index = False)
+            if writer is None:
+                if fmt == 'feather':
+                    writer = pa.ipc.new_file(path, table.schema)
+                else:
+                    import pyarrow.parquet as pq
+                    writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n_rows
@@ -0,0 +1,230 @@
+import os
+import shutil
+import tempfile
+import click
+from functools import partial
+from src.frame_io import FORMATS, iter_frame_chunks, write_frame
+from src.instrument import stage, traced_command
+from src.parallel import bounded_map
+
+# Subdirectories of the train and test shards
+SIDES = ('train_data', 'test_data')
+
+def _mix(x):
+    # splitmix64 finalizer: spreads every input bit over the whole 64-bit hash
+    import numpy as np
+    with np.errstate(over = 'ignore'):
+        x = (x + np.uint64(0x9E3779B97F4A7C15)).astype(np.uint64)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+def row_hashes(df, columns = None, seed = 2025):
+    """
+    Seeded 64-bit hash of the contents of every row.
+
+    The hash depends only on the row's values, never on its position, chunk
+    or file, so a row hashes the same however the data is read or appended
+    to. Numeric and boolean values are hashed as float32, so float32 chunks
+    of `read_csv_chunks` and float64 full reads of one file agree; -0.0 and
+    0.0 hash alike, as do all NaNs.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The data.
+    columns : list[str], optional
+        Columns to hash (default is all columns).
+    seed : int, optional
+        Seed of the hash (default is 2025).
+
+    Returns
+    -------
+    numpy.ndarray
+        One uint64 hash per row.
+    """
+    import numpy as np
+    import pandas as pd
+
+    hashes = np.full(len(df), _mix(np.uint64(seed)), dtype = np.uint64)
+    for col in (df.columns if columns is None else columns):
+        values = df[col]
+        if values.dtype.kind in 'biuf':
+            values = values.to_numpy(dtype = np.float32)
+            values = pd.util.hash_array(np.where(np.isnan(values), np.float32(np.nan), values + np.float32(0)))
+        else:
+            values = pd.util.hash_pandas_object(values, index = False).to_numpy()
+        hashes = _mix(hashes ^ values)
+    return hashes
+
+def hash_test_mask(df, columns = None, stratify = 'quality_binary', test_size = 0.2, seed = 2025):
+    """
+    Assign every row to the test set or not from a seeded hash of its contents.
+
+    A row is a test row when its hash, salted with its `stratify` class and
+    read as a fraction of 2**64, is below `test_size`. Every class is thus
+    split `test_size` / (1 - `test_size`) in expectation (the achieved
+    shares deviate binomially, see `SplitBalance`), without a global
+    shuffle: the assignment of a row is the same in any chunk, worker or
+    later run with appended rows, and identical rows always land on the same
+    side, so duplicates never leak across the split.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The data.
+    columns : list[str], optional
+        Columns whose values are hashed (default is all columns but `stratify`).
+    stratify : str, optional
+        Column of the classes the split is stratified by (default is 'quality_binary').
+    test_size : float, optional
+        Share of every class assigned to the test set (default is 0.2).
+    seed : int, optional
+        Seed of the hash (default is 2025).
+
+    Returns
+    -------
+    numpy.ndarray
+        Boolean mask of the test rows.
+    """
+    import numpy as np
+    if not 0 < test_size < 1:
+        raise ValueError(f"test_size must lie in (0, 1), got {test_size}.")
+    if columns is None:
+        columns = [col for col in df.columns if col != stratify]
+    hashes = row_hashes(df, columns, seed)
+    if stratify is not None:
+        hashes = _mix(hashes ^ row_hashes(df, [stratify], seed + 1))
+    return hashes < np.uint64(test_size * 2.0 ** 64)
+
+class SplitBalance:
+    """
+    Row counts per class and side of a split, accumulated chunk by chunk and mergeable across workers.
+    """
+
+    def __init__(self):
+        self.counts = {}
+
+    def update(self, y, is_test):
+        """
+        Add the classes `y` of one chunk and its boolean test mask.
+        """
+        import numpy as np
+        values, codes = np.unique(np.asarray(y), return_inverse = True)
+        counts = np.bincount(2 * codes + np.asarray(is_test, dtype = np.int64), minlength = 2 * len(values))
+        for value, (train, test) in zip(values.tolist(), counts.reshape(-1, 2).tolist()):
+            total_train, total_test = self.counts.get(value, (0, 0))
+            self.counts[value] = (total_train + train, total_test + test)
+        return self
+
+    def merge(self, other):
+        """
+        Add the counts of another `SplitBalance`, e.g. of another worker's chunks.
+        """
+        for value, (train, test) in other.counts.items():
+            total_train, total_test = self.counts.get(value, (0, 0))
+            self.counts[value] = (total_train + train, total_test + test)
+        return self
+
+    def report(self):
+        """
+        One row per class and one for all rows: the train and test counts, the
+        achieved test fraction and the class's share of the train and of the
+        test rows.
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        import pandas as pd
+        report = pd.DataFrame([(value, train, test) for value, (train, test) in sorted(self.counts.items())],
+                              columns = ['class', 'train', 'test'])
+        report = pd.concat([report, pd.DataFrame([['all', report['train'].sum(), report['test'].sum()]],
+                                                 columns = report.columns)], ignore_index = True)
+        report['test_fraction'] = report['test'] / (report['train'] + report['test'])
+        report['train_share'] = report['train'] / report['train'].iloc[-1]
+        report['test_share'] = report['test'] / report['test'].iloc[-1]
+        return report
+
+def _split_chunk(item, path_save, data_format, columns, stratify, test_size, seed):
+    # Split one chunk and write its train and test parts; runs in a worker process
+    i, chunk = item
+    if stratify == 'quality_binary' and stratify not in chunk:
+        chunk = chunk.assign(quality_binary = chunk['quality'] >= 7)
+    test = hash_test_mask(chunk, columns, stratify, test_size, seed)
+    for name, part in zip(SIDES, [chunk[~test], chunk[test]]):
+        write_frame(part, os.path.join(path_save, name, f'part-{i:05d}.{data_format}'))
+    return SplitBalance().update(chunk[stratify], test)
+
+def hash_split_chunks(chunks, path_save, data_format = 'csv', columns = None, stratify = 'quality_binary',
+                      test_size = 0.2, seed = 2025, n_jobs = 1):
+    """
+    Split a stream of chunks with `hash_test_mask` and write the sides as shards.
+
+    Chunk i is written to `path_save/train_data/part-i.<format>` and
+    `path_save/test_data/part-i.<format>` (readable as one frame with
+    `frame_io.read_frame` on the directory), by the worker that split it;
+    nothing is permuted or gathered, and at most 2 * `n_jobs` chunks are in
+    memory. Both directories replace those of an earlier split only once
+    every chunk is written.
+
+    Parameters
+    ----------
+    chunks : iterable of pandas.DataFrame
+        The data, e.g. from `iter_frame_chunks`.
+    path_save : str
+        Output directory.
+    data_format : str, optional
+        Format of the shards, one of `frame_io.FORMATS` (default is 'csv').
+    columns, stratify, test_size, seed
+        As in `hash_test_mask`. Raw chunks without 'quality_binary' get it
+        derived from 'quality'.
+    n_jobs : int, optional
+        Number of worker processes (default is 1, no pool).
+
+    Returns
+    -------
+    SplitBalance
+        Class counts of both sides.
+    """
+    # Write into a hidden staging directory and swap it in at the end, so shards of an
+    # earlier run are never mixed with the new ones, and a failed run keeps the old split
+    os.makedirs(path_save, exist_ok = True)
+    staging = tempfile.mkdtemp(prefix = '.hash_split-', dir = path_save)
+    try:
+        for name in SIDES:
+            os.makedirs(os.path.join(staging, name))
+        split = partial(_split_chunk, path_save = staging, data_format = data_format, columns = columns,
+                        stratify = stratify, test_size = test_size, seed = seed)
+        balance = SplitBalance()
+        for part in bounded_map(split, enumerate(chunks), n_jobs):
+            balance.merge(part)
+        for name in SIDES:
+            shutil.rmtree(os.path.join(path_save, name), ignore_errors = True)
+            os.replace(os.path.join(staging, name), os.path.join(path_save, name))
+    finally:
+        shutil.rmtree(staging, ignore_errors = True)
+    return balance
+
+@click.command()
+@click.argument('paths_read', nargs = -1, required = True, type = str)
+@click.argument('path_save', type = str)
+@click.option('--chunksize', type = int, default = 100_000, help = 'Rows per chunk, and at most per shard.')
+@click.option('--format', 'data_format', type = click.Choice(FORMATS), default = 'csv',
+              help = 'File format of the train and test shards.')
+@click.option('--test-size', type = float, default = 0.2, help = 'Share of every class put in the test set.')
+@click.option('--seed', type = int, default = 2025, help = 'Seed of the row hash.')
+@click.option('--n-jobs', type = int, default = 1, help = 'Number of worker processes.')
+@click.option('--delim', type = str, default = ",", help = 'Field delimiter of CSV input.')
+@traced_command('hash_split')
+def main(paths_read, path_save, chunksize, data_format, test_size, seed, n_jobs, delim):
+    # Split one or more (validated) data files into train/test shards, chunk by chunk
+    chunks = (chunk for path in paths_read for chunk in iter_frame_chunks(path, chunksize, delim = delim))
+    with stage('split_chunks', n_jobs = n_jobs):
+        report = hash_split_chunks(chunks, path_save, data_format, test_size = test_size, seed = seed,
+                                   n_jobs = n_jobs).report()
+    report.to_csv(os.path.join(path_save, 'split_balance.csv'), index = False)
+    click.echo(report.to_string(index = False))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+import os
+import time
+import click
+from src.frame_io import iter_frame_chunks
+from src.incremental_models import StreamingBinaryMetrics, build_incremental_models
+from src.instrument import stage, traced, traced_command
+
+def _chunk_xy(chunk, feature_columns, dtype):
+    """
+    Compact features (as a frame of views, keeping the feature names) and target of one chunk.
+
+    Processed data has 'quality_binary'; raw data only has 'quality', which is binarized like
+    `data_processing.py` does.
+    """
+    from src.wine_dataset import WineDataset
+    if 'quality_binary' not in chunk:
+        chunk = chunk.assign(quality_binary = chunk['quality'] >= 7)
+    dataset = WineDataset.from_frame(chunk, feature_columns, dtype = dtype)
+    return dataset.frame(target = None), dataset.y
+
+@traced()
+def train_incremental(models, path_train, feature_columns, chunksize = 100_000, epochs = 1, delim = ",",
+                      dtype = 'float32'):
+    """
+    Fit a scaler and `partial_fit` models on a training file streamed in chunks.
+
+    The first pass updates a `StandardScaler` with `partial_fit` and counts
+    the classes; every following pass (one per epoch) scales each chunk and
+    feeds it to every model with balanced sample weights. Only one chunk is
+    in memory at a time.
+
+    Parameters
+    ----------
+    models : dict[str, object]
+        Unfitted models with `partial_fit`, e.g. from `build_incremental_models`.
+    path_train : str
+        CSV, Feather or Parquet training file with `feature_columns` and
+        'quality_binary' (or 'quality').
+    feature_columns : list[str]
+        Feature columns, in the order the scaler is fitted on.
+    chunksize : int, optional
+        Rows per chunk (default is 100_000).
+    epochs : int, optional
+        Number of training passes over the file (default is 1).
+    delim : str, optional
+        Field delimiter of CSV input (default is ',').
+    dtype : str, optional
+        Dtype of the chunks' feature matrices (default is 'float32').
+
+    Returns
+    -------
+    scaler : sklearn.preprocessing.StandardScaler
+        The scaler fitted on the whole training file.
+    models : dict[str, object]
+        The same models, fitted.
+    fit_times : dict[str, float]
+        Wall-clock seconds spent in every model's `partial_fit` calls.
+    """
+    import numpy as np
+    from sklearn.preprocessing import StandardScaler
+
+    classes = np.array([False, True])
+    scaler = StandardScaler()
+    counts = np.zeros(2, dtype = np.int64)
+    with stage('fit_scaler'):
+        for chunk in iter_frame_chunks(path_train, chunksize, delim = delim):
+            X, y = _chunk_xy(chunk, feature_columns, dtype)
+            scaler.partial_fit(X)
+            counts += np.bincount(y, minlength = 2)
+
+    # Balanced class weights, as class_weight = 'balanced' would give on the whole file
+    class_weight = counts.sum() / (2 * np.maximum(counts, 1))
+    fit_times = dict.fromkeys(models, 0.0)
+    with stage('fit_models', epochs = epochs):
+        for _ in range(epochs):
+            for chunk in iter_frame_chunks(path_train, chunksize, delim = delim):
+                X, y = _chunk_xy(chunk, feature_columns, dtype)
+                X_scaled = scaler.transform(X)
+                weight = class_weight[y.astype(np.int64)]
+                for name, model in models.items():
+                    start = time.perf_counter()
+                    model.partial_fit(X_scaled, y, classes = classes, sample_weight = weight)
+                    fit_times[name] += time.perf_counter() - start
+    return scaler, models, fit_times
+
+@traced()
+def evaluate_incremental(models, scaler, path_test, feature_columns, chunksize = 100_000, auc_eps = 0.001,
+                         delim = ",", dtype = 'float32'):
+    """
+    Score a test file chunk by chunk and accumulate every model's metrics with `StreamingBinaryMetrics`.
+
+    Parameters
+    ----------
+    models : dict[str, object]
+        Fitted models.
+    scaler : sklearn.preprocessing.StandardScaler
+        Fitted scaler.
+    path_test : str
+        Test file with `feature_columns` and 'quality_binary' (or 'quality').
+    feature_columns : list[str]
+        Feature columns, in the order the scaler was fitted on.
+    chunksize : int, optional
+        Rows per chunk (default is 100_000).
+    auc_eps : float, optional
+        Normalized rank error of the streaming ROC AUC's score sketches (default is 0.001).
+    delim : str, optional
+        Field delimiter of CSV input (default is ',').
+    dtype : str, optional
+        Dtype of the chunks' feature matrices (default is 'float32').
+
+    Returns
+    -------
+    dict[str, dict]
+        `StreamingBinaryMetrics.result()` for every model.
+    """
+    from src.binary_metrics import positive_proba
+
+    metrics = {name: StreamingBinaryMetrics(auc_eps) for name in models}
+    for chunk in iter_frame_chunks(path_test, chunksize, delim = delim):
+        X, y = _chunk_xy(chunk, feature_columns, dtype)
+        X_scaled = scaler.transform(X)
+        for name, model in models.items():
+            y_score, y_pred = positive_proba(model, X_scaled)
+            metrics[name].update(y, y_score, y_pred)
+    return {name: metric.result() for name, metric in metrics.items()}
+
+@click.command()
+@click.argument('path_train', type = str)
+@click.argument('path_test', type = str)
+@click.argument('path_save', type = str)
+@click.option('--chunksize', type = int, default = 100_000, help = 'Rows per chunk.')
+@click.option('--epochs', type = int, default = 1, help = 'Training passes over the train file.')
+@click.option('--auc-eps', type = float, default = 0.001,
+              help = 'Rank error of the streaming ROC AUC (exact up to about 4 / eps scores per class).')
+@click.option('--delim', type = str, default = ",", help = 'Field delimiter of CSV input.')
+@click.option('--model-dir', type = str, default = None,
+              help = 'Directory where the fitted scaler and models are saved for inference.')
+@click.option('--params', 'path_params', type = str, default = None,
+              help = 'JSON file of hyperparameters per incremental model.')
+@traced_command('incremental')
+def main(path_train, path_test, path_save, chunksize, epochs, auc_eps, delim, model_dir, path_params):
+    import json
+    import pandas as pd
+    from src.model_store import save_models
+    from src.read_csv import FEATURE_DTYPES
+
+    feature_columns = list(FEATURE_DTYPES)
+    params = None
+    if path_params is not None:
+        with open(path_params) as f:
+            params = json.load(f)
+
+    scaler, models, fit_times = train_incremental(build_incremental_models(params), path_train, feature_columns,
+                                                  chunksize, epochs, delim)
+    metrics = evaluate_incremental(models, scaler, path_test, feature_columns, chunksize, auc_eps, delim)
+
+    results = [{
+        "Model": name,
+        "Test Accuracy": metric['accuracy'],
+        "Precision": metric['precision'],
+        "Recall": metric['recall'],
+        "F1 Score": metric['f1'],
+        "ROC AUC": metric['roc_auc'],
+        "Fit Wall Time (s)": fit_times[name]
+    } for name, metric in metrics.items()]
+    os.makedirs(path_save, exist_ok = True)
+    pd.DataFrame(results).to_csv(os.path.join(path_save, "incremental_performance_metrics.csv"), index = False)
+    if model_dir is not None:
+        save_models(scaler, models, feature_columns, model_dir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+class ChunkTreeEnsemble:
+    """
+    Mini-batch ensemble of decision trees, one tree fitted per training chunk.
+
+    Each `partial_fit` call fits a new tree on that chunk only. Once
+    `max_estimators` trees exist, a new tree replaces a random one with the
+    probability of reservoir sampling, so every chunk is equally likely to be
+    represented and the model size stays bounded however many chunks arrive.
+    Probabilities are the average of the trees' probabilities, like a random
+    forest's.
+
+    Parameters
+    ----------
+    max_estimators : int, optional
+        Maximum number of trees kept (default is 50).
+    max_depth : int, optional
+        Maximum depth of every tree (default is 8).
+    max_features : str, int or float, optional
+        Features considered per split, as in `DecisionTreeClassifier` (default is 'sqrt').
+    random_state : int, optional
+        Seed of the trees and of the reservoir (default is 2025).
+    """
+
+    def __init__(self, max_estimators = 50, max_depth = 8, max_features = 'sqrt', random_state = 2025):
+        self.max_estimators = max_estimators
+        self.max_depth = max_depth
+        self.max_features = max_features
+        self.random_state = random_state
+
+    def partial_fit(self, X, y, classes = None, sample_weight = None):
+        """
+        Fit one tree on this chunk and add it to the ensemble.
+        """
+        import numpy as np
+        from sklearn.tree import DecisionTreeClassifier
+
+        if not hasattr(self, 'estimators_'):
+            self.estimators_ = []
+            self.n_chunks_ = 0
+            self._rng = np.random.default_rng(self.random_state)
+            self.classes_ = np.asarray(classes if classes is not None else np.unique(y))
+        tree = DecisionTreeClassifier(max_depth = self.max_depth, max_features = self.max_features,
+                                      random_state = self.random_state + self.n_chunks_)
+        tree.fit(X, y, sample_weight = sample_weight)
+        self.n_chunks_ += 1
+
+        if len(self.estimators_) < self.max_estimators:
+            self.estimators_.append(tree)
+        else:
+            slot = self._rng.integers(self.n_chunks_)
+            if slot < self.max_estimators:
+                self.estimators_[slot] = tree
+        return self
+
+    def predict_proba(self, X):
+        """
+        Average class probabilities of the trees, aligned on `classes_`.
+        """
+        import numpy as np
+        proba = np.zeros((X.shape[0], len(self.classes_)))
+        for tree in self.estimators_:
+            # A chunk may have missed a class; map each tree's columns onto the ensemble's classes
+            columns = np.searchsorted(self.classes_, tree.classes_)
+            proba[:, columns] += tree.predict_proba(X)
+        return proba / len(self.estimators_)
+
+    def predict(self, X):
+        import numpy as np
+        return self.classes_[np.argmax(self.predict_proba(X), axis = 1)]
+
+def build_incremental_models(params = None):
+    """
+    The `partial_fit` counterparts of the analysis models, keyed by display name.
+
+    Logistic regression becomes an `SGDClassifier` with the log loss, and the
+    tree models a `ChunkTreeEnsemble`; Gaussian naive Bayes is added as a
+    cheap exact streaming baseline. Class balancing is done with sample
+    weights, since `partial_fit` does not support `class_weight = 'balanced'`.
+
+    Parameters
+    ----------
+    params : dict[str, dict], optional
+        Hyperparameters per model name, overriding the defaults.
+
+    Returns
+    -------
+    dict[str, object]
+
+    Raises
+    ------
+    KeyError
+        If `params` names an unknown model.
+    """
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.naive_bayes import GaussianNB
+
+    models = {
+        'SGD Logistic Regression': SGDClassifier(loss = 'log_loss', alpha = 1e-4, random_state = 2025),
+        'Gaussian Naive Bayes': GaussianNB(),
+        'Chunk Tree Ensemble': ChunkTreeEnsemble(random_state = 2025)
+    }
+    for name, values in (params or {}).items():
+        if name not in models:
+            raise KeyError(f"Unknown model '{name}'; available models: {list(models)}.")
+        for key, value in values.items():
+            setattr(models[name], key, value)
+    return models
+
+class StreamingBinaryMetrics:
+    """
+    Classification metrics accumulated chunk by chunk, in memory independent of the data size.
+
+    Accuracy, precision, recall and F1 come from exact confusion counts. The
+    ROC AUC comes from two `QuantileSketch`es, of the positive and of the
+    negative class's scores: it is the weighted Mann-Whitney statistic of the
+    retained values, exact as long as neither sketch has compacted (about
+    4 / `eps` scores per class) and within about `eps` of the exact AUC after
+    that. Unlike a fixed histogram of [0, 1], this keeps its resolution when
+    a model's probabilities crowd near 0 or 1.
+
+    Parameters
+    ----------
+    eps : float, optional
+        Normalized rank error of the score sketches (default is 0.001).
+    seed : int, optional
+        Seed of the sketches' compactions (default is 2025).
+    """
+
+    def __init__(self, eps = 0.001, seed = 2025):
+        from src.quantile_sketch import QuantileSketch
+        self.tp = self.fp = self.tn = self.fn = 0
+        self.pos_scores = QuantileSketch(eps, seed)
+        self.neg_scores = QuantileSketch(eps, seed + 1)
+
+    def update(self, y_true, y_score, y_pred):
+        """
+        Add one chunk of boolean labels, positive-class scores and boolean predictions.
+        """
+        import numpy as np
+        y_true = np.asarray(y_true, dtype = bool)
+        y_pred = np.asarray(y_pred, dtype = bool)
+        self.tp += int(np.count_nonzero(y_pred & y_true))
+        self.fp += int(np.count_nonzero(y_pred & ~y_true))
+        self.fn += int(np.count_nonzero(~y_pred & y_true))
+        self.tn += int(np.count_nonzero(~y_pred & ~y_true))
+
+        y_score = np.asarray(y_score, dtype = float)
+        self.pos_scores.update(y_score[y_true])
+        self.neg_scores.update(y_score[~y_true])
+        return self
+
+    def roc_auc(self):
+        """
+        AUC as the weighted share of (positive, negative) pairs where the positive scores higher, ties counting half.
+        """
+        import numpy as np
+        if self.pos_scores.n == 0 or self.neg_scores.n == 0:
+            raise ValueError("Only one class present in y_true. ROC AUC score is not defined in that case.")
+        pos, pos_weight = self.pos_scores.weighted_items()
+        neg, neg_weight = self.neg_scores.weighted_items()
+        order = np.argsort(neg, kind = 'mergesort')
+        neg = neg[order]
+        neg_cum = np.r_[0.0, np.cumsum(neg_weight[order])]
+
+        # Negative weight below and equal to every positive score
+        below = neg_cum[np.searchsorted(neg, pos, side = 'left')]
+        equal = neg_cum[np.searchsorted(neg, pos, side = 'right')] - below
+        wins = np.sum(pos_weight * (below + equal / 2))
+        return float(wins / (pos_weight.sum() * neg_cum[-1]))
+
+    def result(self):
+        """
+        Dictionary with 'accuracy', 'precision', 'recall', 'f1', 'roc_auc' and 'n_rows'.
+        """
+        n = self.tp + self.fp + self.tn + self.fn
+        return {
+            'accuracy': (self.tp + self.tn) / n,
+            'precision': self.tp / (self.tp + self.fp) if self.tp + self.fp else 0.0,
+            'recall': self.tp / (self.tp + self.fn) if self.tp + self.fn else 0.0,
+            'f1': 2 * self.tp / (2 * self.tp + self.fp + self.fn) if self.tp + self.fp + self.fn else 0.0,
+            'roc_auc': self.roc_auc(),
+            'n_rows': n
+        }
@@ -0,0 +1,274 @@
+import datetime
+import functools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+import click
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+PROFILERS = ('cprofile', 'pyinstrument')
+
+# Active tracer of this process, set by `run_trace`
+_TRACER = None
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 2 ** 20 if sys.platform == 'darwin' else 2 ** 10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+class Tracer:
+    """
+    Record nested timing and memory spans of one run.
+
+    Every span records its wall-clock and process CPU time, the peak memory
+    traced by `tracemalloc` above the level at its start (including nested
+    spans), and the process's peak resident set size when it ends.
+
+    Parameters
+    ----------
+    name : str
+        Name of the run, e.g. the pipeline stage.
+    trace_memory : bool, optional
+        Trace Python allocations with `tracemalloc` (default is True). This
+        slows allocation-heavy code down; without it only the RSS is recorded.
+    """
+
+    def __init__(self, name, trace_memory = True):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.spans = []
+        self.started = datetime.datetime.now().isoformat(timespec = 'seconds')
+        self._start = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        Context manager recording one span; extra keyword arguments are stored with it.
+        """
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        record = {'name': name, 'parent': parent['name'] if parent else None, 'depth': len(stack), **attrs}
+        traced_start = 0
+        if self.trace_memory and tracemalloc.is_tracing():
+            # Fold the peak so far into the parent before resetting it for this span
+            traced_start, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                parent['_peak'] = max(parent['_peak'], peak)
+            tracemalloc.reset_peak()
+        record['_peak'] = traced_start
+        stack.append(record)
+
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield record
+        finally:
+            record['start_s'] = start_wall - self._start
+            record['wall_s'] = time.perf_counter() - start_wall
+            record['cpu_s'] = time.process_time() - start_cpu
+            peak = record.pop('_peak')
+            if self.trace_memory and tracemalloc.is_tracing():
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                record['tracemalloc_peak_mb'] = (peak - traced_start) / 2 ** 20
+                if parent is not None:
+                    parent['_peak'] = max(parent['_peak'], peak)
+            record['max_rss_mb'] = _max_rss_mb()
+            stack.pop()
+            with self._lock:
+                self.spans.append(record)
+
+    def to_dict(self):
+        """
+        The trace as a JSON-serializable dictionary, with spans in start order.
+        """
+        return {
+            'run': self.name,
+            'started': self.started,
+            'python': platform.python_version(),
+            'argv': sys.argv,
+            'total_s': time.perf_counter() - self._start,
+            'max_rss_mb': _max_rss_mb(),
+            'spans': sorted(self.spans, key = lambda span: span['start_s'])
+        }
+
+    def write(self, path):
+        """
+        Write the trace as JSON to `path`.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent = 2, default = str)
+
+@contextmanager
+def stage(name, **attrs):
+    """
+    Record a span of the active trace; does nothing when no trace is running.
+
+    Parameters
+    ----------
+    name : str
+        Name of the span, e.g. 'eda.save_heatmap'.
+    **attrs
+        Extra values stored with the span, e.g. the number of rows.
+    """
+    if _TRACER is None:
+        yield None
+    else:
+        with _TRACER.span(name, **attrs) as record:
+            yield record
+
+def traced(name = None):
+    """
+    Decorator recording every call of a function as a span of the active trace.
+
+    Parameters
+    ----------
+    name : str, optional
+        Name of the span (default is the function's name).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _TRACER is None:
+                return func(*args, **kwargs)
+            with _TRACER.span(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def run_trace(name, trace_dir = None, profile = None, trace_memory = True):
+    """
+    Trace one run of a pipeline stage, optionally under a profiler.
+
+    The run is recorded as a top-level span named `name`; spans opened with
+    `stage` or `traced` inside it are nested under it. On exit the trace is
+    written to `<trace_dir>/<name>.trace.json`, and a profile to
+    `<trace_dir>/<name>.prof` (cProfile, readable with `pstats` or snakeviz)
+    or `<trace_dir>/<name>.profile.html` (pyinstrument). Without `trace_dir`
+    and `profile` nothing is recorded.
+
+    Parameters
+    ----------
+    name : str
+        Name of the run.
+    trace_dir : str, optional
+        Directory of the trace and profile files; created if missing. Profiles
+        default to the current directory.
+    profile : str, optional
+        One of `PROFILERS` (default is no profiler). pyinstrument must be installed.
+    trace_memory : bool, optional
+        Trace Python allocations with `tracemalloc` (default is True).
+
+    Raises
+    ------
+    ValueError
+        If `profile` is not one of `PROFILERS`.
+    """
+    global _TRACER
+    if trace_dir is None and profile is None:
+        yield None
+        return
+    if profile is not None and profile not in PROFILERS:
+        raise ValueError(f"Unknown profiler '{profile}'; expected one of {PROFILERS}.")
+
+    out_dir = trace_dir or '.'
+    os.makedirs(out_dir, exist_ok = True)
+    profiler = None
+    if profile == 'cprofile':
+        import cProfile
+        profiler = cProfile.Profile()
+    elif profile == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError as error:
+            raise ImportError("The pyinstrument profiler requires `pip install pyinstrument`.") from error
+        profiler = Profiler()
+
+    tracer = Tracer(name, trace_memory = trace_memory and trace_dir is not None)
+    started_tracing = tracer.trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _TRACER = tracer
+    if profile == 'cprofile':
+        profiler.enable()
+    elif profile == 'pyinstrument':
+        profiler.start()
+    try:
+        with tracer.span(name) as record:
+            yield record
+    finally:
+        if profile == 'cprofile':
+            profiler.disable()
+            profiler.dump_stats(os.path.join(out_dir, name + '.prof'))
+        elif profile == 'pyinstrument':
+            profiler.stop()
+            with open(os.path.join(out_dir, name + '.profile.html'), 'w') as f:
+                f.write(profiler.output_html())
+        _TRACER = None
+        if started_tracing:
+            tracemalloc.stop()
+        if trace_dir is not None:
+            tracer.write(os.path.join(trace_dir, name + '.trace.json'))
+
+def traced_command(name):
+    """
+    Add the `--trace-dir` and `--profile` options to a click command and trace its runs.
+
+    The option defaults come from the TRACE_DIR and PROFILE environment
+    variables, so a whole `make` run can be traced at once. Apply it below
+    `click.command()` and the arguments, right above the function.
+
+    Parameters
+    ----------
+    name : str
+        Name of the run, used for the trace and profile file names.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, trace_dir = None, profile = None, **kwargs):
+            with run_trace(name, trace_dir, profile):
+                return func(*args, **kwargs)
+        wrapper = click.option('--profile', type = click.Choice(PROFILERS), default = None, envvar = 'PROFILE',
+                               help = 'Also dump a cProfile or pyinstrument profile of the run.')(wrapper)
+        wrapper = click.option('--trace-dir', type = str, default = None, envvar = 'TRACE_DIR',
+                               help = 'Directory of a JSON trace of stage timings and memory use.')(wrapper)
+        return wrapper
+    return decorator
+
+@click.command()
+@click.argument('paths', type = str, nargs = -1, required = True)
+def main(paths):
+    # Print the spans of one or more traces as an indented table
+    for path in paths:
+        with open(path) as f:
+            trace = json.load(f)
+        click.echo(f"{trace['run']} ({trace['started']}): {trace['total_s']:.2f} s, "
+                   f"max RSS {trace['max_rss_mb'] or 0:.0f} MB")
+        click.echo(f"  {'span':<40} {'wall s':>9} {'cpu s':>9} {'traced MB':>10} {'RSS MB':>8}")
+        for span in trace['spans']:
+            label = '  ' * span['depth'] + span['name']
+            traced_mb = span.get('tracemalloc_peak_mb')
+            click.echo(f"  {label:<40} {span['wall_s']:>9.3f} {span['cpu_s']:>9.3f} "
+                       f"{'-' if traced_mb is None else format(traced_mb, '.1f'):>10} "
+                       f"{span['max_rss_mb'] or 0:>8.0f}")
+
+if __name__ == '__main__':
+    main()
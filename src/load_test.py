@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+import click
+from src.frame_io import read_frame
+
+def _post(url, payload):
+    import urllib.request
+    request = urllib.request.Request(url, data = json.dumps(payload).encode(),
+                                     headers = {'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+def _get(url):
+    import urllib.request
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+def run_load_test(url, rows, n_requests = 1000, concurrency = 16, batch_size = 1, model = None, seed = 2025):
+    """
+    Send prediction requests to a running server from concurrent client threads.
+
+    Parameters
+    ----------
+    url : str
+        Base URL of the server, e.g. 'http://127.0.0.1:8000'.
+    rows : numpy.ndarray
+        Feature rows that request payloads are sampled from.
+    n_requests : int, optional
+        Total number of requests (default is 1000).
+    concurrency : int, optional
+        Number of client threads (default is 16).
+    batch_size : int, optional
+        Rows per request (default is 1).
+    model : str, optional
+        Model to query (default is the server's first model).
+    seed : int, optional
+        Seed for sampling the rows (default is 2025).
+
+    Returns
+    -------
+    dict
+        Client-side request count, errors, p50/p99 latency in ms and
+        requests and rows per second.
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    payloads = [{'instances': rows[rng.integers(len(rows), size = batch_size)].tolist(), 'model': model}
+                for _ in range(min(n_requests, 256))]
+    latencies = []
+    errors = []
+    counter = iter(range(n_requests))
+    lock = threading.Lock()
+
+    def client():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            try:
+                _post(url + '/predict', payloads[i % len(payloads)])
+            except Exception as error:
+                with lock:
+                    errors.append(error)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target = client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000 if latencies else (0.0, 0.0)
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'latency_p50_ms': float(p50),
+        'latency_p99_ms': float(p99),
+        'requests_per_s': len(latencies) / elapsed,
+        'rows_per_s': len(latencies) * batch_size / elapsed
+    }
+
+@click.command()
+@click.argument('url', type = str)
+@click.argument('path_read', type = str)
+@click.option('--requests', 'n_requests', type = int, default = 1000, help = 'Total number of requests.')
+@click.option('--concurrency', type = int, default = 16, help = 'Number of concurrent clients.')
+@click.option('--batch-size', type = int, default = 1, help = 'Rows per request.')
+@click.option('--model', type = str, default = None, help = 'Model to query.')
+def main(url, path_read, n_requests, concurrency, batch_size, model):
+    # Sample request rows from a data file, using the columns the server expects
+    feature_columns = _get(url + '/health')['feature_columns']
+    rows = read_frame(path_read, columns = feature_columns).to_numpy(dtype = float)
+
+    client = run_load_test(url, rows, n_requests, concurrency, batch_size, model)
+    server = _get(url + '/metrics')
+
+    click.echo('client: ' + json.dumps({k: round(v, 3) for k, v in client.items()}))
+    click.echo('server: ' + json.dumps({k: round(v, 3) for k, v in server.items()}))
+
+if __name__ == '__main__':
+    main()
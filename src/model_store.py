@@ -0,0 +1,89 @@
+import json
+import os
+import re
+import joblib
+
+MANIFEST = 'manifest.json'
+
+def _slug(name):
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+
+def save_models(scaler, trained_models, feature_columns, path_save):
+    """
+    Persist a fitted scaler and trained models for later inference.
+
+    Each object is written with joblib, and a manifest records the file of
+    every model and the feature columns the scaler expects, in order.
+
+    Parameters
+    ----------
+    scaler : sklearn.preprocessing.StandardScaler
+        The scaler fitted on the training features.
+    trained_models : dict[str, sklearn.base.BaseEstimator]
+        Fitted models keyed by display name, e.g. from `train_evaluate_models`.
+    feature_columns : list[str]
+        Feature columns in the order the scaler was fitted on.
+    path_save : str
+        Directory to write to; created if missing.
+    """
+    os.makedirs(path_save, exist_ok = True)
+    joblib.dump(scaler, os.path.join(path_save, 'scaler.joblib'))
+
+    files = {}
+    for name, model in trained_models.items():
+        files[name] = _slug(name) + '.joblib'
+        joblib.dump(model, os.path.join(path_save, files[name]))
+
+    manifest = {'feature_columns': list(feature_columns), 'scaler': 'scaler.joblib', 'models': files}
+    with open(os.path.join(path_save, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent = 2)
+
+def load_models(path_read, names = None, compiled = False):
+    """
+    Load a scaler and models written by `save_models`.
+
+    Parameters
+    ----------
+    path_read : str
+        Directory written by `save_models`.
+    names : list[str], optional
+        Only load these models (default is all of them).
+    compiled : bool, optional
+        Load the `compiled_trees.CompiledForest` of the models exported with
+        `compiled_trees.export_compiled` instead of the sklearn model
+        (default is False).
+
+    Returns
+    -------
+    scaler : sklearn.preprocessing.StandardScaler
+        The fitted scaler.
+    models : dict[str, sklearn.base.BaseEstimator]
+        The fitted models, in the order they were saved.
+    feature_columns : list[str]
+        Feature columns in the order the scaler expects.
+
+    Raises
+    ------
+    KeyError
+        If a requested model is not in the manifest.
+    """
+    with open(os.path.join(path_read, MANIFEST)) as f:
+        manifest = json.load(f)
+
+    files = manifest['models']
+    for name in names or []:
+        if name not in files:
+            raise KeyError(f"Model '{name}' not found; available models: {list(files)}.")
+
+    scaler = joblib.load(os.path.join(path_read, manifest['scaler']))
+    models = {name: joblib.load(os.path.join(path_read, file))
+              for name, file in files.items()
+              if (names is None or name in names) and not (compiled and name in manifest.get('compiled', {}))}
+    if compiled:
+        from src.compiled_trees import CompiledForest
+        for name, file in manifest.get('compiled', {}).items():
+            if names is None or name in names:
+                models[name] = CompiledForest.load(os.path.join(path_read, file))
+        # Keep the saved order
+        models = {name: models[name] for name in files if name in models}
+    return scaler, models, manifest['feature_columns']
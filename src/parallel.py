@@ -0,0 +1,55 @@
+from collections import deque
+
+def bounded_map(func, iterable, n_jobs = 1, initializer = None, initargs = (), max_pending = None,
+                mp_context = None):
+    """
+    Lazily map `func` over `iterable` in a process pool, yielding results in input order.
+
+    Unlike `ProcessPoolExecutor.map`, which submits the whole iterable at
+    once, at most `max_pending` items are in flight, so a stream of large
+    chunks never has to fit in memory.
+
+    Parameters
+    ----------
+    func : callable
+        Picklable function applied to each item.
+    iterable : iterable
+        Items to process, e.g. data chunks read from a file.
+    n_jobs : int, optional
+        Number of worker processes (default is 1, which runs in this process).
+    initializer : callable, optional
+        Called once per worker (and once here when `n_jobs` is 1) with `initargs`,
+        e.g. to load a model only once per process.
+    initargs : tuple, optional
+        Arguments of `initializer`.
+    max_pending : int, optional
+        Maximum number of submitted but unconsumed items (default is 2 * `n_jobs`).
+    mp_context : str, optional
+        Start method of the workers, e.g. 'spawn' when this process runs threads
+        that a forked child could deadlock on (default is the platform's default).
+
+    Yields
+    ------
+    object
+        `func(item)` for each item, in order.
+    """
+    if n_jobs <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for item in iterable:
+            yield func(item)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    max_pending = max_pending or 2 * n_jobs
+    context = None if mp_context is None else multiprocessing.get_context(mp_context)
+    with ProcessPoolExecutor(max_workers = n_jobs, mp_context = context, initializer = initializer,
+                             initargs = initargs) as pool:
+        pending = deque()
+        for item in iterable:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,371 @@
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import click
+from src.fetch import is_url
+from src.frame_io import FORMATS
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+RAW_DATA_URL = ('https://raw.githubusercontent.com/prudhvinathreddymalla/Red-Wine-Dataset/refs/heads/master/'
+                'winequality-red.csv')
+
+class Stage:
+    """
+    One step of the pipeline: a command with its inputs, outputs and code.
+
+    Parameters
+    ----------
+    name : str
+        Unique name of the stage.
+    command : list[str]
+        Command line run in a subprocess.
+    inputs : list[str], optional
+        Files or directories read by the command; their content is part of the fingerprint.
+    outputs : list[str], optional
+        Files or directories written by the command; paths ending in '/' are
+        directories and are created before the command runs.
+    code : list[str], optional
+        Source files of the command; their content is part of the fingerprint.
+    deps : list[str], optional
+        Stages that must finish first, usually the ones writing `inputs`.
+    always : bool, optional
+        Run the stage on every run, e.g. when it reads a remote source that
+        has no local fingerprint (default is False). The stages after it still
+        skip when it reproduces its previous outputs.
+    """
+
+    def __init__(self, name, command, inputs = (), outputs = (), code = (), deps = (), always = False):
+        self.name = name
+        self.command = list(command)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.code = list(code)
+        self.deps = list(deps)
+        self.always = always
+
+def module_sources(module):
+    """
+    Source files of a `src` module and of every `src` module it imports, recursively.
+
+    Imports inside functions count as well, so the deferred imports of the
+    entry points are followed.
+
+    Parameters
+    ----------
+    module : str
+        Dotted module name, e.g. 'src.analysis'.
+
+    Returns
+    -------
+    list[str]
+        Sorted paths of the source files.
+    """
+    seen = set()
+    pending = [module]
+    while pending:
+        path = os.path.join(SRC_DIR, pending.pop().split('.', 1)[1] + '.py')
+        if path in seen or not os.path.exists(path):
+            continue
+        seen.add(path)
+        with open(path) as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending += [alias.name for alias in node.names if alias.name.startswith('src.')]
+            elif isinstance(node, ast.ImportFrom) and node.module and node.module.startswith('src.'):
+                pending.append(node.module)
+    return sorted(seen)
+
+class Fingerprints:
+    """
+    Content hashes of files and directories, cached by size and modification time.
+
+    A file is only read again when its size or modification time changed, so
+    checking an unchanged multi-GB input costs one `os.stat`. Touching a file
+    without changing it re-hashes it but gives the same digest.
+
+    Parameters
+    ----------
+    cache : dict, optional
+        Previously saved `cache` attribute, mapping paths to (size, mtime_ns, digest).
+    """
+
+    def __init__(self, cache = None):
+        self.cache = dict(cache or {})
+
+    def file(self, path):
+        """
+        SHA-256 hex digest of a file's content, or None if it does not exist.
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        cached = self.cache.get(path)
+        if cached is not None and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(2 ** 20), b''):
+                h.update(block)
+        self.cache[path] = [stat.st_size, stat.st_mtime_ns, h.hexdigest()]
+        return h.hexdigest()
+
+    def path(self, path):
+        """
+        Digest of a file, or of the relative names and digests of all files under a directory.
+        """
+        if not os.path.isdir(path):
+            return self.file(path)
+        h = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                h.update(os.path.relpath(full, path).encode() + b'\0' + self.file(full).encode())
+        return h.hexdigest()
+
+    def stage(self, stage):
+        """
+        Fingerprint of a stage: its command, the content of its inputs and its code.
+        """
+        h = hashlib.sha256()
+        h.update(json.dumps(stage.command).encode())
+        for path in stage.inputs + stage.code:
+            h.update(b'\0' + path.encode() + b'\0' + str(self.path(path)).encode())
+        return h.hexdigest()
+
+class Pipeline:
+    """
+    Run a DAG of stages, skipping the ones whose fingerprint has not changed.
+
+    A stage is up to date when its fingerprint (command, input contents and
+    code contents) matches the one recorded after its last successful run and
+    its outputs still have the recorded content. Since inputs are compared by
+    content, re-creating an identical file (e.g. re-downloading the raw data)
+    does not invalidate the stages after it. Independent stages run in
+    parallel. The state is saved after every finished stage.
+
+    Parameters
+    ----------
+    stages : list[Stage]
+        The stages; dependencies must be listed before the stages using them.
+    state_path : str, optional
+        JSON file holding the fingerprints of the last runs (default is '.pipeline_state.json').
+    """
+
+    def __init__(self, stages, state_path = '.pipeline_state.json'):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'.")
+        self.state_path = state_path
+        state = {}
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+        self.records = state.get('stages', {})
+        self.fingerprints = Fingerprints(state.get('files'))
+
+    def _save(self):
+        # Atomic replace, so an interrupted run never leaves a truncated state file
+        fd, tmp_path = tempfile.mkstemp(dir = os.path.dirname(os.path.abspath(self.state_path)), suffix = '.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'stages': self.records, 'files': self.fingerprints.cache}, f, indent = 2)
+        os.replace(tmp_path, self.state_path)
+
+    def select(self, targets = None):
+        """
+        Names of the `targets` and all the stages they depend on, in definition order.
+        """
+        if not targets:
+            return list(self.stages)
+        needed = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage '{name}'; available stages: {list(self.stages)}.")
+            if name not in needed:
+                needed.add(name)
+                pending += self.stages[name].deps
+        return [name for name in self.stages if name in needed]
+
+    def is_current(self, name):
+        """
+        Whether a stage's fingerprint and outputs match its last successful run.
+        """
+        stage = self.stages[name]
+        record = self.records.get(name)
+        if stage.always or record is None or record['fingerprint'] != self.fingerprints.stage(stage):
+            return False
+        return all(self.fingerprints.path(path) == record['outputs'].get(path) for path in stage.outputs)
+
+    def _run_stage(self, name):
+        stage = self.stages[name]
+        for path in stage.outputs:
+            os.makedirs(path if path.endswith('/') else os.path.dirname(path) or '.', exist_ok = True)
+        start = time.perf_counter()
+        result = subprocess.run(stage.command, capture_output = True, text = True)
+        return result, time.perf_counter() - start
+
+    def run(self, targets = None, force = (), max_workers = None, dry_run = False, echo = print):
+        """
+        Run the stages that are out of date.
+
+        A stage runs when it is forced or out of date. Its fingerprint is
+        computed when it is scheduled, i.e. after its dependencies finished, so
+        it picks up whatever they wrote.
+
+        Parameters
+        ----------
+        targets : list[str], optional
+            Stages to bring up to date, with their dependencies (default is all stages).
+        force : list[str], optional
+            Stages to run even if they are up to date.
+        max_workers : int, optional
+            Maximum number of stages running at once (default is the number of stages).
+        dry_run : bool, optional
+            Only report which stages would run, assuming every out-of-date stage changes its outputs.
+        echo : callable, optional
+            Receives one progress line per stage (default is print).
+
+        Returns
+        -------
+        dict[str, str]
+            For every selected stage: 'ran', 'unchanged' (ran, but reproduced
+            its previous outputs), 'skipped', 'failed' or, in a dry run, 'would run'.
+
+        Raises
+        ------
+        RuntimeError
+            If a stage fails; stages already running are finished and recorded first.
+        """
+        names = self.select(targets)
+        status = {}
+        failed = None
+        with ThreadPoolExecutor(max_workers = max_workers or len(names)) as pool:
+            running = {}
+            while len(status) + len(running) < len(names) or running:
+                # Schedule every stage whose dependencies are done
+                for name in names:
+                    if failed is not None or name in status or name in running.values():
+                        continue
+                    if any(dep in names and dep not in status for dep in self.stages[name].deps):
+                        continue
+                    upstream_changed = dry_run and any(status.get(dep) == 'would run'
+                                                       for dep in self.stages[name].deps)
+                    if name not in force and not upstream_changed and self.is_current(name):
+                        status[name] = 'skipped'
+                        echo(f"[{name}] up to date")
+                    elif dry_run:
+                        status[name] = 'would run'
+                        echo(f"[{name}] would run: {' '.join(self.stages[name].command)}")
+                    else:
+                        echo(f"[{name}] running: {' '.join(self.stages[name].command)}")
+                        running[pool.submit(self._run_stage, name)] = name
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when = FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result, elapsed = future.result()
+                    if result.returncode != 0:
+                        failed = failed or (name, result)
+                        status[name] = 'failed'
+                        echo(f"[{name}] failed after {elapsed:.1f} s")
+                        continue
+                    stage = self.stages[name]
+                    outputs = {path: self.fingerprints.path(path) for path in stage.outputs}
+                    unchanged = (name in self.records and self.records[name]['outputs'] == outputs)
+                    self.records[name] = {'fingerprint': self.fingerprints.stage(stage), 'outputs': outputs,
+                                          'seconds': elapsed}
+                    self._save()
+                    # A rerun that reproduced the same outputs does not invalidate what follows
+                    status[name] = 'unchanged' if unchanged else 'ran'
+                    echo(f"[{name}] done in {elapsed:.1f} s" + (" (outputs unchanged)" if unchanged else ""))
+
+        if failed is not None:
+            name, result = failed
+            raise RuntimeError(f"Stage '{name}' failed with exit code {result.returncode}:\n{result.stderr}")
+        return status
+
+def default_stages(data_format = 'csv', url = RAW_DATA_URL, params = None, python = sys.executable,
+                   draft = False):
+    """
+    The stages of the Makefile: read_csv, data_processing, then eda and analysis.
+
+    A remote `url` cannot be fingerprinted locally, so read_csv then runs on
+    every run; with the download cache it only revalidates the source, and
+    the later stages rerun only if the raw data it writes changed. A local
+    `url` is an input of read_csv instead.
+
+    Parameters
+    ----------
+    data_format : str, optional
+        One of `frame_io.FORMATS` for the raw, train and test data (default is 'csv', like the Makefile).
+    url : str, optional
+        Location of the raw CSV data (default is the red wine dataset on GitHub).
+    params : str, optional
+        JSON file of tuned hyperparameters passed to analysis.py (default is None).
+    python : str, optional
+        Python interpreter running the stages (default is the current one).
+    draft : bool, optional
+        Pass `--draft` to eda.py and analysis.py, for quick SVG charts (default is False).
+
+    Returns
+    -------
+    list[Stage]
+        The stages in dependency order.
+    """
+    raw = f'data/raw/raw_data.{data_format}'
+    train = f'data/processed/train_data.{data_format}'
+    test = f'data/processed/test_data.{data_format}'
+    draft_args = ['--draft'] if draft else []
+    analysis_args = ['--model-dir', 'models/'] + (['--params', params] if params else []) + draft_args
+    return [
+        Stage('read_csv', [python, '-m', 'src.read_csv', url, raw],
+              inputs = [] if is_url(url) else [url], outputs = [raw], code = module_sources('src.read_csv'),
+              always = is_url(url)),
+        Stage('data_processing', [python, '-m', 'src.data_processing', raw, 'data/processed/',
+                                  '--format', data_format],
+              inputs = [raw], outputs = [train, test], code = module_sources('src.data_processing'),
+              deps = ['read_csv']),
+        Stage('eda', [python, '-m', 'src.eda', train, 'results/eda/'] + draft_args,
+              inputs = [train], outputs = ['results/eda/'], code = module_sources('src.eda'),
+              deps = ['data_processing']),
+        Stage('analysis', [python, '-m', 'src.analysis', train, test, 'results/models/'] + analysis_args,
+              inputs = [train, test] + ([params] if params else []),
+              outputs = ['results/models/', 'models/'], code = module_sources('src.analysis'),
+              deps = ['data_processing'])
+    ]
+
+@click.command()
+@click.argument('targets', type = str, nargs = -1)
+@click.option('--format', 'data_format', type = click.Choice(FORMATS), default = 'csv',
+              help = 'File format of the intermediate data.')
+@click.option('--url', type = str, default = RAW_DATA_URL, help = 'Location of the raw CSV data.')
+@click.option('--params', type = str, default = None, help = 'JSON file of tuned hyperparameters for analysis.py.')
+@click.option('--draft', is_flag = True, help = 'Write quick vector SVG charts instead of PNG files.')
+@click.option('--force', type = str, multiple = True, help = 'Run this stage even if it is up to date.')
+@click.option('--jobs', type = int, default = None, help = 'Maximum number of stages running at once.')
+@click.option('--dry-run', is_flag = True, help = 'Only show which stages would run.')
+@click.option('--state', 'state_path', type = str, default = '.pipeline_state.json',
+              help = 'File of the stage fingerprints.')
+def main(targets, data_format, url, params, draft, force, jobs, dry_run, state_path):
+    pipeline = Pipeline(default_stages(data_format, url, params, draft = draft), state_path)
+    try:
+        pipeline.run(list(targets), force, jobs, dry_run, echo = click.echo)
+    except RuntimeError as error:
+        raise click.ClickException(str(error))
+
+if __name__ == '__main__':
+    main()
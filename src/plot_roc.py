@@ -1,8 +1,12 @@
 import matplotlib.pyplot as plt
-from sklearn.metrics import roc_curve, auc
+import numpy as np
 import os
+from src.curves import downsample_indices, model_curves, score_matrix
+from src.instrument import traced
 
-def plot_roc_curves(trained_models, X_test, y_test, path_save, filename = 'roc_curves.png', figsize = (10, 7)):
+@traced()
+def plot_roc_curves(trained_models, X_test, y_test, path_save, filename = 'roc_curves.png', figsize = (10, 7),
+                    curves = None, max_points = 1000, dpi = 300):
     """
     Plot receiver operating characteristic (ROC) curves for multiple trained models.
 
@@ -20,7 +24,17 @@ def plot_roc_curves(trained_models, X_test, y_test, path_save, filename = 'roc_c
         Name of the file to save the plot (default is 'roc_curves.png').
     figsize : tuple, optional
         Size of the figure (default is (10, 7)).
-    
+    curves : dict, optional
+        Precomputed ROC curves keyed by model name, each a dictionary with 'fpr', 'tpr'
+        and 'roc_auc' as returned by `train_evaluate_models(..., return_curves = True)`.
+        Models found here are not scored again; the others are predicted on `X_test`
+        and their curves computed together with `curves.model_curves`.
+    max_points : int, optional
+        Plot at most this many points per curve (default is 1000), so that large
+        test sets stay fast to draw; None plots every threshold.
+    dpi : float, optional
+        Resolution of raster output (default is 300); an .svg or .pdf `filename` is vector output.
+
     Returns:
     --------
     fig : matplotlib.figure.Figure
@@ -36,11 +50,18 @@ def plot_roc_curves(trained_models, X_test, y_test, path_save, filename = 'roc_c
     # Plot ROC curves
     fig, ax = plt.subplots(figsize = figsize)
 
-    for name, model in trained_models.items():
-        y_proba = model.predict_proba(X_test)[:, 1]
-        fpr, tpr, _ = roc_curve(y_test, y_proba)
-        roc_auc = auc(fpr, tpr)
-    
+    # Score the models without precomputed curves together, sorting each column once
+    curves = dict(curves or {})
+    missing = {name: model for name, model in trained_models.items() if name not in curves}
+    if missing:
+        curves.update(model_curves(y_test, score_matrix(missing, X_test), list(missing)))
+
+    for name in trained_models:
+        fpr, tpr, roc_auc = curves[name]['fpr'], curves[name]['tpr'], curves[name]['roc_auc']
+        if max_points is not None:
+            keep = downsample_indices(fpr, tpr, max_points)
+            fpr, tpr = np.asarray(fpr)[keep], np.asarray(tpr)[keep]
+
         ax.plot(fpr, tpr, linewidth = 2.5, 
             label = f'{name} (AUC = {roc_auc:.3f})')
 
@@ -56,6 +77,6 @@ def plot_roc_curves(trained_models, X_test, y_test, path_save, filename = 'roc_c
     plt.tight_layout()
 
     output_path = os.path.join(path_save, filename)
-    fig.savefig(output_path, dpi = 300, bbox_inches = 'tight')
+    fig.savefig(output_path, dpi = dpi, bbox_inches = 'tight')
 
     return fig, ax
\ No newline at end of file
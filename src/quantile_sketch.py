@@ -0,0 +1,317 @@
+import math
+import click
+from functools import partial
+from src.parallel import bounded_map
+from src.read_csv import FEATURE_DTYPES, read_csv_chunks
+
+class QuantileSketch:
+    """
+    Mergeable streaming quantile sketch (KLL compactor hierarchy).
+
+    Values are kept in levels; an item on level h stands for 2**h input values.
+    When a level grows past its capacity it is sorted and every other item,
+    starting at a random offset, is promoted to the next level. Capacities
+    shrink geometrically towards the bottom levels, so memory is O(k) however
+    many values are added, and two sketches are merged by concatenating their
+    levels and compacting again.
+
+    Parameters
+    ----------
+    eps : float, optional
+        Target normalized rank error (default is 0.01). The top-level
+        capacity is ceil(4 / eps), which keeps the observed error below `eps`
+        on a million values; `rank_error_bound` reports the worst case.
+    seed : int, optional
+        Seed of the random compaction offsets.
+    """
+
+    def __init__(self, eps = 0.01, seed = None):
+        if not 0 < eps < 1:
+            raise ValueError("eps must be between 0 and 1.")
+        import numpy as np
+        self.eps = eps
+        self.k = math.ceil(4 / eps)
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self.compactions = [0]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h):
+        depth = len(self.levels) - h - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def _compress(self):
+        import numpy as np
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                    self.compactions.append(0)
+                level = np.sort(level)
+                # An odd item out stays on this level
+                keep = level[len(level) - len(level) % 2:]
+                promoted = level[self._rng.integers(2):len(level) - len(keep):2]
+                self.levels[h] = keep
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                self.compactions[h] += 1
+            h += 1
+
+    def update(self, values):
+        """
+        Add a batch of values; missing values are ignored.
+        """
+        import numpy as np
+        values = np.asarray(values, dtype = float).ravel()
+        values = values[~np.isnan(values)]
+        self.n += values.size
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Merge another sketch into this one, as if its values had been added here.
+        """
+        import numpy as np
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+            self.compactions.append(0)
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+            self.compactions[h] += other.compactions[h]
+        self.n += other.n
+        self._compress()
+        return self
+
+    def weighted_items(self):
+        """
+        The retained values and the number of input values each stands for (2**h on level h).
+        """
+        import numpy as np
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        return items, weights
+
+    def quantile(self, q):
+        """
+        Return the approximate q-quantile(s), like `numpy.quantile` with method 'inverted_cdf'.
+        """
+        if self.n == 0:
+            raise ValueError("Cannot compute quantiles of an empty sketch.")
+        import numpy as np
+        items, weights = self.weighted_items()
+        order = np.argsort(items, kind = 'mergesort')
+        cum_weights = np.cumsum(weights[order])
+
+        q = np.asarray(q, dtype = float)
+        pos = np.searchsorted(cum_weights, q * cum_weights[-1], side = 'left')
+        return items[order][np.minimum(pos, len(items) - 1)]
+
+    def rank_error_bound(self):
+        """
+        Worst-case normalized rank error of the compactions done so far.
+
+        Each compaction on level h shifts any rank by at most 2**h, so the
+        bound is the sum of those shifts divided by the number of values.
+        The random offsets make the typical error much smaller.
+        """
+        if self.n == 0:
+            return 0.0
+        return float(sum(c * 2 ** h for h, c in enumerate(self.compactions)) / self.n)
+
+def _chunk_sketches(item, eps):
+    # One sketch per column of a chunk, built in a worker process
+    values, seed = item
+    return [QuantileSketch(eps, seed).update(values[:, j]) for j in range(values.shape[1])]
+
+def build_sketches(chunks, feature_columns, eps = 0.01, n_jobs = 1, seed = 2025):
+    """
+    Build one quantile sketch per feature column from a stream of chunks.
+
+    With `n_jobs` > 1 each chunk is sketched in a worker process and the
+    partial sketches are merged; at most 2 * `n_jobs` chunks are in flight,
+    so memory stays bounded.
+
+    Parameters
+    ----------
+    chunks : iterable of pandas.DataFrame
+        The data, e.g. from `read_csv_chunks`.
+    feature_columns : list[str]
+        Columns to sketch.
+    eps : float, optional
+        Target normalized rank error of each sketch (default is 0.01).
+    n_jobs : int, optional
+        Number of worker processes (default is 1, no pool).
+    seed : int, optional
+        Seed of the compaction offsets (default is 2025).
+
+    Returns
+    -------
+    dict[str, QuantileSketch]
+        The merged sketch of every column.
+    """
+    sketches = {col: QuantileSketch(eps, seed) for col in feature_columns}
+    items = ((chunk[feature_columns].to_numpy(dtype = float), seed + i) for i, chunk in enumerate(chunks))
+    for parts in bounded_map(partial(_chunk_sketches, eps = eps), items, n_jobs):
+        for col, part in zip(feature_columns, parts):
+            sketches[col].merge(part)
+    return sketches
+
+def sketch_chunks(chunks, sketches):
+    """
+    Pass chunks through unchanged while adding their values to `sketches`.
+
+    Lets the sketches be built during a read that is needed anyway, e.g.
+    while `read_csv_chunks` output is being concatenated.
+
+    Parameters
+    ----------
+    chunks : iterable of pandas.DataFrame
+        The data.
+    sketches : dict[str, QuantileSketch]
+        One sketch per column to update, keyed by column name.
+
+    Yields
+    ------
+    pandas.DataFrame
+        The input chunks.
+    """
+    for chunk in chunks:
+        for col, sketch in sketches.items():
+            sketch.update(chunk[col].to_numpy())
+        yield chunk
+
+def sketch_bounds(sketches, feature_columns, iqr_mult = 3):
+    """
+    IQR outlier bounds from the sketched quartiles, in `feature_columns` order.
+
+    Returns
+    -------
+    lower, upper : numpy.ndarray
+        Per-column lower and upper bounds, as from `validation_engine.iqr_bounds`.
+    """
+    import numpy as np
+    q1, q3 = np.array([sketches[col].quantile([0.25, 0.75]) for col in feature_columns]).T
+    iqr = q3 - q1
+    return q1 - iqr_mult * iqr, q3 + iqr_mult * iqr
+
+def streaming_outlier_failure_cases(chunks, feature_columns, bounds):
+    """
+    Second pass: flag the values outside `bounds`, one chunk at a time.
+
+    Rows are identified by their position in the stream, which matches the
+    index of the chunks concatenated with `ignore_index = True`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per outlying value, in the `FAILURE_CASE_COLUMNS` layout.
+    """
+    import numpy as np
+    import pandas as pd
+    from src.validation_engine import FAILURE_CASE_COLUMNS
+
+    lower, upper = bounds
+    columns = np.asarray(feature_columns, dtype = object)
+    failures = []
+    offset = 0
+    for chunk in chunks:
+        X = chunk[feature_columns].to_numpy(dtype = float)
+        rows, cols = np.nonzero((X < lower) | (X > upper))
+        failures.append(pd.DataFrame({
+            'schema_context': 'Column',
+            'column': columns[cols],
+            'check': 'outlier_check',
+            'check_number': 0,
+            'failure_case': X[rows, cols],
+            'index': rows + offset
+        }, columns = FAILURE_CASE_COLUMNS))
+        offset += len(chunk)
+
+    cases = pd.concat(failures, ignore_index = True)
+    order = np.lexsort((cases['index'].to_numpy(), pd.Categorical(cases['column'], feature_columns).codes))
+    return cases.iloc[order].reset_index(drop = True)
+
+def sketch_report(path_read, delim = ",", eps = 0.01, chunksize = 100_000, n_jobs = 1, iqr_mult = 3):
+    """
+    Compare sketched quartiles and outlier flags of a CSV file with the exact ones.
+
+    Both passes parse the features as float32 (`FEATURE_DTYPES`), so the
+    report measures the sketch error only, not float32 rounding.
+
+    Parameters
+    ----------
+    path_read : str
+        URL or path of the raw CSV file.
+    delim : str, optional
+        Field delimiter (default is ',').
+    eps, chunksize, n_jobs, iqr_mult
+        As in `build_sketches`, `read_csv_chunks` and `sketch_bounds`.
+
+    Returns
+    -------
+    report : pandas.DataFrame
+        One row per feature: exact and sketched quartiles and bounds, the
+        largest normalized rank error of the sketched quartiles, the number of
+        exact outliers and the number of rows flagged differently.
+    sketches : dict[str, QuantileSketch]
+        The sketch of every feature.
+    """
+    import numpy as np
+    import pandas as pd
+    from src.validation_engine import iqr_bounds, outlier_failure_cases
+    feature_columns = list(FEATURE_DTYPES)
+
+    sketches = build_sketches(read_csv_chunks(path_read, delim, chunksize), feature_columns, eps, n_jobs)
+    bounds = sketch_bounds(sketches, feature_columns, iqr_mult)
+    sketch_cases = streaming_outlier_failure_cases(read_csv_chunks(path_read, delim, chunksize),
+                                                   feature_columns, bounds)
+
+    # Widened losslessly from float32, so both sides see the same values
+    df = pd.read_csv(path_read, sep = delim, usecols = feature_columns, dtype = FEATURE_DTYPES).astype(float)
+    X = df[feature_columns].to_numpy()
+    exact_lower, exact_upper = iqr_bounds(X, iqr_mult)
+    exact_cases = outlier_failure_cases(df, feature_columns, iqr_mult)
+
+    rows = []
+    for j, col in enumerate(feature_columns):
+        values = np.sort(X[:, j])
+        sketch_q = sketches[col].quantile([0.25, 0.75])
+        exact_q = np.quantile(values, [0.25, 0.75])
+        # Distance of the sketched quartiles' normalized rank range from 0.25 and 0.75
+        low = np.searchsorted(values, sketch_q, side = 'left') / len(values)
+        high = np.searchsorted(values, sketch_q, side = 'right') / len(values)
+        q = np.array([0.25, 0.75])
+        rank_error = np.maximum(0, np.maximum(low - q, q - high))
+        exact_rows = set(exact_cases.loc[exact_cases['column'] == col, 'index'])
+        sketch_rows = set(sketch_cases.loc[sketch_cases['column'] == col, 'index'])
+        rows.append({
+            'column': col,
+            'exact q1': exact_q[0], 'sketch q1': sketch_q[0],
+            'exact q3': exact_q[1], 'sketch q3': sketch_q[1],
+            'max rank error': float(rank_error.max()),
+            'exact lower': exact_lower[j], 'sketch lower': bounds[0][j],
+            'exact upper': exact_upper[j], 'sketch upper': bounds[1][j],
+            'exact outliers': len(exact_rows),
+            'flagged differently': len(exact_rows ^ sketch_rows)
+        })
+    return pd.DataFrame(rows).set_index('column'), sketches
+
+@click.command()
+@click.argument('path_read', type = str)
+@click.option('--delim', type = str, default = ',')
+@click.option('--eps', type = float, default = 0.01, help = 'Target normalized rank error of the sketches.')
+@click.option('--chunksize', type = int, default = 100_000, help = 'Rows per chunk.')
+@click.option('--n-jobs', type = int, default = 1, help = 'Worker processes used to sketch chunks.')
+@click.option('--iqr-mult', type = float, default = 3, help = 'IQR multiple of the outlier bounds.')
+def main(path_read, delim, eps, chunksize, n_jobs, iqr_mult):
+    # Report how far sketched quartiles and outlier flags are from the exact ones
+    report, sketches = sketch_report(path_read, delim, eps, chunksize, n_jobs, iqr_mult)
+    click.echo(report.round(4).to_string())
+    click.echo(f"\nrows: {next(iter(sketches.values())).n}, eps: {eps}, "
+               f"worst-case rank error bound: {max(s.rank_error_bound() for s in sketches.values()):.4f}")
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,74 @@
 import click
-import pandas as pd
+from src.fetch import CACHE_DIR, fetch_all
+from src.frame_io import write_frame, write_frame_chunks
+
+# Compact dtypes for the raw wine data: float32 for the 11 physicochemical
+# measurements and int8 for the 0-10 quality score
+FEATURE_DTYPES = {col: 'float32' for col in ['fixed acidity', 'volatile acidity', 'citric acid',
+                                             'residual sugar', 'chlorides', 'free sulfur dioxide',
+                                             'total sulfur dioxide', 'density', 'pH', 'sulphates',
+                                             'alcohol']}
+WINE_DTYPES = {**FEATURE_DTYPES, 'quality': 'int8'}
+
+def read_csv_chunks(path_read, delim = ",", chunksize = 100_000, add_target = False):
+    """
+    Stream a wine CSV file in typed chunks.
+
+    Only one chunk is held in memory at a time, so the file can be far larger
+    than the available RAM.
+
+    Parameters
+    ----------
+    path_read : str
+        URL or path of the CSV file.
+    delim : str, optional
+        Field delimiter (default is ','). None lets pandas sniff it.
+    chunksize : int, optional
+        Number of rows per chunk (default is 100_000).
+    add_target : bool, optional
+        Derive the boolean 'quality_binary' target (quality >= 7) on each chunk
+        (default is False).
+
+    Yields
+    ------
+    pandas.DataFrame
+        The next chunk, with the dtypes in `WINE_DTYPES`.
+    """
+    import pandas as pd
+    reader = pd.read_csv(path_read, sep = delim, dtype = WINE_DTYPES, chunksize = chunksize)
+    with reader:
+        for chunk in reader:
+            if add_target:
+                chunk['quality_binary'] = chunk['quality'] >= 7
+            yield chunk
 
 @click.command()
-@click.argument('path_read', type = str)
+@click.argument('paths_read', nargs = -1, required = True, type = str)
 @click.argument('path_save', type = str)
 @click.option('--delim', type = str)
-def main(path_read, path_save, delim=","):
-    # Read the csv file from path_read, which can be a URL or filepath
-    pd.read_csv(path_read, sep=delim).to_csv(path_save, index = False)
-        
+@click.option('--chunksize', type = int, default = None,
+              help = 'Copy the file this many rows at a time instead of loading it whole.')
+@click.option('--cache-dir', type = str, default = CACHE_DIR,
+              help = 'Directory where URLs are downloaded and revalidated (see src/fetch.py).')
+@click.option('--no-cache', is_flag = True, help = 'Read URLs directly, without the download cache.')
+@click.option('--max-concurrency', type = int, default = 4, help = 'Most URLs downloaded at a time.')
+def main(paths_read, path_save, delim=",", chunksize = None, cache_dir = CACHE_DIR, no_cache = False,
+         max_concurrency = 4):
+    # Read the csv files from paths_read, which can be URLs or filepaths; several files are concatenated.
+    # URLs are fetched concurrently into a local cache first, which is only revalidated on later runs.
+    # The output format (CSV, Feather or Parquet) follows the extension of path_save
+    if not no_cache:
+        paths_read = fetch_all(paths_read, cache_dir, max_concurrency)
+
+    if chunksize is None:
+        import pandas as pd
+        frames = [pd.read_csv(path_read, sep=delim) for path_read in paths_read]
+        write_frame(frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index = True), path_save)
+        return
+
+    # Streaming mode: copy one chunk at a time
+    chunks = (chunk for path_read in paths_read for chunk in read_csv_chunks(path_read, delim, chunksize))
+    write_frame_chunks(chunks, path_save)
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,264 @@
+import math
+import os
+from src.parallel import bounded_map
+
+def nice_bins(lo, hi, maxbins = 25):
+    """
+    Bin edges chosen the way Vega-Lite's `bin(maxbins = ...)` chooses them.
+
+    The step is a power of ten divided by 5 or 2, the largest that gives at
+    most `maxbins` bins, and the edges start and stop on multiples of it, so a
+    histogram binned here looks like the one Altair would bin from raw rows.
+
+    Parameters
+    ----------
+    lo, hi : float
+        Extent of the data.
+    maxbins : int, optional
+        Maximum number of bins (default is 25).
+
+    Returns
+    -------
+    start, step : float
+        First edge and bin width.
+    n_bins : int
+        Number of bins.
+    """
+    span = (hi - lo) or abs(lo) or 1
+    level = math.ceil(math.log10(maxbins))
+    step = 10 ** (math.floor(math.log10(span) + 0.5) - level)
+    while math.ceil(span / step) > maxbins:
+        step *= 10
+    for divisor in (5, 2):
+        if span / (step / divisor) <= maxbins:
+            step /= divisor
+
+    # Snap the extent to multiples of the step
+    v = math.log10(step)
+    precision = 0 if v >= 0 else int(-v) + 1
+    start = math.floor(lo / step + 10 ** (-precision - 1)) * step
+    if lo < start:
+        start -= step
+    stop = math.ceil(hi / step) * step
+    return start, step, max(int(round((stop - start) / step)), 1)
+
+def histogram_table(df, columns, group, maxbins = 25):
+    """
+    Pre-aggregate per-group histograms of several columns into a small long-format table.
+
+    Every column is binned with `nice_bins` and counted with one `bincount`
+    over (group, bin) codes, so a chart only receives a few rows per bin
+    instead of every data row.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Data with `columns` and `group`.
+    columns : list[str]
+        Numeric columns to bin.
+    group : str
+        Column whose values split the histograms, e.g. the target.
+    maxbins : int, optional
+        Maximum number of bins per column (default is 25).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Columns 'feature', `group`, 'bin_start', 'bin_end' and 'count', one row per
+        feature, group and bin.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, groups = pd.factorize(df[group], sort = True)
+    tables = []
+    for column in columns:
+        edges, counts = bin_counts(df[column].to_numpy(), codes, len(groups), maxbins)
+        tables.append(histogram_frame(column, group, groups, edges, counts))
+    return pd.concat(tables, ignore_index = True)
+
+def bin_counts(values, codes, n_groups, maxbins = 25):
+    """
+    Count one column's values per group and `nice_bins` bin.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        The column.
+    codes : numpy.ndarray
+        Group code of every value, from 0 to `n_groups` - 1.
+    n_groups : int
+        Number of groups.
+    maxbins : int, optional
+        Maximum number of bins (default is 25).
+
+    Returns
+    -------
+    edges : numpy.ndarray
+        The n_bins + 1 bin edges.
+    counts : numpy.ndarray
+        Counts of shape (n_groups, n_bins).
+    """
+    import numpy as np
+
+    if values.dtype == np.float32:
+        # Decimal data held in float32 (e.g. a WineDataset) is off by up to one float32 ulp:
+        # snap the extent back to its shortest decimals and widen the edge tolerance to a few ulps
+        lo, hi = (float(np.format_float_positional(v)) for v in (values.min(), values.max()))
+        start, step, n_bins = nice_bins(lo, hi, maxbins)
+        eps = 4 * float(np.finfo(np.float32).eps) * max(abs(lo), abs(hi)) / step
+    else:
+        start, step, n_bins = nice_bins(values.min(), values.max(), maxbins)
+        eps = 1e-14
+    # Same assignment as Vega's bin transform, the maximum falls in the last bin
+    clipped = np.clip(values.astype(float), start, start + (n_bins - 1) * step)
+    bins = np.floor(eps + (clipped - start) / step).astype(np.int64)
+    counts = np.bincount(codes * n_bins + bins, minlength = n_groups * n_bins).reshape(n_groups, n_bins)
+    return start + step * np.arange(n_bins + 1), counts
+
+def histogram_frame(column, group, groups, edges, counts):
+    """
+    Long-format table of one column's `bin_counts`, in the layout of `histogram_table`.
+    """
+    import numpy as np
+    import pandas as pd
+
+    n_bins = len(edges) - 1
+    return pd.DataFrame({
+        'feature': column,
+        group: np.repeat(groups, n_bins),
+        'bin_start': np.tile(edges[:-1], len(groups)),
+        'bin_end': np.tile(edges[1:], len(groups)),
+        'count': counts.ravel()
+    })
+
+def average_ranks(values):
+    """
+    Rank every column of a 2-D array, ties getting their average rank (like `scipy.stats.rankdata`).
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Array of shape (n_samples, n_columns).
+
+    Returns
+    -------
+    numpy.ndarray
+        Float ranks from 1 to n_samples, same shape as `values`.
+    """
+    import numpy as np
+
+    # Each column sorted as a contiguous row; ties get one average rank, so the sort need not be stable
+    columns = np.ascontiguousarray(values.T)
+    m, n = columns.shape
+    order = np.argsort(columns, axis = 1)
+    sorted_values = np.take_along_axis(columns, order, axis = 1)
+
+    # Runs of equal values, numbered across all columns (column by column)
+    starts = np.ones((m, n), dtype = bool)
+    starts[:, 1:] = sorted_values[:, 1:] != sorted_values[:, :-1]
+    run = np.cumsum(starts.ravel()) - 1
+    first = np.tile(np.arange(n), m)[starts.ravel()]
+    mean_rank = first + (np.bincount(run) - 1) / 2 + 1
+
+    ranks = np.empty((m, n))
+    np.put_along_axis(ranks, order, mean_rank[run].reshape(m, n), axis = 1)
+    return ranks.T
+
+def corr_table(df, columns, method = 'spearman'):
+    """
+    Correlation matrix of `columns` in long format, computed on the NumPy array.
+
+    The diagonal (and any other perfect correlation) is set to 0, so the
+    colour scale of a heatmap shows the off-diagonal structure.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Data with `columns`; boolean columns are treated as 0/1.
+    columns : list[str]
+        Columns to correlate.
+    method : {'spearman', 'pearson'}, optional
+        Rank or linear correlation (default is 'spearman').
+
+    Returns
+    -------
+    pandas.DataFrame
+        Columns 'feature_1', 'feature_2' and 'correlation', in the row order of
+        `DataFrame.corr().stack()`.
+    """
+    import numpy as np
+
+    values = df[columns].to_numpy(dtype = float)
+    if method == 'spearman':
+        values = average_ranks(values)
+    return corr_frame(np.corrcoef(values, rowvar = False), columns)
+
+def corr_frame(corr, columns):
+    """
+    A correlation matrix in the long format of `corr_table`, perfect correlations set to 0.
+    """
+    import numpy as np
+    import pandas as pd
+
+    corr = np.array(corr, dtype = float)
+    np.fill_diagonal(corr, 1)
+    corr[corr == 1] = 0 # Remove diagonal
+    n = len(columns)
+    return pd.DataFrame({
+        'feature_1': np.repeat(columns, n),
+        'feature_2': np.tile(columns, n),
+        'correlation': corr.ravel()
+    })
+
+def _render(item):
+    """
+    Render one Vega-Lite spec to a PNG or SVG file; runs in a worker process.
+    """
+    import vl_convert as vlc
+    spec, path, vl_version, scale_factor = item
+    if path.endswith('.svg'):
+        with open(path, 'w') as f:
+            f.write(vlc.vegalite_to_svg(spec, vl_version = vl_version))
+    else:
+        with open(path, 'wb') as f:
+            f.write(vlc.vegalite_to_png(spec, vl_version = vl_version, scale = scale_factor, ppi = 72))
+    return path
+
+def render_charts(charts, path_save, draft = False, scale_factor = 1, n_jobs = None):
+    """
+    Render Altair charts to files, each in its own worker process.
+
+    The charts are converted to Vega-Lite specs here and rendered with
+    vl-convert in a pool of spawned processes (vl-convert runs its own
+    threads, which a forked worker could deadlock on), so their rendering
+    overlaps. Draft mode writes SVG files instead, which skip rasterization.
+
+    Parameters
+    ----------
+    charts : dict[str, altair.TopLevelMixin]
+        Charts keyed by file name without extension.
+    path_save : str
+        Output directory.
+    draft : bool, optional
+        Write vector SVG files instead of PNG (default is False).
+    scale_factor : float, optional
+        Resolution multiplier of the PNG files (default is 1).
+    n_jobs : int, optional
+        Number of worker processes (default is one per chart, at most the number of CPUs;
+        1 renders in this process).
+
+    Returns
+    -------
+    list[str]
+        The paths written, in the order of `charts`.
+    """
+    import altair as alt
+
+    vl_version = '_'.join(alt.SCHEMA_VERSION.split('.')[:2])
+    extension = '.svg' if draft else '.png'
+    items = [(chart.to_dict(), os.path.join(path_save, name + extension), vl_version, scale_factor)
+             for name, chart in charts.items()]
+    if n_jobs is None:
+        n_jobs = min(len(items), os.cpu_count() or 1)
+    return list(bounded_map(_render, items, n_jobs, mp_context = 'spawn'))
@@ -0,0 +1,124 @@
+import os
+import click
+from src.frame_io import FORMATS, write_frame
+from src.instrument import stage, traced_command
+from src.read_csv import FEATURE_DTYPES
+
+def run_all(path_read, path_save, delim = ",", chunksize = None, outlier_mode = 'exact', sketch_eps = 0.01,
+            params = None, executor = 'serial', max_workers = None, cache = None, model_dir = None,
+            data_dir = None, data_format = 'csv', draft = False, dtype = 'float64'):
+    """
+    Run data processing, EDA and the analysis in one process, passing the data frames in memory.
+
+    The results are the same as those of `make all`, but the raw, train and
+    test data are not written and re-read between the stages, and the
+    libraries are imported once. The EDA reuses the Pearson matrix cached by
+    the correlation check of the train data, and the analysis gets the train
+    and test data as compact `WineDataset`s.
+
+    Parameters
+    ----------
+    path_read : str
+        URL or path of the raw data (CSV, Feather or Parquet).
+    path_save : str
+        Results directory; the EDA goes to `<path_save>/eda` and the model
+        metrics and ROC curves to `<path_save>/models`.
+    delim, chunksize, outlier_mode, sketch_eps
+        Options of `data_processing.py`.
+    params, executor, max_workers, cache, model_dir
+        Options of `analysis.py`, see `analysis.analyze`.
+    data_dir : str, optional
+        Also write the train and test data to this directory (default is None, keep them in memory).
+    data_format : str, optional
+        One of `frame_io.FORMATS` for the data written to `data_dir` (default is 'csv', like
+        `data_processing.py`).
+    draft : bool, optional
+        Write the charts as quick vector SVG files instead of PNG (default is False).
+    dtype : str, optional
+        Dtype of the compact feature matrices (default is 'float64', like `analysis.py`).
+
+    Returns
+    -------
+    results : list[dict]
+        The metrics of every model.
+    train_df, test_df : pandas.DataFrame
+        The validated train and test data.
+    train, test : WineDataset
+        The compact train and test data.
+    """
+    from src.analysis import analyze
+    from src.data_processing import load_data, process_data
+    from src.eda import eda_report
+    from src.quantile_sketch import QuantileSketch, sketch_bounds
+    from src.wine_dataset import WineDataset
+
+    feature_columns = list(FEATURE_DTYPES)
+    sketches = None
+    if outlier_mode == 'sketch':
+        sketches = {col: QuantileSketch(sketch_eps, seed = 2025) for col in feature_columns}
+
+    df = load_data(path_read, delim, chunksize, sketches)
+    bounds = None if sketches is None else sketch_bounds(sketches, feature_columns)
+    train_df, test_df = process_data(df, feature_columns, bounds)
+    del df
+
+    if data_dir is not None:
+        os.makedirs(data_dir, exist_ok = True)
+        with stage('write_data'):
+            write_frame(train_df, os.path.join(data_dir, "train_data." + data_format))
+            write_frame(test_df, os.path.join(data_dir, "test_data." + data_format))
+
+    eda_dir = os.path.join(path_save, 'eda')
+    models_dir = os.path.join(path_save, 'models')
+    os.makedirs(eda_dir, exist_ok = True)
+    os.makedirs(models_dir, exist_ok = True)
+    train = WineDataset.from_frame(train_df, feature_columns, dtype = dtype)
+    test = WineDataset.from_frame(test_df, feature_columns, dtype = dtype)
+    # The validated frame, whose Pearson matrix the correlation check has cached
+    eda_report(train_df, feature_columns, eda_dir, draft)
+    results, _, _ = analyze(train, test, feature_columns, models_dir, params, executor, max_workers,
+                            cache, model_dir, draft)
+    return results, train_df, test_df, train, test
+
+@click.command()
+@click.argument('path_read', type = str)
+@click.argument('path_save', type = str)
+@click.option('--delim', type = str, default = ",")
+@click.option('--chunksize', type = int, default = None,
+              help = 'Read a CSV file this many rows at a time, with compact float32/int8 dtypes.')
+@click.option('--outlier-mode', type = click.Choice(['exact', 'sketch']), default = 'exact',
+              help = 'Exact IQR bounds, or approximate bounds from streaming quantile sketches.')
+@click.option('--sketch-eps', type = float, default = 0.01, help = 'Target rank error of the quantile sketches.')
+@click.option('--executor', type = click.Choice(['serial', 'thread', 'process', 'joblib']), default = 'serial',
+              help = 'How the models are fitted and scored.')
+@click.option('--max-workers', type = int, default = None, help = 'Maximum number of concurrent model fits.')
+@click.option('--cache-dir', type = str, default = None,
+              help = 'Directory of the fitted scaler and model cache (disabled by default).')
+@click.option('--cache-max-mb', type = float, default = 1024, help = 'Size limit of the cache in MB.')
+@click.option('--model-dir', type = str, default = None,
+              help = 'Directory where the fitted scaler and models are saved for inference.')
+@click.option('--params', 'path_params', type = str, default = None,
+              help = 'JSON file of tuned hyperparameters per model, as written by tune.py.')
+@click.option('--data-dir', type = str, default = None,
+              help = 'Also write the train and test data to this directory.')
+@click.option('--format', 'data_format', type = click.Choice(FORMATS), default = 'csv',
+              help = 'File format of the train and test data written to --data-dir.')
+@click.option('--draft', is_flag = True, help = 'Write quick vector SVG charts instead of PNG files.')
+@click.option('--dtype', type = click.Choice(['float32', 'float64']), default = 'float64',
+              help = 'Dtype of the compact feature matrices.')
+@traced_command('run_all')
+def main(path_read, path_save, delim, chunksize, outlier_mode, sketch_eps, executor, max_workers, cache_dir,
+         cache_max_mb, model_dir, path_params, data_dir, data_format, draft, dtype):
+    import json
+    from src.artifact_cache import ArtifactCache
+
+    params = None
+    if path_params is not None:
+        with open(path_params) as f:
+            params = json.load(f)
+    cache = None if cache_dir is None else ArtifactCache(cache_dir, int(cache_max_mb * 2 ** 20))
+    run_all(path_read, path_save, delim, chunksize, outlier_mode, sketch_eps, params, executor, max_workers,
+            cache, model_dir, data_dir, data_format, draft, dtype)
+
+if __name__ == '__main__':
+    main()
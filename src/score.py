@@ -0,0 +1,89 @@
+import time
+import click
+from src.frame_io import iter_frame_chunks, write_frame_chunks
+from src.parallel import bounded_map
+
+# Scaler and model of the current process, loaded once by `_load`
+_STATE = {}
+
+def _load(model_dir, model):
+    from src.model_store import load_models
+    scaler, models, feature_columns = load_models(model_dir, [model] if model else None)
+    name = model or next(iter(models))
+    _STATE.update(scaler = scaler, model = models[name], name = name, feature_columns = feature_columns)
+
+def _score_chunk(item):
+    import pandas as pd
+    from src.binary_metrics import positive_proba
+    chunk, include_input = item
+    X_scaled = _STATE['scaler'].transform(chunk[_STATE['feature_columns']])
+    proba, label = positive_proba(_STATE['model'], X_scaled)
+    scored = pd.DataFrame({'probability': proba, 'label': label}, index = chunk.index)
+    if include_input:
+        scored = pd.concat([chunk, scored], axis = 1)
+    return scored.reset_index(drop = True)
+
+def score_file(path_read, path_save, model_dir, model = None, chunksize = 100_000, n_jobs = 1,
+               include_input = False, delim = ","):
+    """
+    Score a data file with a persisted scaler and model, one chunk at a time.
+
+    Chunks are read, scaled, scored and appended to the output in file order,
+    so memory is bounded by a few chunks regardless of the file size. With
+    `n_jobs` > 1 chunks are scored in a process pool; every worker loads the
+    scaler and model once.
+
+    Parameters
+    ----------
+    path_read : str
+        CSV, Feather or Parquet file with (at least) the model's feature columns.
+    path_save : str
+        Output file; the format is taken from its extension.
+    model_dir : str
+        Directory written by `model_store.save_models`.
+    model : str, optional
+        Name of the model to use (default is the first saved model).
+    chunksize : int, optional
+        Number of rows per chunk (default is 100_000).
+    n_jobs : int, optional
+        Number of worker processes (default is 1).
+    include_input : bool, optional
+        Write the input columns before the scores (default is False).
+    delim : str, optional
+        Field delimiter of CSV input (default is ',').
+
+    Returns
+    -------
+    name : str
+        The model used.
+    n_rows : int
+        Number of rows scored.
+    """
+    # Load in this process as well, to fail early on a bad model and to know the columns
+    _load(model_dir, model)
+    columns = None if include_input else _STATE['feature_columns']
+    chunks = iter_frame_chunks(path_read, chunksize, columns, delim)
+    items = ((chunk, include_input) for chunk in chunks)
+    if n_jobs > 1:
+        scored = bounded_map(_score_chunk, items, n_jobs, initializer = _load, initargs = (model_dir, model))
+    else:
+        scored = map(_score_chunk, items)
+    return _STATE['name'], write_frame_chunks(scored, path_save)
+
+@click.command()
+@click.argument('path_read', type = str)
+@click.argument('path_save', type = str)
+@click.option('--model-dir', type = str, default = 'models/', help = 'Directory of the persisted models.')
+@click.option('--model', type = str, default = None, help = 'Model to score with (default is the first saved model).')
+@click.option('--chunksize', type = int, default = 100_000, help = 'Rows per chunk.')
+@click.option('--n-jobs', type = int, default = 1, help = 'Number of worker processes.')
+@click.option('--include-input', is_flag = True, help = 'Copy the input columns to the output.')
+@click.option('--delim', type = str, default = ",", help = 'Field delimiter of CSV input.')
+def main(path_read, path_save, model_dir, model, chunksize, n_jobs, include_input, delim):
+    start = time.perf_counter()
+    name, n_rows = score_file(path_read, path_save, model_dir, model, chunksize, n_jobs, include_input, delim)
+    elapsed = time.perf_counter() - start
+    click.echo(f"Scored {n_rows} rows with {name} in {elapsed:.2f} s ({n_rows / elapsed:,.0f} rows/s)")
+
+if __name__ == '__main__':
+    main()
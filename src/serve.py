@@ -0,0 +1,282 @@
+import json
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import click
+
+class _Request:
+    __slots__ = ('model', 'X', 'start', 'done', 'proba', 'error')
+
+    def __init__(self, model, X):
+        self.model = model
+        self.X = X
+        self.start = time.perf_counter()
+        self.done = threading.Event()
+        self.proba = None
+        self.error = None
+
+class MicroBatcher:
+    """
+    Collect concurrent prediction requests into vectorized batches.
+
+    A single worker thread takes the first waiting request, then keeps
+    collecting requests until `max_batch` rows are gathered or `max_wait_ms`
+    has passed. The rows are scaled once and every model that was asked for
+    gets one `predict_proba` call for all of its rows.
+
+    Parameters
+    ----------
+    scaler : sklearn.preprocessing.StandardScaler
+        Fitted scaler applied before the models.
+    models : dict[str, sklearn.base.BaseEstimator]
+        Fitted binary classifiers keyed by name.
+    feature_columns : list[str]
+        Feature columns in the order the scaler expects.
+    max_batch : int, optional
+        Maximum number of rows per batch (default is 1024).
+    max_wait_ms : float, optional
+        Longest time the first request of a batch waits for others (default is 2).
+    latency_window : int, optional
+        Number of recent request latencies kept for the percentiles (default is 10_000).
+    """
+
+    def __init__(self, scaler, models, feature_columns, max_batch = 1024, max_wait_ms = 2.0,
+                 latency_window = 10_000):
+        self.scaler = scaler
+        self.models = models
+        self.feature_columns = list(feature_columns)
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen = latency_window)
+        self._started = time.perf_counter()
+        self._counts = {'requests': 0, 'rows': 0, 'batches': 0, 'errors': 0}
+        self._worker = threading.Thread(target = self._run, daemon = True)
+        self._worker.start()
+
+    def predict_proba(self, X, model = None):
+        """
+        Positive-class probabilities for the rows of `X`, batched with concurrent calls.
+
+        Parameters
+        ----------
+        X : array-like
+            Rows of features in `feature_columns` order.
+        model : str, optional
+            Name of the model to use (default is the first model).
+
+        Returns
+        -------
+        numpy.ndarray
+            One probability per row.
+        """
+        import numpy as np
+        model = model or next(iter(self.models))
+        if model not in self.models:
+            raise KeyError(f"Unknown model '{model}'; available models: {list(self.models)}.")
+        X = np.asarray(X, dtype = float)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_columns):
+            raise ValueError(f"Expected rows of {len(self.feature_columns)} features.")
+        # Reject bad rows here, so they never fail a batch shared with other requests
+        if not np.isfinite(X).all():
+            raise ValueError("Input contains NaN, null or infinite values.")
+
+        request = _Request(model, X)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.proba
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        n_rows = len(batch[0].X)
+        deadline = time.perf_counter() + self.max_wait
+        while n_rows < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout = remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            n_rows += len(request.X)
+        return batch, n_rows
+
+    def _predict(self, batch):
+        import numpy as np
+        import pandas as pd
+        # Scale all rows at once, then one predict_proba call per model
+        X = pd.DataFrame(np.vstack([request.X for request in batch]), columns = self.feature_columns)
+        X_scaled = self.scaler.transform(X)
+        bounds = np.cumsum([0] + [len(request.X) for request in batch])
+        for name in {request.model for request in batch}:
+            idx = [i for i, request in enumerate(batch) if request.model == name]
+            rows = np.concatenate([np.arange(bounds[i], bounds[i + 1]) for i in idx])
+            proba = self.models[name].predict_proba(X_scaled[rows])[:, 1]
+            offsets = np.cumsum([0] + [len(batch[i].X) for i in idx])
+            for j, i in enumerate(idx):
+                batch[i].proba = proba[offsets[j]:offsets[j + 1]]
+
+    def _run(self):
+        while True:
+            batch, n_rows = self._collect()
+            try:
+                self._predict(batch)
+            except Exception as error:
+                if len(batch) == 1:
+                    batch[0].error = error
+                else:
+                    # Retry the requests one by one, so only the failing ones get the error
+                    for request in batch:
+                        try:
+                            self._predict([request])
+                        except Exception as request_error:
+                            request.error = request_error
+
+            end = time.perf_counter()
+            with self._lock:
+                self._counts['batches'] += 1
+                self._counts['requests'] += len(batch)
+                self._counts['rows'] += n_rows
+                self._counts['errors'] += sum(request.error is not None for request in batch)
+                self._latencies.extend(end - request.start for request in batch)
+            for request in batch:
+                request.done.set()
+
+    def metrics(self):
+        """
+        Request, row and batch counters with latency percentiles and throughput.
+        """
+        import numpy as np
+        with self._lock:
+            counts = dict(self._counts)
+            latencies = np.array(self._latencies)
+        elapsed = time.perf_counter() - self._started
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000 if latencies.size else (0.0, 0.0)
+        return {
+            **counts,
+            'mean_batch_rows': counts['rows'] / counts['batches'] if counts['batches'] else 0.0,
+            'latency_p50_ms': float(p50),
+            'latency_p99_ms': float(p99),
+            'requests_per_s': counts['requests'] / elapsed,
+            'rows_per_s': counts['rows'] / elapsed,
+            'uptime_s': elapsed
+        }
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """
+    HTTP interface of a `MicroBatcher`.
+
+    POST /predict takes {"instances": [[...], ...] or [{column: value}, ...], "model": name}
+    and returns {"model", "probabilities", "labels"}. GET /metrics returns the
+    batcher's counters and GET /health the model names and feature columns.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        batcher = self.server.batcher
+        if self.path == '/metrics':
+            self._send(200, batcher.metrics())
+        elif self.path == '/health':
+            self._send(200, {'status': 'ok', 'models': list(batcher.models),
+                             'feature_columns': batcher.feature_columns})
+        else:
+            self._send(404, {'error': f'Unknown path {self.path}'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._send(404, {'error': f'Unknown path {self.path}'})
+            return
+        batcher = self.server.batcher
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            instances = payload['instances']
+            if instances and isinstance(instances[0], dict):
+                instances = [[row[col] for col in batcher.feature_columns] for row in instances]
+            model = payload.get('model') or next(iter(batcher.models))
+            proba = batcher.predict_proba(instances, model)
+        except (KeyError, ValueError, TypeError) as error:
+            self._send(400, {'error': str(error)})
+            return
+        except Exception as error:
+            # Any other failure still gets a reply instead of a dropped connection
+            self._send(500, {'error': f'{type(error).__name__}: {error}'})
+            return
+        self._send(200, {'model': model, 'probabilities': proba.tolist(), 'labels': (proba > 0.5).tolist()})
+
+class PredictionServer(ThreadingHTTPServer):
+    # The socketserver default backlog of 5 drops connections under concurrent load
+    request_queue_size = 128
+    daemon_threads = True
+
+def make_server(model_dir, host = '127.0.0.1', port = 8000, max_batch = 1024, max_wait_ms = 2.0, models = None,
+                compiled = False):
+    """
+    Load the persisted models once and build a threaded prediction server.
+
+    Parameters
+    ----------
+    model_dir : str
+        Directory written by `model_store.save_models`.
+    host : str, optional
+        Interface to bind (default is '127.0.0.1').
+    port : int, optional
+        Port to bind (default is 8000); 0 picks a free port.
+    max_batch : int, optional
+        Maximum rows per micro-batch (default is 1024).
+    max_wait_ms : float, optional
+        Longest wait for a micro-batch to fill (default is 2).
+    models : list[str], optional
+        Only serve these models (default is all of them).
+    compiled : bool, optional
+        Serve the tree models exported with `compiled_trees` through their
+        `CompiledForest` (default is False).
+
+    Returns
+    -------
+    PredictionServer
+        A `http.server.ThreadingHTTPServer`, not yet serving; its `batcher` attribute holds the `MicroBatcher`.
+    """
+    from src.model_store import load_models
+    scaler, loaded, feature_columns = load_models(model_dir, models, compiled)
+    server = PredictionServer((host, port), PredictionHandler)
+    server.batcher = MicroBatcher(scaler, loaded, feature_columns, max_batch, max_wait_ms)
+    return server
+
+@click.command()
+@click.argument('model_dir', type = str)
+@click.option('--host', type = str, default = '127.0.0.1')
+@click.option('--port', type = int, default = 8000)
+@click.option('--max-batch', type = int, default = 1024, help = 'Maximum rows per micro-batch.')
+@click.option('--max-wait-ms', type = float, default = 2.0, help = 'Longest wait for a micro-batch to fill.')
+@click.option('--model', 'models', type = str, multiple = True, help = 'Only serve these models.')
+@click.option('--compiled', is_flag = True, help = 'Use the compiled tree predictors exported by compiled_trees.')
+def main(model_dir, host, port, max_batch, max_wait_ms, models, compiled):
+    server = make_server(model_dir, host, port, max_batch, max_wait_ms, list(models) or None, compiled)
+    click.echo(f"Serving {list(server.batcher.models)} on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,103 @@
-import pandas as pd
-from sklearn.metrics import (
-    accuracy_score,
-    precision_score,
-    recall_score,
-    f1_score,
-    roc_auc_score,
-    roc_curve,
-    auc,
-)
-
-def train_evaluate_models(models, X_train_scaled, y_train, X_test_scaled, y_test):
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+from src.binary_metrics import positive_proba, binary_metrics
+from src.bootstrap import bootstrap_metrics
+from src.curves import model_curves
+from src.instrument import traced
+
+EXECUTORS = ('serial', 'thread', 'process', 'joblib')
+
+# Result column of every bootstrapped metric
+CI_COLUMNS = {'accuracy': "Test Accuracy", 'precision': "Precision", 'recall': "Recall", 'f1': "F1 Score",
+              'roc_auc': "ROC AUC"}
+
+def _fit_score_model(name, model, X_train_scaled, y_train, X_test_scaled, y_test, cache = None):
+    """
+    Fit a single model and compute its evaluation metrics.
+
+    Runs inside whichever worker the executor hands it to, so it only uses its
+    arguments and returns everything the caller needs. CPU time is measured
+    with the calling thread's clock so that concurrent fits do not count
+    each other's work.
+    """
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+
+    # Train the model, or load it from the cache when it was fitted on the same data before
+    hit = False
+    if cache is None:
+        model.fit(X_train_scaled, y_train)
+    else:
+        model, hit = cache.fit(model, X_train_scaled, y_train)
+    fit_wall = time.perf_counter() - wall_start
+    fit_cpu = time.thread_time() - cpu_start
+
+    # Run inference once per split; hard labels come from the cached probabilities
+    _, y_train_pred = positive_proba(model, X_train_scaled)
+    y_test_proba, y_test_pred = positive_proba(model, X_test_scaled)
+
+    # Label metrics here; the ROC AUC comes from the batched curves of all models
+    train_acc = float(np.mean(y_train_pred == np.asarray(y_train)))
+    metrics = binary_metrics(y_test, y_test_proba, y_test_pred, roc = False)
+
+    result = {
+        "Model": name,
+        "Train Accuracy": train_acc,
+        "Test Accuracy": metrics['accuracy'],
+        "Precision": metrics['precision'],
+        "Recall": metrics['recall'],
+        "F1 Score": metrics['f1'],
+        "ROC AUC": None,
+        "Fit Wall Time (s)": fit_wall,
+        "Fit CPU Time (s)": fit_cpu,
+        "Total Wall Time (s)": time.perf_counter() - wall_start,
+        "Total CPU Time (s)": time.thread_time() - cpu_start
+    }
+
+    return result, model, y_test_proba, y_test_pred, hit
+
+def _with_intervals(result, intervals):
+    # Insert the bounds of the bootstrapped metrics after the point estimates
+    columns = list(result)
+    after = columns.index("ROC AUC") + 1
+    bounds = {}
+    for metric, column in CI_COLUMNS.items():
+        bounds[column + " CI Low"], bounds[column + " CI High"] = intervals[metric]
+    return {**{key: result[key] for key in columns[:after]}, **bounds,
+            **{key: result[key] for key in columns[after:]}}
+
+def _map_models(executor, max_workers, func, names, models, *args):
+    """
+    Apply `func` to every (name, model) pair with the requested executor.
+
+    Results are returned in the same order as `names`, whatever order the
+    workers finish in.
+    """
+    n_tasks = len(names)
+    repeated = [[arg] * n_tasks for arg in args]
+
+    if executor == 'serial' or n_tasks <= 1:
+        return list(map(func, names, models, *repeated))
+
+    if executor == 'thread':
+        with ThreadPoolExecutor(max_workers = max_workers) as pool:
+            return list(pool.map(func, names, models, *repeated))
+
+    if executor == 'process':
+        with ProcessPoolExecutor(max_workers = max_workers) as pool:
+            return list(pool.map(func, names, models, *repeated))
+
+    # joblib backend; -1 uses every available core
+    from joblib import Parallel, delayed
+    n_jobs = max_workers if max_workers is not None else -1
+    return Parallel(n_jobs = n_jobs)(
+        delayed(func)(name, model, *args) for name, model in zip(names, models))
+
+@traced()
+def train_evaluate_models(models, X_train_scaled, y_train, X_test_scaled, y_test,
+                          executor = 'serial', max_workers = None, return_curves = False, cache = None,
+                          bootstrap = 0, bootstrap_jobs = 1):
     """
     The function aim to train classification models and compute evaluation metrics.
 
@@ -30,45 +118,75 @@ def train_evaluate_models(models, X_train_scaled, y_train, X_test_scaled, y_test
     y_test : pandas.Series
         Test labels as a one-dimensional vector of binary values.
 
+    executor : {'serial', 'thread', 'process', 'joblib'}, optional
+        How the models are fitted and scored (default is 'serial'). 'thread' and
+        'process' use a concurrent.futures pool, 'joblib' uses joblib's default backend.
+
+    max_workers : int, optional
+        Maximum number of concurrent workers. None lets the executor decide
+        (joblib then uses all cores).
+
+    return_curves : bool, optional
+        Also return the curves of every model (default is False), so that
+        `plot_roc_curves` can reuse them instead of predicting the test set again.
+
+    cache : src.artifact_cache.ArtifactCache, optional
+        Cache of fitted models. A model already fitted with the same parameters on
+        the same training data is loaded instead of refitted; hits and misses are
+        recorded on the cache.
+
+    bootstrap : int, optional
+        Number of bootstrap resamples of the test set used for 95% confidence
+        intervals of the test accuracy, precision, recall, F1 score and ROC AUC
+        (default is 0, no intervals). The bounds are added to every result as
+        '<metric> CI Low' and '<metric> CI High', see `bootstrap.bootstrap_metrics`.
+
+    bootstrap_jobs : int, optional
+        Number of processes sharing the bootstrap resamples (default is 1).
+
     Returns
     -------
     results : list[dict]
-        A list of dictionaries containing the evaluation metrics for each model (accuracy, precision, recall, F1 score, ROC AUC, etc.).
+        A list of dictionaries containing the evaluation metrics for each model (accuracy, precision, recall, F1 score, ROC AUC, etc.),
+        plus wall-clock and CPU time spent fitting and in total. The list follows the order of `models`.
 
     trained_models : dict[str, sklearn.base.BaseEstimator]
     A dictionary of fitted models with the same keys as `models`, where each value is the corresponding trained classifier.
+    With the 'process' and 'joblib' executors these are fitted copies; the objects in `models` are left untouched.
+
+    curves : dict[str, dict], optional
+        Only returned when `return_curves` is True. Maps each model name to its ROC,
+        precision-recall and calibration curves on the test set, see `curves.model_curves`.
     """
+    if executor not in EXECUTORS:
+        raise ValueError(f"executor must be one of {EXECUTORS}, got '{executor}'.")
 
-    trained_models = {}
-    results = []
+    names = list(models.keys())
+    outputs = _map_models(executor, max_workers, _fit_score_model, names, list(models.values()),
+                          X_train_scaled, y_train, X_test_scaled, y_test, cache)
 
-    for name, model in models.items():
-        # Train the model
-        model.fit(X_train_scaled, y_train)
-        trained_models[name] = model
-
-        # Make predictions
-        y_train_pred = model.predict(X_train_scaled)
-        y_test_pred = model.predict(X_test_scaled)
-        y_test_proba = model.predict_proba(X_test_scaled)[:, 1]
-
-        # Calculate metrics
-        train_acc = accuracy_score(y_train, y_train_pred)
-        test_acc = accuracy_score(y_test, y_test_pred)
-        precision = precision_score(y_test, y_test_pred)
-        recall = recall_score(y_test, y_test_pred)
-        f1 = f1_score(y_test, y_test_pred)
-        roc_auc = roc_auc_score(y_test, y_test_proba)
-
-        # Store results
-        results.append({
-            "Model": name,
-            "Train Accuracy": train_acc,
-            "Test Accuracy": test_acc,
-            "Precision": precision,
-            "Recall": recall,
-            "F1 Score": f1,
-            "ROC AUC": roc_auc
-        })
+    # Store results
+    results = [result for result, _, _, _, _ in outputs]
+    trained_models = {name: model for name, (_, model, _, _, _) in zip(names, outputs)}
+
+    # Curves of all models from one sort of the stacked test probabilities
+    scores = np.column_stack([y_test_proba for _, _, y_test_proba, _, _ in outputs])
+    curves = model_curves(y_test, scores, names)
+    for result, name in zip(results, names):
+        result["ROC AUC"] = curves[name]['roc_auc']
+
+    # Confidence intervals of all models from the same resamples, next to their point estimates
+    if bootstrap:
+        preds = np.column_stack([y_test_pred for _, _, _, y_test_pred, _ in outputs])
+        intervals = bootstrap_metrics(y_test, scores, preds, names, n_boot = bootstrap, n_jobs = bootstrap_jobs)
+        results = [_with_intervals(result, intervals[name]) for result, name in zip(results, names)]
+
+    # Workers may run in other processes, so cache hits are counted here
+    if cache is not None:
+        for _, _, _, _, hit in outputs:
+            cache.record(hit)
+
+    if return_curves:
+        return results, trained_models, curves
 
     return results, trained_models
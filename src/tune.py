@@ -0,0 +1,240 @@
+import json
+import math
+import time
+import click
+from src.analysis import build_models
+from src.frame_io import read_frame
+from src.read_csv import FEATURE_DTYPES
+
+SCORINGS = ('roc_auc', 'f1', 'accuracy', 'precision', 'recall')
+
+# Search space around the hand-picked defaults of `analysis.build_models`
+DEFAULT_GRIDS = {
+    'Logistic Regression': {'C': [0.01, 0.1, 1.0, 10.0]},
+    'Decision Tree': {
+        'max_depth': [5, 10, 15, None],
+        'min_samples_split': [2, 20],
+        'min_samples_leaf': [1, 5, 10, 20]
+    },
+    'Random Forest': {
+        'max_depth': [10, 15, None],
+        'min_samples_split': [2, 10],
+        'min_samples_leaf': [1, 5, 10],
+        'max_features': ['sqrt', 0.5]
+    }
+}
+
+# Training data and fold indices of the current process, set by `_init_worker`
+_SHARED = {}
+
+def _init_worker(X, y, folds, scoring):
+    _SHARED.update(X = X, y = y, folds = folds, scoring = scoring, scaled = {})
+
+def _fold_data(fold):
+    # Scale every fold once per process, fitting the scaler on the training part only
+    if fold not in _SHARED['scaled']:
+        from sklearn.preprocessing import StandardScaler
+        train_idx, val_idx = _SHARED['folds'][fold]
+        scaler = StandardScaler().fit(_SHARED['X'][train_idx])
+        _SHARED['scaled'][fold] = (scaler.transform(_SHARED['X'][train_idx]), _SHARED['y'][train_idx],
+                                   scaler.transform(_SHARED['X'][val_idx]), _SHARED['y'][val_idx])
+    return _SHARED['scaled'][fold]
+
+def _score_fold(task):
+    from src.binary_metrics import binary_metrics, positive_proba
+    key, estimator, fold = task
+    X_train, y_train, X_val, y_val = _fold_data(fold)
+    estimator.fit(X_train, y_train)
+    y_score, y_pred = positive_proba(estimator, X_val)
+    return key, fold, binary_metrics(y_val, y_score, y_pred, pos_label = estimator.classes_[1])[_SHARED['scoring']]
+
+def _rung_folds(n_splits, min_folds, eta):
+    # Cumulative number of folds evaluated at every rung, ending with all of them
+    rungs = [min(min_folds, n_splits)]
+    while rungs[-1] < n_splits:
+        rungs.append(min(rungs[-1] * eta, n_splits))
+    return rungs
+
+def tune_models(models, grids, X, y, n_splits = 5, scoring = 'roc_auc', eta = 3, min_folds = 1,
+                n_jobs = 1, budget_seconds = None, random_state = 2025):
+    """
+    Cross-validated grid search with successive halving over the folds.
+
+    Every configuration is first scored on `min_folds` folds. After each rung
+    only the best 1/`eta` of the configurations of every model are scored on
+    `eta` times as many folds, reusing the earlier fold scores, until the
+    survivors are scored on all `n_splits` folds. The stratified fold indices
+    are computed once and sent to every worker process together with the
+    data; each worker scales each fold at most once.
+
+    Parameters
+    ----------
+    models : dict[str, sklearn.base.BaseEstimator]
+        Unfitted base models keyed by name, e.g. from `analysis.build_models`.
+    grids : dict[str, dict[str, list]]
+        Hyperparameter grid of every model to tune; models without a grid keep their parameters.
+    X : array-like
+        Unscaled training features.
+    y : array-like
+        Binary training labels.
+    n_splits : int, optional
+        Number of cross-validation folds (default is 5).
+    scoring : str, optional
+        One of `SCORINGS` (default is 'roc_auc').
+    eta : int, optional
+        Reduction factor between rungs, at least 2 (default is 3).
+    min_folds : int, optional
+        Number of folds of the first rung, at least 1 (default is 1).
+    n_jobs : int, optional
+        Number of worker processes (default is 1, which runs in this process).
+    budget_seconds : float, optional
+        Stop after this many seconds, keeping the configurations scored so far (default is no limit).
+    random_state : int, optional
+        Seed of the fold split (default is 2025).
+
+    Returns
+    -------
+    best_params : dict[str, dict]
+        Best configuration of every tuned model.
+    trials : pandas.DataFrame
+        One row per configuration with its mean and standard deviation over
+        the folds it was scored on, the number of those folds and the rung it reached.
+
+    Raises
+    ------
+    ValueError
+        If `scoring` is unknown, a grid names a model not in `models`, `eta` is
+        below 2 or `min_folds` below 1.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    import numpy as np
+    import pandas as pd
+    from sklearn.base import clone
+    from sklearn.model_selection import ParameterGrid, StratifiedKFold
+
+    if scoring not in SCORINGS:
+        raise ValueError(f"Unknown scoring '{scoring}'; expected one of {SCORINGS}.")
+    # Otherwise the rungs would never grow to all folds
+    if eta < 2:
+        raise ValueError(f"eta must be at least 2, got {eta}.")
+    if min_folds < 1:
+        raise ValueError(f"min_folds must be at least 1, got {min_folds}.")
+    for name in grids:
+        if name not in models:
+            raise ValueError(f"No model named '{name}' to tune; available models: {list(models)}.")
+
+    start = time.perf_counter()
+    deadline = None if budget_seconds is None else start + budget_seconds
+    X = np.ascontiguousarray(X, dtype = float)
+    y = np.asarray(y)
+    folds = list(StratifiedKFold(n_splits, shuffle = True, random_state = random_state).split(X, y))
+
+    configs = {(name, i): params for name, grid in grids.items()
+               for i, params in enumerate(ParameterGrid(grid))}
+    scores = {key: {} for key in configs}
+    reached = {key: 0 for key in configs}
+    alive = list(configs)
+    rungs = _rung_folds(n_splits, min_folds, eta)
+
+    pool = None
+    if n_jobs > 1:
+        pool = ProcessPoolExecutor(max_workers = n_jobs, initializer = _init_worker,
+                                   initargs = (X, y, folds, scoring))
+    else:
+        _init_worker(X, y, folds, scoring)
+
+    try:
+        for rung, n_folds in enumerate(rungs):
+            tasks = [(key, clone(models[key[0]]).set_params(**configs[key]), fold)
+                     for key in alive for fold in range(n_folds) if fold not in scores[key]]
+            timed_out = False
+            if pool is None:
+                for task in tasks:
+                    if deadline is not None and time.perf_counter() > deadline:
+                        timed_out = True
+                        break
+                    key, fold, score = _score_fold(task)
+                    scores[key][fold] = score
+            else:
+                pending = {pool.submit(_score_fold, task) for task in tasks}
+                while pending:
+                    timeout = None if deadline is None else max(deadline - time.perf_counter(), 0)
+                    done, pending = wait(pending, timeout = timeout, return_when = FIRST_COMPLETED)
+                    for future in done:
+                        key, fold, score = future.result()
+                        scores[key][fold] = score
+                    if not done:
+                        timed_out = True
+                        for future in pending:
+                            future.cancel()
+                        break
+            for key in alive:
+                if len(scores[key]) >= n_folds:
+                    reached[key] = rung
+            if timed_out or rung == len(rungs) - 1:
+                break
+
+            # Keep the best 1/eta of every model's configurations for the next rung
+            survivors = []
+            for name in grids:
+                ranked = sorted((key for key in alive if key[0] == name),
+                                key = lambda key: np.mean(list(scores[key].values())), reverse = True)
+                survivors += ranked[:max(1, math.ceil(len(ranked) / eta))]
+            alive = survivors
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures = True)
+
+    trials = pd.DataFrame([{
+        'Model': key[0],
+        'Params': json.dumps(params),
+        'Folds': len(scores[key]),
+        'Rung': reached[key],
+        'Mean Score': np.mean(list(scores[key].values())) if scores[key] else np.nan,
+        'Std Score': np.std(list(scores[key].values())) if scores[key] else np.nan
+    } for key, params in configs.items()])
+
+    # Prefer the configurations scored on the most folds, then the best mean score
+    keys = list(configs)
+    best_params = {}
+    for name in grids:
+        ranked = trials[(trials['Model'] == name) & (trials['Folds'] > 0)]
+        if len(ranked):
+            best = ranked.sort_values(['Folds', 'Mean Score'], ascending = False, kind = 'mergesort').index[0]
+            best_params[name] = configs[keys[best]]
+    return best_params, trials
+
+@click.command()
+@click.argument('path_train', type = str)
+@click.argument('path_save', type = str)
+@click.option('--grid', 'path_grid', type = str, default = None,
+              help = 'JSON file of hyperparameter grids per model (default is the built-in grids).')
+@click.option('--n-splits', type = int, default = 5, help = 'Number of cross-validation folds.')
+@click.option('--scoring', type = click.Choice(SCORINGS), default = 'roc_auc', help = 'Metric to maximize.')
+@click.option('--eta', type = click.IntRange(min = 2), default = 3, help = 'Fraction 1/eta of configurations kept after each rung.')
+@click.option('--n-jobs', type = int, default = 1, help = 'Number of worker processes.')
+@click.option('--budget-seconds', type = float, default = None, help = 'Time budget of the search.')
+def main(path_train, path_save, path_grid, n_splits, scoring, eta, n_jobs, budget_seconds):
+    feature_columns = list(FEATURE_DTYPES)
+    train_df = read_frame(path_train, columns = feature_columns + ['quality_binary'])
+
+    grids = DEFAULT_GRIDS
+    if path_grid is not None:
+        with open(path_grid) as f:
+            grids = json.load(f)
+
+    start = time.perf_counter()
+    best_params, trials = tune_models(build_models(), grids, train_df[feature_columns], train_df['quality_binary'],
+                                      n_splits = n_splits, scoring = scoring, eta = eta, n_jobs = n_jobs,
+                                      budget_seconds = budget_seconds)
+    elapsed = time.perf_counter() - start
+
+    # Save every trial and the best configurations, which analysis.py reads with --params
+    trials.to_csv(path_save+"/tuning_results.csv", index = False)
+    with open(path_save+"/best_params.json", 'w') as f:
+        json.dump(best_params, f, indent = 2)
+    n_fits = int(trials['Folds'].sum())
+    click.echo(f"Scored {len(trials)} configurations with {n_fits} fold fits in {elapsed:.1f} s")
+
+if __name__ == '__main__':
+    main()
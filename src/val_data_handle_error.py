@@ -1,9 +1,74 @@
+import numpy as np
 import pandas as pd
 import pandera.pandas as pa
 import logging
 import json
+from src.validation_engine import FailureMask
+from src.instrument import traced
 
-def val_data_handle_error(df, schema):
+def _row_hashes(df):
+    """
+    One uint64 hash per row, equal for rows that `DataFrame.duplicated` considers equal.
+    """
+    hashes = np.zeros(len(df), dtype = np.uint64)
+    for j in range(df.shape[1]):
+        column = df.iloc[:, j]
+        if column.dtype.kind == 'f':
+            # duplicated() treats -0.0 as 0.0 and all NaNs as equal; hash them alike
+            values = column.to_numpy()
+            column_hashes = pd.util.hash_array(np.where(np.isnan(values), np.nan, values + 0.0))
+        else:
+            column_hashes = pd.util.hash_pandas_object(column, index = False).to_numpy()
+        hashes = hashes * np.uint64(1_000_003) ^ column_hashes
+    return hashes
+
+def drop_invalid_rows(df, invalid):
+    """
+    Remove the invalid rows, then duplicates and all-missing rows, with a single filtering copy.
+
+    Gives the same frame as
+    `df[~invalid].reset_index(drop=True).drop_duplicates().dropna(how='all')`
+    without the four intermediate copies: the rows to keep are found on
+    masks (duplicates by comparing row hashes, and exactly only among the
+    rows whose hashes repeat) and the frame is filtered once.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The data.
+    invalid : numpy.ndarray
+        Boolean mask of the rows to remove.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The kept rows, indexed by their position among the valid rows.
+    """
+    valid = ~invalid
+    keep = valid.copy()
+
+    # Duplicates of an earlier valid row; only rows with a repeated hash can be one
+    positions = np.flatnonzero(valid)
+    repeated = pd.Series(_row_hashes(df)[positions]).duplicated(keep = False).to_numpy()
+    candidates = positions[repeated]
+    if candidates.size:
+        keep[candidates[df.iloc[candidates].duplicated().to_numpy()]] = False
+
+    # Rows with every value missing
+    all_missing = np.ones(len(df), dtype = bool)
+    for j in range(df.shape[1]):
+        all_missing &= df.iloc[:, j].isna().to_numpy()
+    keep &= ~all_missing
+
+    result = df[keep]
+    if np.array_equal(keep, valid):
+        result.index = pd.RangeIndex(len(positions))
+    else:
+        result.index = pd.Index((np.cumsum(valid) - 1)[keep])
+    return result
+
+@traced()
+def val_data_handle_error(df, schema, engine = None, max_cases = 10):
     """
     Validate a DataFrame against a Pandera schema and remove invalid rows.
 
@@ -17,6 +82,15 @@ def val_data_handle_error(df, schema):
         The DataFrame to validate.
     schema : pandera.DataFrameSchema
         The Pandera schema defining validation rules for the DataFrame.
+    engine : callable, optional
+        Extra checks run outside pandera, e.g. from `src.validation_engine`.
+        Called as `engine(df)`, it returns either a `FailureMask` (like
+        `wine_failures`) or failure cases in the same layout as pandera's
+        `SchemaErrors.failure_cases`; they are handled exactly like the
+        schema's own failures.
+    max_cases : int, optional
+        Failure cases logged per failed check (default is 10). Every check
+        is logged with its total failure count.
 
     Returns
     -------
@@ -33,10 +107,11 @@ def val_data_handle_error(df, schema):
     Notes
     -----
     - Validation is performed lazily to collect all errors at once.
-    - Invalid rows are identified by their index and removed from the DataFrame.
-    - The returned DataFrame has duplicates removed and all rows with any
-      missing values dropped.
-    - Validation errors are logged in JSON format for easier parsing.
+    - Invalid rows are accumulated in one boolean mask (`FailureMask`) and
+      removed, together with duplicates and all-missing rows, in a single
+      filtering copy (`drop_invalid_rows`).
+    - Validation errors are logged once, in JSON format, with a capped
+      sample of failure cases per check.
 
     Examples
     --------
@@ -50,22 +125,21 @@ def val_data_handle_error(df, schema):
         0       1
         1       2
     """
-    error_cases = None
+    failures = FailureMask(df.index, max_cases)
     try:
         schema.validate(df, lazy=True)
     except pa.errors.SchemaErrors as e:
-        error_cases = e.failure_cases
-
-        # Convert the error message to a JSON string
-        error_message = json.dumps(e.message, indent=2)
-        logging.error('\n' + error_message)
-
-    # Filter out invalid rows based on the error cases
-    if error_cases is not None and not error_cases.empty:
-        invalid_indices = error_cases['index'].dropna().unique()
-        return (df.drop(index=invalid_indices)
-                .reset_index(drop=True)
-                .drop_duplicates()
-                .dropna(how='all'))
-    else:
-        return df
\ No newline at end of file
+        failures.add_failure_cases(e.failure_cases)
+
+    if engine is not None:
+        engine_failures = engine(df)
+        if isinstance(engine_failures, FailureMask):
+            failures.update(engine_failures)
+        elif not engine_failures.empty:
+            failures.add_failure_cases(engine_failures)
+
+    if not failures:
+        return df
+
+    logging.error('\n' + json.dumps(failures.message(), indent=2, default=str))
+    return drop_invalid_rows(df, failures.invalid)
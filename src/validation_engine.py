@@ -0,0 +1,332 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import kstest
+from src.eda_stats import pearson_matrix
+
+# Same layout as pandera's SchemaErrors.failure_cases, which val_data_handle_error consumes
+FAILURE_CASE_COLUMNS = ['schema_context', 'column', 'check', 'check_number', 'failure_case', 'index']
+
+def iqr_bounds(X, iqr_mult = 3):
+    """
+    Compute the IQR outlier bounds of every column of a feature matrix at once.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        Two-dimensional feature matrix, one column per feature. Missing values are ignored.
+    iqr_mult : float, optional
+        Multiple of the interquartile range added beyond the quartiles (default is 3).
+
+    Returns
+    -------
+    lower, upper : numpy.ndarray
+        Per-column lower and upper bounds.
+    """
+    quantile = np.nanquantile if np.isnan(X).any() else np.quantile
+    q1, q3 = quantile(X, [0.25, 0.75], axis = 0)
+    iqr = q3 - q1
+    return q1 - iqr_mult * iqr, q3 + iqr_mult * iqr
+
+def _frame_failure(check, check_number = 0, column = None, schema_context = 'DataFrameSchema'):
+    # A check that fails on the whole frame or column is reported without an index
+    return pd.DataFrame([[schema_context, column, check, check_number, False, None]],
+                        columns = FAILURE_CASE_COLUMNS)
+
+class FailureMask:
+    """
+    Validation failures of a frame as a boolean mask of invalid rows, with counts and a capped sample per check.
+
+    Checks mark the rows they reject in one mask instead of producing a
+    failure-case row per failing cell, so the memory stays at one byte per
+    row however dirty the data is. Each check keeps only its number of
+    failures and an evenly spaced sample of at most `max_cases` failure
+    cases (with their index labels), which is what gets logged.
+
+    Parameters
+    ----------
+    index : pandas.Index
+        Index of the validated frame.
+    max_cases : int, optional
+        Failure cases kept per check (default is 10; None keeps all of them).
+    """
+
+    def __init__(self, index, max_cases = 10):
+        self.index = index
+        self.max_cases = max_cases
+        self.invalid = np.zeros(len(index), dtype = bool)
+        self.checks = {}
+
+    def __bool__(self):
+        return bool(self.checks)
+
+    def _sample(self, n):
+        # Positions of the kept failure cases, evenly spaced over all of them
+        if self.max_cases is None or n <= self.max_cases:
+            return np.arange(n)
+        return np.unique(np.linspace(0, n - 1, self.max_cases).round().astype(np.int64))
+
+    def _record(self, key, count, labels, cases):
+        entry = self.checks.setdefault(key, {'count': 0, 'index': [], 'cases': []})
+        entry['count'] += count
+        keep = len(labels) if self.max_cases is None else max(self.max_cases - len(entry['cases']), 0)
+        entry['index'] += list(labels)[:keep]
+        entry['cases'] += list(cases)[:keep]
+
+    def add(self, check, column = None, rows = None, values = None, check_number = 0, schema_context = None):
+        """
+        Record a failed check.
+
+        Parameters
+        ----------
+        check : str
+            Name of the check.
+        column : str, optional
+            Checked column (default is None, a check of the whole frame).
+        rows : numpy.ndarray, optional
+            Positions of the failing rows, marked invalid (default is None, a
+            failure without rows, like the duplicate-row check).
+        values : numpy.ndarray, optional
+            Failing values, one per row of `rows`.
+        check_number : int, optional
+            Position of the check in its column's checks (default is 0).
+        schema_context : str, optional
+            'Column' or 'DataFrameSchema' (default depends on `column`).
+        """
+        if schema_context is None:
+            schema_context = 'DataFrameSchema' if column is None else 'Column'
+        key = (schema_context, column, check, check_number)
+        if rows is None:
+            self._record(key, 1, [None], [False])
+            return self
+        self.invalid[rows] = True
+        pick = self._sample(len(rows))
+        self._record(key, len(rows), self.index[rows[pick]].tolist(), np.asarray(values)[pick].tolist())
+        return self
+
+    def add_failure_cases(self, failure_cases):
+        """
+        Record failure cases in the `FAILURE_CASE_COLUMNS` layout, e.g. pandera's `SchemaErrors.failure_cases`.
+
+        Every row whose index label appears in the cases is marked invalid.
+        """
+        labels = failure_cases['index'].dropna().unique()
+        if len(labels):
+            self.invalid |= self.index.isin(labels)
+        keys = ['schema_context', 'column', 'check', 'check_number']
+        for key, cases in failure_cases.groupby(keys, dropna = False, sort = False):
+            key = tuple(None if pd.isna(part) else part for part in key)
+            pick = self._sample(len(cases))
+            index = [None if pd.isna(label) else label for label in cases['index'].to_numpy()[pick].tolist()]
+            self._record(key, len(cases), index, cases['failure_case'].to_numpy()[pick].tolist())
+        return self
+
+    def update(self, other):
+        """
+        Add the invalid rows and checks of another `FailureMask` of the same frame.
+        """
+        self.invalid |= other.invalid
+        for key, entry in other.checks.items():
+            self._record(key, entry['count'], entry['index'], entry['cases'])
+        return self
+
+    def message(self):
+        """
+        Summary in the structure of pandera's `SchemaErrors.message`, with the failure count of every check.
+        """
+        errors = []
+        for (schema_context, column, check, check_number), entry in self.checks.items():
+            values = ', '.join(str(v) for v in entry['cases'])
+            more = entry['count'] - len(entry['cases'])
+            errors.append({
+                'schema': None,
+                'column': column,
+                'check': check,
+                'failure_count': entry['count'],
+                'sample_index': entry['index'],
+                'error': f"{'Column ' + repr(column) if column else 'DataFrameSchema'} failed validator "
+                         f"<Check {check}> failure cases: {values}" + (f" and {more} more" if more else "")
+            })
+        return {'DATA': {'DATAFRAME_CHECK': errors}}
+
+def _outliers(df, feature_columns, iqr_mult = 3, bounds = None):
+    # Feature matrix and the mask of its values beyond the IQR bounds
+    X = df[feature_columns].to_numpy(dtype = float)
+    lower, upper = iqr_bounds(X, iqr_mult) if bounds is None else bounds
+
+    # NaN compares False on both sides, so missing values are never outliers
+    return X, (X < lower) | (X > upper)
+
+def _has_duplicate_rows(df):
+    # Hash every row once and look for repeated hashes
+    return pd.util.hash_pandas_object(df, index = False).duplicated().any()
+
+def _quality_not_normal(df):
+    quality = df['quality'].dropna()
+    z = (quality - quality.mean()) / quality.std()
+    return not kstest(z, 'norm').pvalue > 0.05
+
+def outlier_failure_cases(df, feature_columns, iqr_mult = 3, bounds = None):
+    """
+    Flag the values lying beyond the IQR bounds of their column.
+
+    The quartiles of all columns are computed in one vectorized pass over the
+    feature matrix instead of one pandas `quantile` call per column and quartile.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The data to check.
+    feature_columns : list[str]
+        Numeric columns to check.
+    iqr_mult : float, optional
+        Multiple of the interquartile range added beyond the quartiles (default is 3).
+    bounds : tuple of numpy.ndarray, optional
+        Precomputed (lower, upper) bounds per column, e.g. from
+        `quantile_sketch.sketch_bounds`; `iqr_mult` is then ignored.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per outlying value, in the `FAILURE_CASE_COLUMNS` layout.
+    """
+    X, outliers = _outliers(df, feature_columns, iqr_mult, bounds)
+    rows, cols = np.nonzero(outliers)
+
+    # Report column by column, like pandera does
+    order = np.lexsort((rows, cols))
+    rows, cols = rows[order], cols[order]
+    return pd.DataFrame({
+        'schema_context': 'Column',
+        'column': np.asarray(feature_columns, dtype = object)[cols],
+        'check': 'outlier_check',
+        'check_number': 0,
+        'failure_case': X[rows, cols],
+        'index': df.index.to_numpy()[rows]
+    }, columns = FAILURE_CASE_COLUMNS)
+
+def wine_failure_cases(df, feature_columns, iqr_mult = 3, bounds = None):
+    """
+    Run the row-level checks of the raw wine data in a single pass each.
+
+    Covers the IQR outlier check on every feature, the duplicate-row check
+    (rows are hashed once and the hashes compared) and the KS normality check
+    on the standardized 'quality' column.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The raw wine data.
+    feature_columns : list[str]
+        The physicochemical feature columns.
+    iqr_mult : float, optional
+        Multiple of the interquartile range used by the outlier check (default is 3).
+    bounds : tuple of numpy.ndarray, optional
+        Precomputed (lower, upper) outlier bounds per feature column.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Failure cases in the `FAILURE_CASE_COLUMNS` layout; empty if every check passes.
+    """
+    failures = [outlier_failure_cases(df, feature_columns, iqr_mult, bounds)]
+    if _has_duplicate_rows(df):
+        failures.append(_frame_failure('Duplicate rows detected.'))
+    if _quality_not_normal(df):
+        failures.append(_frame_failure('dist_check', check_number = 1, column = 'quality',
+                                       schema_context = 'Column'))
+    return pd.concat(failures, ignore_index = True)
+
+def wine_failures(df, feature_columns, iqr_mult = 3, bounds = None, max_cases = 10):
+    """
+    The checks of `wine_failure_cases`, recorded in a `FailureMask` instead of one row per failing cell.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The raw wine data.
+    feature_columns : list[str]
+        The physicochemical feature columns.
+    iqr_mult : float, optional
+        Multiple of the interquartile range used by the outlier check (default is 3).
+    bounds : tuple of numpy.ndarray, optional
+        Precomputed (lower, upper) outlier bounds per feature column.
+    max_cases : int, optional
+        Failure cases kept per check for the log (default is 10).
+
+    Returns
+    -------
+    FailureMask
+        Empty (false) if every check passes.
+    """
+    failures = FailureMask(df.index, max_cases)
+    X, outliers = _outliers(df, feature_columns, iqr_mult, bounds)
+    for j, column in enumerate(feature_columns):
+        rows = np.flatnonzero(outliers[:, j])
+        if rows.size:
+            failures.add('outlier_check', column, rows, X[rows, j])
+    if _has_duplicate_rows(df):
+        failures.add('Duplicate rows detected.')
+    if _quality_not_normal(df):
+        failures.add('dist_check', 'quality', check_number = 1)
+    return failures
+
+def correlation_failure_cases(df, target = 'quality_binary', threshold = 0.95):
+    """
+    Check the target and feature correlations from a single correlation matrix.
+
+    The Pearson matrix of all numeric columns is taken once from
+    `eda_stats.pearson_matrix`, and used both for the target check (no column
+    correlates with `target` at `threshold` or more) and the feature check (no
+    pair of non-target columns does). Only this matrix is computed, and it is
+    cached in `eda_stats.STATS_CACHE`, so the EDA of the same data reuses it;
+    the ranks, quantiles and histograms are left to the EDA.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The data to check.
+    target : str, optional
+        Name of the target column (default is 'quality_binary').
+    threshold : float, optional
+        Largest allowed absolute correlation, exclusive (default is 0.95).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Failure cases in the `FAILURE_CASE_COLUMNS` layout; empty if both checks pass.
+    """
+    columns = list(df.select_dtypes(include = ['number', 'bool']).columns)
+    # Constant columns give NaN correlations, which fail the checks like pandas' do
+    corr = pearson_matrix(df, columns)
+
+    t = columns.index(target)
+    others = [i for i in range(len(columns)) if i != t]
+
+    failures = []
+    if not np.abs(corr[t, others]).max() < threshold:
+        failures.append(_frame_failure('target_corr_check'))
+    if not np.abs(np.triu(corr[np.ix_(others, others)], k = 1)).max() < threshold:
+        failures.append(_frame_failure('feature_corr_check', check_number = 1))
+
+    if not failures:
+        return pd.DataFrame(columns = FAILURE_CASE_COLUMNS)
+    return pd.concat(failures, ignore_index = True)
+
+def failure_message(failure_cases, max_cases = None):
+    """
+    Summarize failure cases in the structure of pandera's `SchemaErrors.message`.
+
+    Parameters
+    ----------
+    failure_cases : pandas.DataFrame
+        Failure cases in the `FAILURE_CASE_COLUMNS` layout.
+    max_cases : int, optional
+        Failure cases listed per check (default is None, all of them).
+
+    Returns
+    -------
+    dict
+        {'DATA': {'DATAFRAME_CHECK': [...]}} with one entry per failed check.
+    """
+    # Only the checks are summarized, so the mask is over an empty index
+    return FailureMask(pd.Index([]), max_cases).add_failure_cases(failure_cases).message()
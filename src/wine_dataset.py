@@ -0,0 +1,182 @@
+import click
+from src.frame_io import read_frame
+
+class WineDataset:
+    """
+    Compact feature matrix and binary target shared by the pipeline stages.
+
+    The features are held in one C-contiguous float32 array of shape
+    (n_rows, n_features) and the target in a bit-packed uint8 array, so a
+    dataset takes about 4 bytes per feature value and 1 bit per target,
+    instead of the 8 bytes per value, the int `quality` column and the bool
+    target of a pandas frame. Column, row and frame accessors return views
+    of the matrix rather than copies, so stages can share one dataset.
+
+    Parameters
+    ----------
+    features : numpy.ndarray
+        Feature matrix of shape (n_rows, n_features).
+    target_bits : numpy.ndarray
+        Target packed with `numpy.packbits`.
+    n_rows : int
+        Number of rows (the packed target is padded to a multiple of 8).
+    columns : list[str]
+        Feature names, in matrix column order.
+    """
+
+    def __init__(self, features, target_bits, n_rows, columns):
+        self.features = features
+        self.target_bits = target_bits
+        self.n_rows = n_rows
+        self.columns = list(columns)
+        self.column_index = {name: j for j, name in enumerate(self.columns)}
+
+    @classmethod
+    def from_frame(cls, df, feature_columns, target = 'quality_binary', dtype = 'float32'):
+        """
+        Build a dataset from a data frame, copying each column once into the compact matrix.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            Data with `feature_columns` and `target`.
+        feature_columns : list[str]
+            Columns of the feature matrix, in order.
+        target : str, optional
+            Boolean target column (default is 'quality_binary').
+        dtype : str or numpy.dtype, optional
+            Dtype of the feature matrix (default is 'float32'; 'float64' keeps full precision).
+
+        Returns
+        -------
+        WineDataset
+        """
+        import numpy as np
+
+        # Filled column by column, so no full-size intermediate array is created
+        features = np.empty((len(df), len(feature_columns)), dtype = dtype)
+        for j, column in enumerate(feature_columns):
+            features[:, j] = df[column].to_numpy()
+        target_bits = np.packbits(df[target].to_numpy(dtype = bool))
+        return cls(features, target_bits, len(df), feature_columns)
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def X(self):
+        """
+        The feature matrix itself (not a copy).
+        """
+        return self.features
+
+    @property
+    def y(self):
+        """
+        The target as a boolean array, unpacked from the bits.
+        """
+        import numpy as np
+        return np.unpackbits(self.target_bits, count = self.n_rows).view(bool)
+
+    @property
+    def nbytes(self):
+        """
+        Memory held by the feature matrix and the packed target, in bytes.
+        """
+        return self.features.nbytes + self.target_bits.nbytes
+
+    def column(self, name):
+        """
+        A strided view of one feature column.
+        """
+        return self.features[:, self.column_index[name]]
+
+    def select(self, names):
+        """
+        The columns `names` as a matrix; a view when they are adjacent and in order, a copy otherwise.
+        """
+        positions = [self.column_index[name] for name in names]
+        if positions == list(range(positions[0], positions[0] + len(positions))):
+            return self.features[:, positions[0]:positions[0] + len(positions)]
+        return self.features[:, positions]
+
+    def rows(self, start, stop = None):
+        """
+        A dataset of rows `start` to `stop`, sharing the feature matrix.
+
+        Only the packed target, 1/8 byte per row, is re-packed.
+        """
+        import numpy as np
+        rows = slice(start, stop)
+        return WineDataset(self.features[rows], np.packbits(self.y[rows]), len(range(self.n_rows)[rows]),
+                           self.columns)
+
+    def frame(self, target = 'quality_binary'):
+        """
+        A data frame whose feature columns are views of the matrix, plus the unpacked target.
+
+        Parameters
+        ----------
+        target : str, optional
+            Name of the target column, None to leave it out (default is 'quality_binary').
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        import pandas as pd
+        df = pd.DataFrame(self.features, columns = self.columns, copy = False)
+        if target is not None:
+            df[target] = self.y
+        return df
+
+def as_dataset(data, feature_columns, dtype = 'float32'):
+    """
+    Return `data` if it is a `WineDataset`, or build one from a data frame.
+    """
+    if isinstance(data, WineDataset):
+        return data
+    return WineDataset.from_frame(data, feature_columns, dtype = dtype)
+
+def memory_report(df, dataset):
+    """
+    Compare the memory of a data frame with that of the compact dataset built from it.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The original frame.
+    dataset : WineDataset
+        The dataset built from `df`.
+
+    Returns
+    -------
+    dict
+        'rows', 'frame_mb' (all columns of `df`, including the index), 'dataset_mb'
+        and 'ratio' (frame size over dataset size).
+    """
+    frame_bytes = int(df.memory_usage(index = True, deep = True).sum())
+    return {
+        'rows': len(dataset),
+        'frame_mb': frame_bytes / 2 ** 20,
+        'dataset_mb': dataset.nbytes / 2 ** 20,
+        'ratio': frame_bytes / dataset.nbytes
+    }
+
+@click.command()
+@click.argument('paths', type = str, nargs = -1, required = True)
+@click.option('--dtype', type = click.Choice(['float32', 'float64']), default = 'float32',
+              help = 'Dtype of the compact feature matrix.')
+def main(paths, dtype):
+    # Memory of each (raw or processed) data file as a pandas frame and as a compact dataset
+    from src.read_csv import FEATURE_DTYPES
+    for path in paths:
+        df = read_frame(path)
+        if 'quality_binary' not in df:
+            df['quality_binary'] = df['quality'] >= 7
+        report = memory_report(df, WineDataset.from_frame(df, list(FEATURE_DTYPES), dtype = dtype))
+        click.echo(f"{path}: {report['rows']} rows, frame {report['frame_mb']:.2f} MB, "
+                   f"dataset {report['dataset_mb']:.2f} MB ({report['ratio']:.1f}x smaller)")
+
+if __name__ == '__main__':
+    main()
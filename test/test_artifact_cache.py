@@ -0,0 +1,75 @@
+import os
+import sys
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.artifact_cache import ArtifactCache
+from src.train_evaluate_models import train_evaluate_models
+
+X, y = make_classification(n_samples = 200, n_features = 5, random_state = 14)
+
+def test_hit_after_miss(tmp_path):
+    cache = ArtifactCache(str(tmp_path))
+
+    model, hit = cache.fit(LogisticRegression(max_iter = 1000), X, y)
+    assert not hit
+    cached, hit = cache.fit(LogisticRegression(max_iter = 1000), X, y)
+    assert hit
+    np.testing.assert_allclose(cached.coef_, model.coef_)
+
+def test_unsupervised_estimator(tmp_path):
+    cache = ArtifactCache(str(tmp_path))
+    cache.fit(StandardScaler(), X)
+    scaler, hit = cache.fit(StandardScaler(), X)
+
+    assert hit
+    np.testing.assert_allclose(scaler.mean_, X.mean(axis = 0))
+
+def test_key_changes(tmp_path):
+    cache = ArtifactCache(str(tmp_path))
+    key = cache.key(DecisionTreeClassifier(max_depth = 3), X, y)
+
+    assert key == cache.key(DecisionTreeClassifier(max_depth = 3), X.copy(), y.copy())
+    assert key != cache.key(DecisionTreeClassifier(max_depth = 4), X, y)
+    assert key != cache.key(DecisionTreeClassifier(max_depth = 3), X[:-1], y[:-1])
+    assert key != cache.key(DecisionTreeClassifier(max_depth = 3), X, 1 - y)
+
+def test_lru_eviction(tmp_path):
+    cache = ArtifactCache(str(tmp_path))
+    trees = {depth: DecisionTreeClassifier(max_depth = depth, random_state = 14) for depth in (1, 2, 3)}
+    paths = {depth: cache._path(cache.key(tree, X, y)) for depth, tree in trees.items()}
+
+    for depth in (1, 2):
+        cache.fit(trees[depth], X, y)
+    entry_size = max(size for _, size, _ in cache.entries())
+
+    # Depth 2 was used longer ago than depth 1, so it is evicted first
+    os.utime(paths[1], (200, 200))
+    os.utime(paths[2], (100, 100))
+    cache.max_bytes = entry_size * 2.5
+    cache.fit(trees[3], X, y)
+
+    assert os.path.exists(paths[1])
+    assert not os.path.exists(paths[2])
+    assert os.path.exists(paths[3])
+
+@pytest.mark.parametrize('executor', ['serial', 'process'])
+def test_train_evaluate_models_counts(tmp_path, executor):
+    cache = ArtifactCache(str(tmp_path))
+    models = lambda: {'Logistic Regression': LogisticRegression(max_iter = 1000),
+                      'Decision Tree': DecisionTreeClassifier(max_depth = 3, random_state = 14)}
+
+    first, _ = train_evaluate_models(models(), X[:150], y[:150], X[150:], y[150:],
+                                     executor = executor, cache = cache)
+    second, _ = train_evaluate_models(models(), X[:150], y[:150], X[150:], y[150:],
+                                      executor = executor, cache = cache)
+
+    assert cache.stats()['Hits'] == 2
+    assert cache.stats()['Misses'] == 2
+    assert [row['ROC AUC'] for row in first] == [row['ROC AUC'] for row in second]
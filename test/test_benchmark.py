@@ -0,0 +1,74 @@
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.benchmark import STAGES, benchmark_dataset, compare_runs, generate_dataset, main
+from src.frame_io import read_frame, write_frame
+from src.read_csv import FEATURE_DTYPES
+
+feature_columns = list(FEATURE_DTYPES)
+
+@pytest.fixture
+def raw_path(tmp_path):
+    rng = np.random.default_rng(0)
+    raw = pd.DataFrame(rng.uniform(0.5, 2, size = (300, len(feature_columns))), columns = feature_columns)
+    raw['alcohol'] += rng.integers(0, 2, size = 300)
+    raw['quality'] = np.where(raw['alcohol'] > 1.8, 7, 5) + rng.integers(0, 2, size = 300)
+    path = str(tmp_path / 'raw.csv')
+    write_frame(raw, path)
+    return path
+
+def test_generate_dataset(tmp_path, raw_path):
+    path = str(tmp_path / 'wine.parquet')
+    assert generate_dataset(raw_path, 2500, path, chunksize = 1000) == 2500
+
+    raw = read_frame(raw_path)
+    synthetic = read_frame(path)
+    assert list(synthetic.columns) == feature_columns + ['quality']
+    assert not synthetic.duplicated().any()
+    assert set(synthetic['quality']) <= set(raw['quality'])
+    assert (synthetic[feature_columns].min() >= raw[feature_columns].min()).all()
+    np.testing.assert_allclose(synthetic[feature_columns].mean(), raw[feature_columns].mean(), rtol = 0.05)
+
+    # Same seed, same data
+    generate_dataset(raw_path, 2500, str(tmp_path / 'again.parquet'), chunksize = 1000)
+    pd.testing.assert_frame_equal(read_frame(str(tmp_path / 'again.parquet')), synthetic)
+
+def test_benchmark_dataset(tmp_path, raw_path):
+    path = str(tmp_path / 'wine.feather')
+    generate_dataset(raw_path, 1000, path)
+    results = benchmark_dataset(path, max_train_rows = 300)
+
+    assert [result['stage'] for result in results] == list(STAGES)
+    assert all(result['rows'] == 1000 and result['wall_s'] > 0 for result in results)
+
+def run_of(**wall_s):
+    return {'meta': {}, 'results': [{'rows': 1000, 'stage': stage, 'wall_s': t} for stage, t in wall_s.items()]}
+
+def test_compare_runs():
+    baseline = run_of(ingest = 0.01, validate = 1.0, train = 2.0)
+    current = run_of(ingest = 0.02, validate = 1.3, train = 2.1, plot = 5.0)
+    comparison = compare_runs(baseline, current, threshold = 0.2, min_seconds = 0.05)
+
+    # ingest doubled but only by 10 ms; plot has no baseline
+    assert list(comparison['stage']) == ['ingest', 'validate', 'train']
+    assert list(comparison['regression']) == [False, True, False]
+
+def test_compare_exit_code(tmp_path):
+    paths = {}
+    for name, run in [('base', run_of(validate = 1.0)), ('same', run_of(validate = 1.1)),
+                      ('slow', run_of(validate = 2.0))]:
+        paths[name] = str(tmp_path / (name + '.json'))
+        with open(paths[name], 'w') as f:
+            json.dump(run, f)
+
+    runner = CliRunner()
+    assert runner.invoke(main, ['compare', paths['base'], paths['same']]).exit_code == 0
+    assert runner.invoke(main, ['compare', paths['base'], paths['slow']]).exit_code == 1
+    assert runner.invoke(main, ['compare', paths['base'], paths['slow'], '--threshold', '1.5']).exit_code == 0
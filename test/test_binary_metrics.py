@@ -0,0 +1,65 @@
+import os
+import sys
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import (
+    accuracy_score,
+    precision_score,
+    recall_score,
+    f1_score,
+    roc_auc_score,
+    roc_curve,
+)
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.binary_metrics import positive_proba, binary_metrics
+
+X, y = make_classification(n_samples = 300, n_features = 6, random_state = 14)
+y = y.astype(bool)
+
+@pytest.mark.parametrize("model", [
+    LogisticRegression(max_iter = 1000, random_state = 14),
+    RandomForestClassifier(n_estimators = 20, max_depth = 3, random_state = 14),
+])
+def test_matches_sklearn(model):
+    model.fit(X[:200], y[:200])
+    y_proba, y_pred = positive_proba(model, X[200:])
+    y_test = y[200:]
+
+    np.testing.assert_array_equal(y_pred, model.predict(X[200:]))
+    np.testing.assert_allclose(y_proba, model.predict_proba(X[200:])[:, 1])
+
+    metrics = binary_metrics(y_test, y_proba, y_pred)
+    assert metrics['accuracy'] == pytest.approx(accuracy_score(y_test, y_pred))
+    assert metrics['precision'] == pytest.approx(precision_score(y_test, y_pred))
+    assert metrics['recall'] == pytest.approx(recall_score(y_test, y_pred))
+    assert metrics['f1'] == pytest.approx(f1_score(y_test, y_pred))
+    assert metrics['roc_auc'] == pytest.approx(roc_auc_score(y_test, y_proba))
+
+    fpr, tpr, thresholds = roc_curve(y_test, y_proba, drop_intermediate = False)
+    np.testing.assert_allclose(metrics['fpr'], fpr)
+    np.testing.assert_allclose(metrics['tpr'], tpr)
+    np.testing.assert_allclose(metrics['thresholds'][1:], thresholds[1:])
+
+def test_ties_and_no_positive_predictions():
+    y_true = np.array([0, 1, 1, 0, 1, 0])
+    y_score = np.array([0.2, 0.2, 0.4, 0.4, 0.4, 0.1])
+    y_pred = np.zeros(6, dtype = int)
+
+    metrics = binary_metrics(y_true, y_score, y_pred)
+    assert metrics['roc_auc'] == pytest.approx(roc_auc_score(y_true, y_score))
+    assert metrics['precision'] == 0.0
+    assert metrics['f1'] == 0.0
+
+def test_single_class():
+    with pytest.raises(ValueError, match = 'Only one class present'):
+        binary_metrics([1, 1, 1], [0.2, 0.5, 0.9], [1, 1, 1])
+
+def test_label_metrics_only():
+    metrics = binary_metrics([1, 1, 1], [0.2, 0.5, 0.9], [1, 0, 1], roc = False)
+    assert set(metrics) == {'accuracy', 'precision', 'recall', 'f1'}
+    assert metrics['recall'] == pytest.approx(2 / 3)
@@ -0,0 +1,53 @@
+import os
+import sys
+import numpy as np
+import pytest
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bootstrap import METRICS, bootstrap_metrics, bootstrap_weights, label_metrics, rank_auc
+
+rng = np.random.default_rng(7)
+y_true = rng.random(300) < 0.3
+# Rounded scores, so that many positives and negatives are tied
+scores = np.column_stack([np.round(y_true * 0.3 + rng.random(300), 1), rng.random(300)])
+y_pred = scores > 0.5
+
+def test_weights():
+    weights = bootstrap_weights(np.random.default_rng(0), 50, 20)
+    assert weights.shape == (20, 50)
+    np.testing.assert_array_equal(weights.sum(axis = 1), 50)
+
+def test_matches_sklearn_per_resample():
+    weights = bootstrap_weights(np.random.default_rng(1), len(y_true), 30)
+    values = label_metrics(weights, y_true, y_pred)
+    for j in range(scores.shape[1]):
+        aucs = rank_auc(weights, y_true, scores[:, j])
+        for b, w in enumerate(weights):
+            index = np.repeat(np.arange(len(y_true)), w.astype(int))
+            t, p = y_true[index], y_pred[index, j]
+            assert values['accuracy'][b, j] == pytest.approx(accuracy_score(t, p))
+            assert values['precision'][b, j] == pytest.approx(precision_score(t, p, zero_division = 0))
+            assert values['recall'][b, j] == pytest.approx(recall_score(t, p, zero_division = 0))
+            assert values['f1'][b, j] == pytest.approx(f1_score(t, p, zero_division = 0))
+            assert aucs[b] == pytest.approx(roc_auc_score(t, scores[index, j]))
+
+def test_single_class_auc():
+    weights = np.zeros((1, len(y_true)))
+    weights[0, np.flatnonzero(y_true)[:5]] = 1
+    assert np.isnan(rank_auc(weights, y_true, scores[:, 0])[0])
+
+def test_intervals():
+    intervals = bootstrap_metrics(y_true, scores, y_pred, names = ['a', 'b'], n_boot = 500)
+    assert list(intervals) == ['a', 'b'] and list(intervals['a']) == list(METRICS)
+    point = {'accuracy': accuracy_score(y_true, y_pred[:, 0]), 'roc_auc': roc_auc_score(y_true, scores[:, 0])}
+    for metric, value in point.items():
+        lower, upper = intervals['a'][metric]
+        assert lower <= value <= upper
+
+def test_independent_of_jobs(monkeypatch):
+    # Several batches, so that both workers get some
+    monkeypatch.setattr('src.bootstrap.BATCH_ENTRIES', 300 * 40)
+    serial = bootstrap_metrics(y_true, scores, y_pred, n_boot = 200)
+    assert bootstrap_metrics(y_true, scores, y_pred, n_boot = 200, n_jobs = 2) == serial
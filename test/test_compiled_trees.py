@@ -0,0 +1,115 @@
+import os
+import sys
+import numpy as np
+import pytest
+from click.testing import CliRunner
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.compiled_trees import (
+    CompiledForest,
+    _float32_floor,
+    benchmark_compiled,
+    compile_trees,
+    export_compiled,
+    is_tree_model,
+    main,
+)
+from src.incremental_models import ChunkTreeEnsemble
+from src.model_store import load_models, save_models
+
+X, y = make_classification(n_samples = 2000, n_features = 6, n_informative = 4, random_state = 23)
+X_new = np.random.default_rng(23).standard_normal((3000, 6)) * 2
+models = {
+    'Decision Tree': DecisionTreeClassifier(max_depth = 10, min_samples_leaf = 3, class_weight = 'balanced',
+                                            random_state = 23).fit(X, y),
+    'Random Forest': RandomForestClassifier(n_estimators = 30, max_depth = 12, class_weight = 'balanced',
+                                            random_state = 23).fit(X, y == 1),
+}
+
+def test_float32_floor():
+    threshold = np.array([0.5, 1 + 1e-12, -1 - 1e-12, np.float32(0.1) + 1e-12, 3.4e38])
+    floor = _float32_floor(threshold)
+    assert floor.dtype == np.float32
+    assert (floor.astype(np.float64) <= threshold).all()
+    # The next float32 is above the threshold
+    assert (np.nextafter(floor, np.float32(np.inf)).astype(np.float64) > threshold).all()
+
+@pytest.mark.parametrize('name', list(models))
+def test_matches_sklearn(name):
+    model = models[name]
+    compiled = compile_trees(model)
+    for data in [X, X_new, X_new[:1]]:
+        np.testing.assert_allclose(compiled.predict_proba(data), model.predict_proba(data), rtol = 0, atol = 1e-12)
+    assert compiled.predict_proba(X_new[:0]).shape == (0, 2)
+    np.testing.assert_array_equal(compiled.predict(X_new), model.predict(X_new))
+    assert compiled.classes_.tolist() == model.classes_.tolist()
+
+def test_split_values_go_like_sklearn():
+    # Rows exactly on, and one float32 step beside, every threshold take sklearn's branches
+    tree = models['Decision Tree']
+    split = tree.tree_.feature >= 0
+    on = np.tile(X_new[:1], (split.sum(), 1)).astype(np.float32)
+    on[np.arange(len(on)), tree.tree_.feature[split]] = tree.tree_.threshold[split]
+    data = np.vstack([on, np.nextafter(on, np.float32(np.inf)), np.nextafter(on, np.float32(-np.inf))])
+    np.testing.assert_array_equal(compile_trees(tree).predict_proba(data), tree.predict_proba(data))
+
+def test_small_blocks(monkeypatch):
+    import src.compiled_trees
+    monkeypatch.setattr(src.compiled_trees, 'BLOCK_NODES', 100)
+    model = models['Random Forest']
+    np.testing.assert_allclose(compile_trees(model).predict_proba(X_new), model.predict_proba(X_new), atol = 1e-12)
+    assert compile_trees(model).apply(X_new[:7]).shape == (30, 7)
+
+def test_chunk_tree_ensemble():
+    model = ChunkTreeEnsemble(max_estimators = 5, max_depth = 4)
+    model.partial_fit(X[:100], np.zeros(100, dtype = bool), classes = np.array([False, True]))
+    for start in range(100, 2000, 400):
+        model.partial_fit(X[start:start + 400], y[start:start + 400] == 1)
+    np.testing.assert_allclose(compile_trees(model).predict_proba(X_new), model.predict_proba(X_new), atol = 1e-12)
+
+def test_errors():
+    logistic = LogisticRegression().fit(X, y)
+    assert not is_tree_model(logistic) and is_tree_model(models['Random Forest'])
+    with pytest.raises(ValueError):
+        compile_trees(logistic)
+    compiled = compile_trees(models['Decision Tree'])
+    with pytest.raises(ValueError):
+        compiled.predict_proba(X[:, :3])
+    with pytest.raises(ValueError):
+        compiled.predict_proba(np.full((1, 6), np.nan))
+
+def test_export_and_load(tmp_path):
+    scaler = StandardScaler().fit(X)
+    save_models(scaler, {'Logistic Regression': LogisticRegression().fit(X, y), **models}, [f'f{i}' for i in range(6)],
+                str(tmp_path))
+    compiled = export_compiled(str(tmp_path))
+    assert list(compiled) == ['Decision Tree', 'Random Forest']
+
+    _, loaded, _ = load_models(str(tmp_path), compiled = True)
+    assert list(loaded) == ['Logistic Regression', 'Decision Tree', 'Random Forest']
+    assert isinstance(loaded['Random Forest'], CompiledForest)
+    assert isinstance(loaded['Logistic Regression'], LogisticRegression)
+    np.testing.assert_allclose(loaded['Random Forest'].predict_proba(X_new),
+                               models['Random Forest'].predict_proba(X_new), atol = 1e-12)
+    # Without the flag the sklearn models are loaded
+    assert isinstance(load_models(str(tmp_path), ['Random Forest'])[1]['Random Forest'], RandomForestClassifier)
+
+def test_benchmark(tmp_path):
+    compiled = {name: compile_trees(model) for name, model in models.items()}
+    records = benchmark_compiled(models, compiled, [1, 100], repeat = 1)
+    assert [(r['Model'], r['Batch Size']) for r in records] == [
+        ('Decision Tree', 1), ('Decision Tree', 100), ('Random Forest', 1), ('Random Forest', 100)]
+    assert max(r['Max Abs Diff'] for r in records) < 1e-12
+
+    save_models(StandardScaler().fit(X), models, [f'f{i}' for i in range(6)], str(tmp_path))
+    result = CliRunner().invoke(main, [str(tmp_path), '--benchmark', str(tmp_path / 'bench.csv'),
+                                       '--batch-sizes', '1,10', '--repeat', '1'])
+    assert result.exit_code == 0, result.output
+    assert 'Compiled Random Forest: 30 trees' in result.output
+    assert os.path.exists(tmp_path / 'bench.csv')
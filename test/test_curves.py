@@ -0,0 +1,85 @@
+import os
+import sys
+import numpy as np
+import pytest
+from sklearn.calibration import calibration_curve
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import average_precision_score, precision_recall_curve, roc_auc_score, roc_curve
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.curves import curve_summary, downsample_indices, model_curves, score_matrix
+
+rng = np.random.default_rng(14)
+y = rng.integers(0, 2, size = 2000)
+# Continuous scores, and two columns with many ties
+scores = np.column_stack([
+    np.clip(0.3 * y + 0.7 * rng.random(2000), 0, 1),
+    np.round(rng.random(2000), 2),
+    np.round(0.2 * y + 0.8 * rng.random(2000), 1),
+])
+names = ['smooth', 'noise', 'coarse']
+
+@pytest.mark.parametrize('j', range(3))
+def test_matches_sklearn(j):
+    curve = model_curves(y, scores, names)[names[j]]
+    score = scores[:, j]
+
+    fpr, tpr, thresholds = roc_curve(y, score, drop_intermediate = False)
+    np.testing.assert_allclose(curve['fpr'], fpr)
+    np.testing.assert_allclose(curve['tpr'], tpr)
+    np.testing.assert_allclose(curve['thresholds'][1:], thresholds[1:])
+    assert curve['roc_auc'] == pytest.approx(roc_auc_score(y, score))
+
+    # sklearn orders the precision-recall curve by increasing threshold
+    precision, recall, _ = precision_recall_curve(y, score)
+    np.testing.assert_allclose(curve['precision'], precision[::-1])
+    np.testing.assert_allclose(curve['recall'], recall[::-1])
+    assert curve['average_precision'] == pytest.approx(average_precision_score(y, score))
+
+    prob_true, prob_pred = calibration_curve(y, score, n_bins = 10)
+    np.testing.assert_allclose(curve['prob_true'], prob_true)
+    np.testing.assert_allclose(curve['prob_pred'], prob_pred)
+    assert curve['bin_count'].sum() == y.size
+
+    assert curve['youden_j'] == pytest.approx(np.max(tpr - fpr))
+    best = np.argmax(tpr - fpr)
+    assert curve['best_threshold'] == pytest.approx(thresholds[best])
+    assert curve['brier_score'] == pytest.approx(np.mean((score - y) ** 2))
+
+def test_single_column_and_labels():
+    curves = model_curves(y.astype(bool), scores[:, 0], pos_label = True)
+    assert list(curves) == ['0']
+    assert curves['0']['roc_auc'] == pytest.approx(roc_auc_score(y, scores[:, 0]))
+
+def test_downsampling_keeps_ends_and_auc():
+    full = model_curves(y, scores, names)
+    small = model_curves(y, scores, names, n_points = 50)
+    for name in names:
+        assert len(small[name]['fpr']) <= 51
+        assert small[name]['fpr'][0] == 0 and small[name]['fpr'][-1] == 1
+        assert small[name]['tpr'][0] == 0 and small[name]['tpr'][-1] == 1
+        assert np.all(np.diff(small[name]['fpr']) >= 0)
+        assert small[name]['roc_auc'] == full[name]['roc_auc']
+        # The thinned curve stays close to the full one
+        assert np.trapz(small[name]['tpr'], small[name]['fpr']) == pytest.approx(full[name]['roc_auc'], abs = 0.01)
+
+    np.testing.assert_array_equal(downsample_indices([0, 0.5, 1], [0, 0.5, 1], 10), [0, 1, 2])
+
+def test_score_matrix_and_summary():
+    X = rng.normal(size = (300, 3))
+    target = (X[:, 0] + rng.normal(size = 300) > 0).astype(int)
+    models = {'a': LogisticRegression().fit(X, target), 'b': LogisticRegression(C = 0.01).fit(X, target)}
+    matrix = score_matrix(models, X)
+    assert matrix.shape == (300, 2)
+    np.testing.assert_allclose(matrix[:, 1], models['b'].predict_proba(X)[:, 1])
+
+    summary = curve_summary(model_curves(target, matrix, list(models)))
+    assert [row['Model'] for row in summary] == ['a', 'b']
+    assert summary[0]['ROC AUC'] == pytest.approx(roc_auc_score(target, matrix[:, 0]))
+
+def test_errors():
+    with pytest.raises(ValueError, match = 'Only one class present'):
+        model_curves(np.ones(5), np.random.random((5, 2)))
+    with pytest.raises(ValueError, match = 'shape'):
+        model_curves(np.ones(4), np.random.random((5, 2)))
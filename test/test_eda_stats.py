@@ -0,0 +1,105 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import rankdata
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.eda_stats import STATS_CACHE, PearsonStats, StatsCache, approx_ranks, compute_eda_stats, pearson_matrix
+from src.read_csv import FEATURE_DTYPES
+from src.render import corr_table, histogram_table
+from src.validation_engine import correlation_failure_cases
+from src.wine_dataset import WineDataset
+
+feature_columns = list(FEATURE_DTYPES)
+columns = feature_columns + ['quality_binary']
+rng = np.random.default_rng(5)
+df = pd.DataFrame(np.round(rng.uniform(0.1, 1.4, size = (500, len(feature_columns))), 2), columns = feature_columns)
+df['alcohol'] = rng.uniform(8.4, 14.0, size = 500)
+df['sulphates'] = df['alcohol'] / 10 + rng.normal(scale = 0.1, size = 500)
+df['quality_binary'] = df['alcohol'] + rng.normal(size = 500) > 11.5
+
+@pytest.mark.parametrize('n_jobs', [1, 3])
+def test_matches_pandas(n_jobs):
+    stats = compute_eda_stats(df, columns, n_jobs = n_jobs, cache = StatsCache())
+    assert stats.columns == columns and stats.rank_mode == 'exact'
+    pd.testing.assert_frame_equal(stats.summary[feature_columns], df[feature_columns].describe(), rtol = 1e-12)
+    np.testing.assert_allclose(stats.pearson, df[columns].corr(), atol = 1e-12)
+    np.testing.assert_allclose(stats.spearman, df[columns].corr('spearman'), atol = 1e-12)
+    pd.testing.assert_frame_equal(stats.corr_table(), corr_table(df, columns))
+    pd.testing.assert_frame_equal(stats.histograms, histogram_table(df, feature_columns, 'quality_binary'))
+
+def test_select():
+    stats = compute_eda_stats(df, columns, cache = StatsCache()).select(['sulphates', 'alcohol'])
+    assert list(stats.summary.columns) == ['sulphates', 'alcohol']
+    assert stats.spearman[0, 1] == pytest.approx(df['sulphates'].corr(df['alcohol'], 'spearman'))
+    assert list(stats.histograms['feature'].unique()) == ['sulphates', 'alcohol']
+
+def test_dataset_input():
+    dataset = WineDataset.from_frame(df, feature_columns)
+    stats = compute_eda_stats(dataset, columns, cache = StatsCache())
+    np.testing.assert_allclose(stats.spearman, df[columns].corr('spearman'), atol = 1e-12)
+    pd.testing.assert_frame_equal(stats.histograms,
+                                  histogram_table(dataset.frame(), feature_columns, 'quality_binary'))
+
+def test_approx_ranks():
+    values = np.column_stack([rng.lognormal(size = 20_000), np.round(rng.normal(size = 20_000), 1)])
+    values[:5, 0] = 1e6 # Outliers are ranked exactly, without coarsening the grid
+    ranks = approx_ranks(values, n_cells = 2 ** 16, rank_sample = 5000)
+    exact = rankdata(values, axis = 0)
+    assert np.abs(ranks[:, 0] - exact[:, 0]).max() / len(values) < 1e-3
+    np.testing.assert_array_equal(ranks[:5, 0], exact[:5, 0])
+    # Few distinct values: one cell per value, so the ranks are exact
+    np.testing.assert_array_equal(ranks[:, 1], exact[:, 1])
+
+def test_approx_mode():
+    exact = compute_eda_stats(df, columns, cache = StatsCache())
+    approx = compute_eda_stats(df, columns, rank_mode = 'approx', rank_sample = 100, cache = StatsCache())
+    assert approx.rank_mode == 'approx'
+    np.testing.assert_allclose(approx.spearman, exact.spearman, atol = 1e-3)
+    np.testing.assert_array_equal(approx.pearson, exact.pearson)
+
+def test_cache():
+    cache = StatsCache(max_entries = 2)
+    stats = compute_eda_stats(df, columns, cache = cache)
+    # Same content in a different frame, and a subset of the columns, are hits
+    again = compute_eda_stats(df.copy(), columns, cache = cache)
+    assert again.spearman is not stats.spearman
+    np.testing.assert_array_equal(again.spearman, stats.spearman)
+    compute_eda_stats(df, ['alcohol', 'quality_binary'], hist_columns = ['alcohol'], cache = cache)
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    # Changed data, another rank mode and another target are misses
+    changed = df.assign(alcohol = df['alcohol'] + 1)
+    compute_eda_stats(changed, columns, cache = cache)
+    compute_eda_stats(df, columns, rank_mode = 'approx', cache = cache)
+    compute_eda_stats(df.assign(quality_binary = ~df['quality_binary']), columns, cache = cache)
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert len(cache.entries) == 2
+
+def test_correlation_check_shares_pearson():
+    STATS_CACHE.clear()
+    checked = df.assign(quality = 1 + np.arange(len(df)) % 8)
+    assert correlation_failure_cases(checked).empty
+    # Only the Pearson matrix is computed, and the EDA of a subset of its columns reuses it
+    (entry,) = [stats for _, _, stats in STATS_CACHE.entries.values()]
+    assert isinstance(entry, PearsonStats) and entry.columns == list(checked.columns)
+    stats = compute_eda_stats(df, columns)
+    positions = [entry.columns.index(column) for column in columns]
+    np.testing.assert_array_equal(stats.pearson, entry.pearson[np.ix_(positions, positions)])
+    np.testing.assert_allclose(stats.pearson, df[columns].corr(), atol = 1e-12)
+
+    # The other way round, the check reuses the EDA's matrix
+    STATS_CACHE.clear()
+    stats = compute_eda_stats(df, columns)
+    np.testing.assert_array_equal(pearson_matrix(df, ['alcohol', 'quality_binary']),
+                                  stats.select(['alcohol', 'quality_binary']).pearson)
+    assert len(STATS_CACHE.entries) == 1
+
+def test_errors():
+    with pytest.raises(ValueError):
+        compute_eda_stats(df, columns, rank_mode = 'sketch', cache = StatsCache())
+    with pytest.raises(ValueError):
+        compute_eda_stats(df.assign(alcohol = np.nan), columns, cache = StatsCache())
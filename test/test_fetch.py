@@ -0,0 +1,190 @@
+import os
+import sys
+import threading
+import time
+import urllib.error
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.fetch import cache_path, fetch, fetch_all, is_url
+from src.read_csv import main
+
+class Source(BaseHTTPRequestHandler):
+    """
+    Stand-in for a static file server: ETag or Last-Modified validators,
+    conditional requests, byte ranges with If-Range, and optionally a
+    connection dropped halfway through one response.
+    """
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, dict(self.headers)))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            self._respond(server)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _respond(self, server):
+        time.sleep(server.delay)
+        body = server.files.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        etag = f'"{hash(body) & 0xffffffff:x}"'
+        validator = etag if server.use_etag else formatdate(server.mtime, usegmt = True)
+
+        if self.headers.get('If-None-Match', self.headers.get('If-Modified-Since')) == validator:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        start = 0
+        if self.headers.get('Range') and self.headers.get('If-Range') == validator:
+            start = int(self.headers['Range'].split('=')[1].rstrip('-'))
+        if start >= len(body) > 0:
+            self.send_error(416)
+            return
+
+        self.send_response(206 if start else 200)
+        self.send_header('ETag' if server.use_etag else 'Last-Modified', validator)
+        self.send_header('Content-Length', str(len(body) - start))
+        if start:
+            self.send_header('Content-Range', f'bytes {start}-{len(body) - 1}/{len(body)}')
+        self.end_headers()
+        if server.drop_after is not None:
+            # Send part of the body, then close the connection
+            self.wfile.write(body[start:start + server.drop_after])
+            server.drop_after = None
+            self.close_connection = True
+            return
+        self.wfile.write(body[start:])
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def source():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Source)
+    server.lock = threading.Lock()
+    server.requests, server.in_flight, server.max_in_flight = [], 0, 0
+    server.files, server.delay, server.drop_after, server.use_etag, server.mtime = {}, 0, None, True, 1.7e9
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+    server.url = f'http://127.0.0.1:{server.server_address[1]}'
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def csv_body(n_rows, shift = 0):
+    return ('a,b\n' + ''.join(f'{i + shift},{2 * i}\n' for i in range(n_rows))).encode()
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_is_url():
+    assert is_url('https://example.org/a.csv') and is_url('http://127.0.0.1:8000/a.csv')
+    assert not is_url('data/raw/raw_data.csv') and not is_url('/tmp/a.csv')
+
+@pytest.mark.parametrize('use_etag', [True, False])
+def test_conditional_revalidation(source, tmp_path, use_etag):
+    source.use_etag = use_etag
+    source.files['/wine.csv'] = csv_body(100)
+    url = source.url + '/wine.csv'
+
+    path = fetch(url, str(tmp_path))
+    assert path == cache_path(url, str(tmp_path)) and path.endswith('-wine.csv')
+    assert read(path) == source.files['/wine.csv']
+
+    # Unchanged: one conditional request answered with 304
+    assert fetch(url, str(tmp_path)) == path
+    header = 'If-None-Match' if use_etag else 'If-Modified-Since'
+    assert header in source.requests[-1][1]
+
+    # Changed: downloaded again
+    source.files['/wine.csv'] = csv_body(120, shift = 1)
+    source.mtime += 60
+    assert read(fetch(url, str(tmp_path))) == source.files['/wine.csv']
+    assert len(source.requests) == 3
+
+    # Without revalidation, no request at all
+    fetch(url, str(tmp_path), revalidate = False)
+    assert len(source.requests) == 3
+
+def test_resume_partial_download(source, tmp_path):
+    source.files['/wine.csv'] = csv_body(5000)
+    url = source.url + '/wine.csv'
+    source.drop_after = 10_000
+    with pytest.raises(urllib.error.ContentTooShortError):
+        fetch(url, str(tmp_path))
+    assert os.path.getsize(cache_path(url, str(tmp_path)) + '.part') == 10_000
+
+    path = fetch(url, str(tmp_path))
+    assert read(path) == source.files['/wine.csv']
+    assert source.requests[-1][1]['Range'] == 'bytes=10000-'
+    assert not os.path.exists(path + '.part')
+
+def test_changed_source_restarts_download(source, tmp_path):
+    source.files['/wine.csv'] = csv_body(5000)
+    url = source.url + '/wine.csv'
+    source.drop_after = 10_000
+    with pytest.raises(urllib.error.ContentTooShortError):
+        fetch(url, str(tmp_path))
+
+    # If-Range no longer matches, so the server sends the whole new file
+    source.files['/wine.csv'] = csv_body(4000, shift = 7)
+    assert read(fetch(url, str(tmp_path))) == source.files['/wine.csv']
+
+def test_unreachable_uses_cache(source, tmp_path):
+    source.files['/wine.csv'] = csv_body(10)
+    url = source.url + '/wine.csv'
+    path = fetch(url, str(tmp_path))
+    source.shutdown()
+    source.server_close()
+    assert fetch(url, str(tmp_path), timeout = 1) == path
+    with pytest.raises(urllib.error.URLError):
+        fetch(source.url + '/other.csv', str(tmp_path), timeout = 1)
+
+def test_fetch_all_concurrent(source, tmp_path):
+    names = [f'/part{i}.csv' for i in range(6)]
+    for i, name in enumerate(names):
+        source.files[name] = csv_body(50, shift = i)
+    source.delay = 0.2
+    local = str(tmp_path / 'local.csv')
+    paths = [source.url + name for name in names] + [local, source.url + names[0]]
+
+    start = time.perf_counter()
+    fetched = fetch_all(paths, str(tmp_path / 'cache'), max_concurrency = 3)
+    elapsed = time.perf_counter() - start
+
+    assert [read(path) for path in fetched[:6]] == [source.files[name] for name in names]
+    assert fetched[6] == local and fetched[7] == fetched[0]
+    # Each URL is requested once, at most three at a time
+    assert len(source.requests) == 6 and source.max_in_flight == 3
+    assert elapsed < 6 * source.delay
+
+def test_read_csv_main(source, tmp_path):
+    source.files['/red.csv'] = csv_body(30)
+    source.files['/white.csv'] = csv_body(20, shift = 100)
+    urls = [source.url + '/red.csv', source.url + '/white.csv']
+    path_save = str(tmp_path / 'raw.feather')
+    expected = pd.concat([pd.read_csv(url) for url in urls], ignore_index = True)
+    n_requests = len(source.requests)
+
+    args = [*urls, path_save, '--delim', ',', '--cache-dir', str(tmp_path / 'cache')]
+    main(args, standalone_mode = False)
+    pd.testing.assert_frame_equal(pd.read_feather(path_save), expected)
+    main(args + ['--chunksize', '7'], standalone_mode = False)
+    pd.testing.assert_frame_equal(pd.read_feather(path_save), expected, check_dtype = False)
+
+    # The second run only revalidated the cached copies
+    assert len(source.requests) == n_requests + 4
+    assert all('If-None-Match' in headers for _, headers in source.requests[-2:])
@@ -0,0 +1,62 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.frame_io import frame_format, iter_frame_chunks, read_frame, write_frame, write_frame_chunks
+
+df = pd.DataFrame({
+    'alcohol': [9.4, 9.8, 11.2, 10.5],
+    'pH': [3.51, 3.2, 3.16, 3.3],
+    'quality': [5, 5, 7, 6],
+    'quality_binary': [False, False, True, False],
+})
+
+def test_frame_format():
+    assert frame_format('data/train_data.feather') == 'feather'
+    assert frame_format('data/train_data.PARQUET') == 'parquet'
+    assert frame_format('https://example.com/winequality-red.csv') == 'csv'
+
+@pytest.mark.parametrize('suffix', ['.csv', '.feather', '.parquet'])
+def test_round_trip(tmp_path, suffix):
+    path = str(tmp_path / ('data' + suffix))
+    write_frame(df, path)
+    tm.assert_frame_equal(read_frame(path), df)
+
+@pytest.mark.parametrize('suffix', ['.csv', '.feather', '.parquet'])
+def test_column_projection(tmp_path, suffix):
+    path = str(tmp_path / ('data' + suffix))
+    write_frame(df, path)
+    tm.assert_frame_equal(read_frame(path, columns = ['alcohol', 'quality_binary']),
+                          df[['alcohol', 'quality_binary']])
+
+def test_feather_is_memory_mapped(tmp_path):
+    path = str(tmp_path / 'data.feather')
+    write_frame(df, path)
+    alcohol = read_frame(path, columns = ['alcohol'])['alcohol'].to_numpy()
+
+    # Zero-copy views of the mapped file are read-only
+    assert not alcohol.flags.writeable
+    np.testing.assert_array_equal(alcohol, df['alcohol'].to_numpy())
+
+@pytest.mark.parametrize('suffix', ['.csv', '.feather', '.parquet'])
+def test_write_chunks(tmp_path, suffix):
+    path = str(tmp_path / ('data' + suffix))
+    n_rows = write_frame_chunks([df.iloc[:3], df.iloc[3:]], path)
+
+    assert n_rows == len(df)
+    tm.assert_frame_equal(read_frame(path), df)
+
+@pytest.mark.parametrize('suffix', ['.csv', '.parquet'])
+def test_directory_of_parts(tmp_path, suffix):
+    os.makedirs(tmp_path / 'parts')
+    write_frame(df.iloc[2:], str(tmp_path / 'parts' / ('part-00001' + suffix)))
+    write_frame(df.iloc[:2], str(tmp_path / 'parts' / ('part-00000' + suffix)))
+
+    tm.assert_frame_equal(read_frame(str(tmp_path / 'parts')), df)
+    chunks = list(iter_frame_chunks(str(tmp_path / 'parts'), chunksize = 3))
+    assert [len(chunk) for chunk in chunks] == [2, 2]
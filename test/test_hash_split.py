@@ -0,0 +1,98 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+import pytest
+from click.testing import CliRunner
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.frame_io import read_frame, write_frame
+from src.hash_split import SplitBalance, hash_split_chunks, hash_test_mask, main, row_hashes
+from src.read_csv import FEATURE_DTYPES
+
+feature_columns = list(FEATURE_DTYPES)
+rng = np.random.default_rng(22)
+df = pd.DataFrame(np.round(rng.uniform(0.1, 15, size = (20_000, len(feature_columns))), 3), columns = feature_columns)
+df['quality'] = rng.integers(3, 9, size = 20_000)
+df['quality_binary'] = df['quality'] >= 7
+
+def test_row_hashes():
+    hashes = row_hashes(df)
+    # Content only: the same rows hash alike in any order, chunk or float width
+    shuffled = df.sample(frac = 1, random_state = 0)
+    np.testing.assert_array_equal(row_hashes(shuffled), hashes[shuffled.index])
+    np.testing.assert_array_equal(row_hashes(df.iloc[5000:]), hashes[5000:])
+    np.testing.assert_array_equal(row_hashes(df.astype({col: 'float32' for col in feature_columns})), hashes)
+    assert len(np.unique(hashes)) == len(df)
+    assert not np.array_equal(row_hashes(df, seed = 1), hashes)
+
+    signed = pd.DataFrame({'a': [0.0, -0.0, np.nan, -np.nan]})
+    assert len(np.unique(row_hashes(signed))) == 2
+
+def test_hash_test_mask_is_stable_and_stratified():
+    test = hash_test_mask(df, test_size = 0.2)
+    # Each class gets about test_size of its rows
+    for value in [False, True]:
+        in_class = df['quality_binary'] == value
+        assert test[in_class].mean() == pytest.approx(0.2, abs = 0.02)
+
+    # Appending rows never moves the existing ones
+    appended = pd.concat([df, df.sample(1000, random_state = 1).assign(alcohol = 99.0)], ignore_index = True)
+    np.testing.assert_array_equal(hash_test_mask(appended)[:len(df)], test)
+
+    # Duplicates land on the same side
+    dup = pd.concat([df.iloc[:100], df.iloc[:100]], ignore_index = True)
+    np.testing.assert_array_equal(hash_test_mask(dup)[:100], hash_test_mask(dup)[100:])
+
+    with pytest.raises(ValueError):
+        hash_test_mask(df, test_size = 1.5)
+
+def test_split_balance():
+    test = hash_test_mask(df)
+    balance = SplitBalance().update(df['quality_binary'][:7000], test[:7000])
+    balance.merge(SplitBalance().update(df['quality_binary'][7000:], test[7000:]))
+    report = balance.report()
+
+    assert list(report['class']) == [False, True, 'all']
+    assert list(report['train']) == [int(((df['quality_binary'] == v) & ~test).sum()) for v in [False, True]] + [
+        int((~test).sum())]
+    assert report['test_fraction'].iloc[-1] == pytest.approx(test.mean())
+    assert report['train_share'].iloc[:2].sum() == pytest.approx(1)
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_hash_split_chunks(tmp_path, n_jobs):
+    chunks = [df.iloc[start:start + 6000] for start in range(0, len(df), 6000)]
+    balance = hash_split_chunks(chunks, str(tmp_path), 'parquet', n_jobs = n_jobs)
+
+    assert sorted(os.listdir(tmp_path / 'train_data')) == [f'part-{i:05d}.parquet' for i in range(4)]
+    test = hash_test_mask(df)
+    # Same assignment as on the whole frame, in input order
+    tm.assert_frame_equal(read_frame(str(tmp_path / 'test_data')), df[test].reset_index(drop = True))
+    tm.assert_frame_equal(read_frame(str(tmp_path / 'train_data')), df[~test].reset_index(drop = True))
+    assert balance.report()['test'].iloc[-1] == test.sum()
+
+def test_rerun_replaces_shards(tmp_path):
+    hash_split_chunks([df.iloc[start:start + 1000] for start in range(0, 10_000, 1000)], str(tmp_path), 'csv')
+    # Fewer, larger chunks in another format: no shard of the first run is left
+    hash_split_chunks([df.iloc[start:start + 5000] for start in range(0, 10_000, 5000)], str(tmp_path), 'parquet')
+
+    assert sorted(os.listdir(tmp_path / 'train_data')) == ['part-00000.parquet', 'part-00001.parquet']
+    assert len(read_frame(str(tmp_path / 'train_data'))) + len(read_frame(str(tmp_path / 'test_data'))) == 10_000
+    assert sorted(os.listdir(tmp_path)) == ['test_data', 'train_data']
+
+def test_main(tmp_path):
+    raw = df.drop(columns = 'quality_binary')
+    write_frame(raw.iloc[:12_000], str(tmp_path / 'a.csv'))
+    write_frame(raw.iloc[12_000:], str(tmp_path / 'b.csv'))
+    result = CliRunner().invoke(main, [str(tmp_path / 'a.csv'), str(tmp_path / 'b.csv'), str(tmp_path / 'out'),
+                                       '--chunksize', '5000', '--format', 'feather'])
+    assert result.exit_code == 0, result.output
+
+    # quality_binary is derived from the raw quality
+    train = read_frame(str(tmp_path / 'out' / 'train_data'))
+    assert len(os.listdir(tmp_path / 'out' / 'train_data')) == 5
+    assert len(train) == (~hash_test_mask(df)).sum()
+    report = pd.read_csv(tmp_path / 'out' / 'split_balance.csv')
+    assert report['train'].iloc[-1] == len(train)
@@ -0,0 +1,44 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+# Command line entry points, which must start without loading the scientific stack
+ENTRY_POINTS = ['read_csv', 'data_processing', 'eda', 'analysis', 'tune', 'score', 'serve', 'load_test',
+                'quantile_sketch', 'benchmark', 'instrument', 'pipeline', 'run_all', 'wine_dataset',
+                'incremental', 'hash_split', 'compiled_trees', 'fetch']
+HEAVY_MODULES = ['numpy', 'pandas', 'scipy', 'sklearn', 'pandera', 'matplotlib', 'altair', 'pyarrow', 'joblib']
+
+# Cumulative import time of an entry module; click alone takes a few tens of ms,
+# while the scientific stack takes 0.5 s or more
+IMPORT_BUDGET_S = 0.3
+
+def run_python(*args):
+    env = dict(os.environ, DISABLE_PANDERA_IMPORT_WARNING = 'True')
+    return subprocess.run([sys.executable, *args], cwd = ROOT, env = env, capture_output = True, text = True)
+
+@pytest.mark.parametrize('module', ENTRY_POINTS)
+def test_no_heavy_imports(module):
+    code = (f"import sys, json, src.{module}; "
+            f"print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}} & set({HEAVY_MODULES!r}))))")
+    result = run_python('-c', code)
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout) == []
+
+@pytest.mark.parametrize('module', ENTRY_POINTS)
+def test_import_time_budget(module):
+    result = run_python('-X', 'importtime', '-c', f'import src.{module}')
+    assert result.returncode == 0, result.stderr
+    # Lines look like 'import time:   self [us] | cumulative | module'
+    cumulative = [int(line.split('|')[1]) for line in result.stderr.splitlines()
+                  if re.search(rf'\|\s*src\.{module}$', line)]
+    assert cumulative and cumulative[0] / 1e6 < IMPORT_BUDGET_S
+
+@pytest.mark.parametrize('module', ['read_csv', 'data_processing', 'analysis', 'benchmark'])
+def test_help(module):
+    result = run_python('-m', f'src.{module}', '--help')
+    assert result.returncode == 0 and 'Usage' in result.stdout
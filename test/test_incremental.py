@@ -0,0 +1,145 @@
+import os
+import sys
+import tracemalloc
+import numpy as np
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.frame_io import write_frame
+from src.incremental import evaluate_incremental, main, train_incremental
+from src.incremental_models import ChunkTreeEnsemble, StreamingBinaryMetrics, build_incremental_models
+from src.model_store import load_models
+from src.read_csv import FEATURE_DTYPES
+
+feature_columns = list(FEATURE_DTYPES)
+
+def make_data(n_rows, seed = 3):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size = (n_rows, len(feature_columns))), columns = feature_columns)
+    df['quality_binary'] = df['alcohol'] + 0.5 * df['sulphates'] + rng.normal(scale = 0.5, size = n_rows) > 1
+    return df
+
+@pytest.fixture
+def data_files(tmp_path):
+    train_path = str(tmp_path / 'train.feather')
+    test_path = str(tmp_path / 'test.csv')
+    write_frame(make_data(2000), train_path)
+    make_data(500, seed = 4).to_csv(test_path, index = False)
+    return train_path, test_path
+
+def test_chunk_tree_ensemble():
+    df = make_data(1000)
+    X, y = df[feature_columns].to_numpy(), df['quality_binary'].to_numpy()
+    model = ChunkTreeEnsemble(max_estimators = 3)
+    for start in range(0, 1000, 100):
+        model.partial_fit(X[start:start + 100], y[start:start + 100], classes = np.array([False, True]))
+    # The reservoir keeps the number of trees bounded
+    assert len(model.estimators_) == 3
+    assert model.n_chunks_ == 10
+
+    proba = model.predict_proba(X)
+    np.testing.assert_allclose(proba.sum(axis = 1), 1)
+    expected = np.mean([tree.predict_proba(X) for tree in model.estimators_], axis = 0)
+    np.testing.assert_allclose(proba, expected)
+    np.testing.assert_array_equal(model.predict(X), proba[:, 1] > 0.5)
+
+def test_chunk_with_one_class():
+    X = np.arange(20, dtype = float).reshape(10, 2)
+    model = ChunkTreeEnsemble().partial_fit(X, np.zeros(10, dtype = bool), classes = np.array([False, True]))
+    model.partial_fit(X, np.arange(10) >= 5)
+    proba = model.predict_proba(X)
+    assert proba.shape == (10, 2)
+    np.testing.assert_allclose(proba[:, 1], np.where(np.arange(10) >= 5, 0.5, 0))
+
+def test_build_incremental_models():
+    models = build_incremental_models({'Chunk Tree Ensemble': {'max_depth': 3}})
+    assert list(models) == ['SGD Logistic Regression', 'Gaussian Naive Bayes', 'Chunk Tree Ensemble']
+    assert models['Chunk Tree Ensemble'].max_depth == 3
+    with pytest.raises(KeyError):
+        build_incremental_models({'Random Forest': {}})
+
+def test_streaming_binary_metrics():
+    rng = np.random.default_rng(0)
+    y_true = rng.random(5000) < 0.3
+    y_score = np.clip(0.3 * y_true + rng.random(5000) * 0.7, 0, 1)
+    y_pred = y_score > 0.5
+
+    metrics = StreamingBinaryMetrics()
+    for start in range(0, 5000, 700):
+        metrics.update(y_true[start:start + 700], y_score[start:start + 700], y_pred[start:start + 700])
+    result = metrics.result()
+    assert result['n_rows'] == 5000
+    assert result['accuracy'] == pytest.approx(accuracy_score(y_true, y_pred))
+    assert result['precision'] == pytest.approx(precision_score(y_true, y_pred))
+    assert result['recall'] == pytest.approx(recall_score(y_true, y_pred))
+    assert result['f1'] == pytest.approx(f1_score(y_true, y_pred))
+    # Below the sketches' capacity the AUC is exact, ties included
+    assert result['roc_auc'] == pytest.approx(roc_auc_score(y_true, y_score))
+    rounded = StreamingBinaryMetrics().update(y_true, np.round(y_score, 2), y_pred)
+    assert rounded.roc_auc() == pytest.approx(roc_auc_score(y_true, np.round(y_score, 2)))
+
+    # Compacted sketches stay within about eps, even for scores saturated near 0 and 1
+    y_true = rng.random(200_000) < 0.3
+    y_score = 1 / (1 + np.exp(-40 * (y_true + rng.normal(size = 200_000) - 0.5)))
+    sketched = StreamingBinaryMetrics(eps = 0.01).update(y_true, y_score, y_score > 0.5)
+    assert sketched.pos_scores.rank_error_bound() > 0
+    assert sketched.roc_auc() == pytest.approx(roc_auc_score(y_true, y_score), abs = 0.01)
+
+    with pytest.raises(ValueError):
+        one_class = StreamingBinaryMetrics()
+        one_class.update(np.ones(5, dtype = bool), np.linspace(0, 1, 5), np.ones(5, dtype = bool))
+        one_class.roc_auc()
+
+def test_train_evaluate_incremental(data_files):
+    train_path, test_path = data_files
+    scaler, models, fit_times = train_incremental(build_incremental_models(), train_path, feature_columns,
+                                                  chunksize = 300, epochs = 2)
+    train = make_data(2000)
+    np.testing.assert_allclose(scaler.mean_, train[feature_columns].mean(), atol = 1e-6)
+    assert set(fit_times) == set(models)
+    assert models['Chunk Tree Ensemble'].n_chunks_ == 14
+
+    results = evaluate_incremental(models, scaler, test_path, feature_columns, chunksize = 120)
+    test = make_data(500, seed = 4)
+    for name, model in models.items():
+        assert results[name]['n_rows'] == 500
+        X = scaler.transform(test[feature_columns].astype(np.float32))
+        assert results[name]['accuracy'] == pytest.approx(accuracy_score(test['quality_binary'], model.predict(X)))
+        assert results[name]['roc_auc'] == pytest.approx(
+            roc_auc_score(test['quality_binary'], model.predict_proba(X)[:, 1]))
+        # The synthetic target is easy to learn
+        assert results[name]['roc_auc'] > 0.8
+
+def test_memory_independent_of_rows(tmp_path):
+    def peak(n_rows):
+        path = str(tmp_path / f'train_{n_rows}.feather')
+        write_frame(make_data(n_rows), path)
+        tracemalloc.start()
+        train_incremental(build_incremental_models(), path, feature_columns, chunksize = 2000)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+
+    # Four times the data, about the same peak: only one chunk is in memory at a time
+    assert peak(32000) < 1.5 * peak(8000)
+
+def test_main(data_files, tmp_path):
+    train_path, test_path = data_files
+    model_dir = str(tmp_path / 'models')
+    result = CliRunner().invoke(main, [train_path, test_path, str(tmp_path / 'results'),
+                                       '--chunksize', '500', '--model-dir', model_dir])
+    assert result.exit_code == 0, result.output
+
+    metrics = pd.read_csv(tmp_path / 'results' / 'incremental_performance_metrics.csv')
+    assert list(metrics['Model']) == ['SGD Logistic Regression', 'Gaussian Naive Bayes', 'Chunk Tree Ensemble']
+    assert list(metrics.columns) == ['Model', 'Test Accuracy', 'Precision', 'Recall', 'F1 Score', 'ROC AUC',
+                                     'Fit Wall Time (s)']
+
+    # The saved models load like the analysis models
+    scaler, models, columns = load_models(model_dir)
+    assert columns == feature_columns
+    assert isinstance(models['Chunk Tree Ensemble'], ChunkTreeEnsemble)
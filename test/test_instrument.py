@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+import click
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import instrument
+from src.instrument import run_trace, stage, traced, traced_command
+
+@traced()
+def allocate(n_bytes):
+    return np.ones(n_bytes, dtype = np.uint8).sum()
+
+def test_inactive_is_noop():
+    with stage('nothing') as span:
+        assert span is None
+    assert allocate(10) == 10
+    assert instrument._TRACER is None
+
+def test_spans_nest_and_record_memory(tmp_path):
+    with run_trace('run', str(tmp_path)):
+        with stage('outer', rows = 3):
+            allocate(8 * 2 ** 20)
+        with stage('small'):
+            pass
+
+    trace = json.loads((tmp_path / 'run.trace.json').read_text())
+    spans = {span['name']: span for span in trace['spans']}
+    assert [span['name'] for span in trace['spans']] == ['run', 'outer', 'allocate', 'small']
+    assert spans['allocate']['parent'] == 'outer' and spans['allocate']['depth'] == 2
+    assert spans['outer']['rows'] == 3
+
+    # The 8 MB array counts towards the span that allocated it and all its parents
+    for name in ('allocate', 'outer', 'run'):
+        assert spans[name]['tracemalloc_peak_mb'] >= 8
+    assert spans['small']['tracemalloc_peak_mb'] < 1
+    assert spans['run']['wall_s'] >= spans['outer']['wall_s'] >= spans['allocate']['wall_s']
+    assert instrument._TRACER is None
+
+def test_cprofile_dump(tmp_path):
+    with run_trace('run', str(tmp_path), profile = 'cprofile'):
+        allocate(10)
+    assert (tmp_path / 'run.prof').exists()
+    with pytest.raises(ValueError):
+        with run_trace('run', str(tmp_path), profile = 'perf'):
+            pass
+
+def test_traced_command(tmp_path):
+    @click.command()
+    @click.argument('n', type = int)
+    @traced_command('stage')
+    def main(n):
+        click.echo(allocate(n))
+
+    result = CliRunner().invoke(main, ['5'], env = {'TRACE_DIR': str(tmp_path)})
+    assert result.exit_code == 0 and result.output == '5\n'
+    trace = json.loads((tmp_path / 'stage.trace.json').read_text())
+    assert [span['name'] for span in trace['spans']] == ['stage', 'allocate']
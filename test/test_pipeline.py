@@ -0,0 +1,183 @@
+import json
+import os
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.pipeline import Fingerprints, Pipeline, Stage, default_stages, module_sources
+
+# Each stage copies its input to its output (upper-cased), optionally sleeping,
+# and appends its name to a log so the tests can see which stages ran
+STAGE_SCRIPT = """
+import sys, time
+src, dst, name, log, delay = sys.argv[1:]
+time.sleep(float(delay))
+with open(src) as f:
+    text = f.read()
+with open(dst, 'w') as f:
+    f.write(text.upper() if name != 'same' else 'constant')
+with open(log, 'a') as f:
+    f.write(name + '\\n')
+"""
+
+def make_stages(tmp_path, delay = 0):
+    script = tmp_path / 'stage.py'
+    if not script.exists():
+        script.write_text(STAGE_SCRIPT)
+    log = str(tmp_path / 'log.txt')
+
+    def stage(name, src, dst, deps = ()):
+        return Stage(name, [sys.executable, str(script), str(tmp_path / src), str(tmp_path / dst), name, log,
+                            str(delay)],
+                     inputs = [str(tmp_path / src)], outputs = [str(tmp_path / dst)], code = [str(script)],
+                     deps = deps)
+
+    return [stage('same', 'raw.txt', 'a.txt'), stage('process', 'a.txt', 'b.txt', ['same']),
+            stage('left', 'b.txt', 'out/c.txt', ['process']), stage('right', 'b.txt', 'out/d.txt', ['process'])]
+
+def ran(tmp_path):
+    path = tmp_path / 'log.txt'
+    names = path.read_text().split() if path.exists() else []
+    path.write_text('')
+    return sorted(names)
+
+@pytest.fixture
+def workdir(tmp_path):
+    (tmp_path / 'raw.txt').write_text('raw')
+    return tmp_path
+
+def run(tmp_path, **kwargs):
+    pipeline = Pipeline(make_stages(tmp_path), str(tmp_path / 'state.json'))
+    return pipeline.run(echo = lambda line: None, **kwargs)
+
+def test_skips_unchanged_stages(workdir):
+    assert set(run(workdir).values()) == {'ran'}
+    assert ran(workdir) == ['left', 'process', 'right', 'same']
+
+    assert set(run(workdir).values()) == {'skipped'}
+    assert ran(workdir) == []
+
+def test_touch_is_not_a_change(workdir):
+    run(workdir)
+    ran(workdir)
+    os.utime(workdir / 'raw.txt', ns = (0, 0))
+    assert set(run(workdir).values()) == {'skipped'}
+
+def test_identical_rebuild_stops_propagation(workdir):
+    run(workdir)
+    ran(workdir)
+    # 'same' writes a constant, so a changed raw file reruns it but nothing after it
+    (workdir / 'raw.txt').write_text('new raw data')
+    status = run(workdir)
+    assert status == {'same': 'unchanged', 'process': 'skipped', 'left': 'skipped', 'right': 'skipped'}
+    assert ran(workdir) == ['same']
+
+def test_changed_output_reruns_stage(workdir):
+    run(workdir)
+    ran(workdir)
+    (workdir / 'out' / 'c.txt').write_text('edited')
+    run(workdir)
+    assert ran(workdir) == ['left']
+
+def test_changed_code_reruns(workdir):
+    run(workdir)
+    ran(workdir)
+    (workdir / 'stage.py').write_text(STAGE_SCRIPT + '\n# changed\n')
+    run(workdir)
+    assert ran(workdir) == ['left', 'process', 'right', 'same']
+
+def test_targets_force_and_dry_run(workdir):
+    assert run(workdir, targets = ['left']) == {'same': 'ran', 'process': 'ran', 'left': 'ran'}
+    ran(workdir)
+
+    status = run(workdir, dry_run = True)
+    assert status == {'same': 'skipped', 'process': 'skipped', 'left': 'skipped', 'right': 'would run'}
+    assert run(workdir, force = ['process'], dry_run = True)['left'] == 'would run'
+    assert ran(workdir) == []
+
+    run(workdir, force = ['same'])
+    assert ran(workdir) == ['right', 'same']
+    with pytest.raises(KeyError):
+        run(workdir, targets = ['missing'])
+
+def test_independent_stages_run_in_parallel(workdir):
+    # Only the two branches after 'process' take a second each
+    stages = make_stages(workdir, delay = 1)
+    for stage in stages[:2]:
+        stage.command[-1] = '0'
+    pipeline = Pipeline(stages, str(workdir / 'state.json'))
+    start = time.perf_counter()
+    status = pipeline.run(echo = lambda line: None)
+    assert set(status.values()) == {'ran'}
+    assert time.perf_counter() - start < 1.9
+
+def test_failure_is_reported_and_not_recorded(workdir):
+    stages = make_stages(workdir)
+    stages[1].command[2] = str(workdir / 'missing.txt')
+    pipeline = Pipeline(stages, str(workdir / 'state.json'))
+    with pytest.raises(RuntimeError, match = 'process'):
+        pipeline.run(echo = lambda line: None)
+    state = json.loads((workdir / 'state.json').read_text())
+    assert list(state['stages']) == ['same']
+
+def test_fingerprints_cache(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(b'x' * 10)
+    fingerprints = Fingerprints()
+    digest = fingerprints.file(str(path))
+    assert Fingerprints(fingerprints.cache).file(str(path)) == digest
+    assert fingerprints.file(str(tmp_path / 'missing')) is None
+
+def test_default_stages_follow_imports():
+    sources = {os.path.basename(path) for path in module_sources('src.analysis')}
+    assert {'analysis.py', 'train_evaluate_models.py', 'binary_metrics.py', 'plot_roc.py'} <= sources
+    stages = default_stages('parquet')
+    assert [stage.name for stage in stages] == ['read_csv', 'data_processing', 'eda', 'analysis']
+    assert stages[2].deps == stages[3].deps == ['data_processing']
+
+def test_remote_source_change_reruns_downstream(tmp_path, monkeypatch):
+    # A static server with Last-Modified / If-Modified-Since, like the raw data's host
+    served = tmp_path / 'served'
+    served.mkdir()
+    source = served / 'wine.csv'
+    source.write_text('a,b\n1,2\n')
+    handler = partial(SimpleHTTPRequestHandler, directory = str(served))
+    handler.log_message = lambda *args: None
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+
+    root = os.path.join(os.path.dirname(__file__), '..')
+    monkeypatch.setenv('PYTHONPATH', os.path.abspath(root))
+    monkeypatch.chdir(tmp_path)
+    url = f'http://127.0.0.1:{server.server_address[1]}/wine.csv'
+    read_csv = default_stages('csv', url)[0]
+    assert read_csv.always and read_csv.inputs == []
+    (tmp_path / 'stage.py').write_text(STAGE_SCRIPT)
+    below = Stage('process', [sys.executable, 'stage.py', 'data/raw/raw_data.csv', 'b.txt', 'process',
+                              'log.txt', '0'],
+                  inputs = ['data/raw/raw_data.csv'], outputs = ['b.txt'], deps = ['read_csv'])
+
+    def run_remote():
+        return Pipeline([read_csv, below], 'state.json').run(echo = lambda line: None)
+
+    try:
+        assert run_remote() == {'read_csv': 'ran', 'process': 'ran'}
+        # Unchanged source: read_csv only revalidates, and nothing below reruns
+        assert run_remote() == {'read_csv': 'unchanged', 'process': 'skipped'}
+
+        source.write_text('a,b\n3,4\n')
+        os.utime(source, (time.time() + 10, time.time() + 10))
+        assert run_remote() == {'read_csv': 'ran', 'process': 'ran'}
+        assert (tmp_path / 'b.txt').read_text() == 'A,B\n3,4\n'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_local_source_is_an_input(tmp_path):
+    stage = default_stages('csv', str(tmp_path / 'raw.csv'))[0]
+    assert not stage.always and stage.inputs == [str(tmp_path / 'raw.csv')]
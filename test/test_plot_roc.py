@@ -3,6 +3,7 @@ import matplotlib.figure
 import matplotlib.axes
 import pytest
 import sys
+import numpy as np
 from sklearn.datasets import make_classification
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
@@ -42,3 +43,26 @@ def test_multiple_lines(tmp_path):
     fig, ax = plot_roc_curves(models, X_test, y_test, tmp_path)
 
     assert len(ax.lines) == 3 # 2 models + diagonal line
+
+def test_precomputed_curves_skip_inference(tmp_path):
+    class NoPredict:
+        def predict_proba(self, X):
+            raise AssertionError('predict_proba should not be called')
+
+    curves = {'Cached': {'fpr': [0.0, 0.5, 1.0], 'tpr': [0.0, 0.8, 1.0], 'roc_auc': 0.65}}
+    fig, ax = plot_roc_curves({'Cached': NoPredict()}, X_test, y_test, tmp_path, curves = curves)
+
+    assert ax.lines[0].get_label() == 'Cached (AUC = 0.650)'
+
+def test_vector_output_and_dpi(tmp_path):
+    plot_roc_curves(trained_models, X_test, y_test, tmp_path, filename = 'roc_curves.svg')
+    assert (tmp_path / 'roc_curves.svg').read_text().lstrip().startswith('<?xml')
+
+    plot_roc_curves(trained_models, X_test, y_test, tmp_path, filename = 'low.png', dpi = 50)
+    plot_roc_curves(trained_models, X_test, y_test, tmp_path, filename = 'high.png', dpi = 100)
+    assert os.path.getsize(tmp_path / 'low.png') < os.path.getsize(tmp_path / 'high.png')
+
+def test_max_points(tmp_path):
+    curves = {'Cached': {'fpr': np.linspace(0, 1, 5000), 'tpr': np.linspace(0, 1, 5000) ** 0.5, 'roc_auc': 0.6}}
+    fig, ax = plot_roc_curves({'Cached': model}, X_test, y_test, tmp_path, curves = curves, max_points = 100)
+    assert len(ax.lines[0].get_xdata()) <= 101
@@ -0,0 +1,94 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.quantile_sketch import (
+    QuantileSketch,
+    build_sketches,
+    sketch_bounds,
+    sketch_chunks,
+    sketch_report,
+    streaming_outlier_failure_cases,
+)
+from src.read_csv import FEATURE_DTYPES
+from src.validation_engine import iqr_bounds, outlier_failure_cases
+
+rng = np.random.default_rng(14)
+values = rng.lognormal(size = 200_000)
+sorted_values = np.sort(values)
+
+def rank_error(sketch, qs):
+    ranks = np.searchsorted(sorted_values, sketch.quantile(qs)) / len(sorted_values)
+    return np.abs(ranks - qs).max()
+
+@pytest.mark.parametrize('eps', [0.05, 0.01])
+def test_error_within_eps(eps):
+    sketch = QuantileSketch(eps, seed = 14)
+    for chunk in np.array_split(values, 50):
+        sketch.update(chunk)
+
+    qs = np.linspace(0.01, 0.99, 99)
+    assert sketch.n == len(values)
+    assert rank_error(sketch, qs) < eps
+    assert rank_error(sketch, qs) <= sketch.rank_error_bound()
+
+def test_memory_bounded():
+    sketch = QuantileSketch(0.05, seed = 14).update(values)
+    assert sum(len(level) for level in sketch.levels) < 4 * sketch.k
+
+def test_merge():
+    parts = [QuantileSketch(0.01, seed = i).update(chunk) for i, chunk in enumerate(np.array_split(values, 4))]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+
+    assert merged.n == len(values)
+    assert rank_error(merged, np.array([0.25, 0.5, 0.75])) < 0.01
+
+def test_small_input_is_exact():
+    sketch = QuantileSketch(0.01).update([3.0, 1.0, np.nan, 2.0, 4.0])
+    assert sketch.n == 4
+    np.testing.assert_array_equal(sketch.quantile([0.25, 0.5, 1.0]), [1.0, 2.0, 4.0])
+
+def test_invalid_eps():
+    with pytest.raises(ValueError, match = 'eps must be between 0 and 1'):
+        QuantileSketch(0)
+
+def test_streaming_outliers_match_exact():
+    df = pd.DataFrame({'a': rng.normal(size = 1000), 'b': rng.normal(size = 1000)})
+    df.loc[[10, 500], 'a'] = [50.0, -50.0]
+    df.loc[999, 'b'] = 40.0
+    chunks = [df.iloc[i:i + 100] for i in range(0, 1000, 100)]
+
+    sketches = build_sketches(chunks, ['a', 'b'], eps = 0.01, n_jobs = 2)
+    cases = streaming_outlier_failure_cases(chunks, ['a', 'b'], sketch_bounds(sketches, ['a', 'b']))
+    exact = outlier_failure_cases(df, ['a', 'b'])
+
+    assert list(cases['index']) == list(exact['index']) == [10, 500, 999]
+    assert list(cases['column']) == list(exact['column'])
+
+def test_sketch_chunks_passes_through():
+    df = pd.DataFrame({'a': np.arange(10.0)})
+    sketches = {'a': QuantileSketch(0.01)}
+    out = pd.concat(sketch_chunks([df.iloc[:5], df.iloc[5:]], sketches))
+
+    assert out.equals(df)
+    assert sketches['a'].n == 10
+    lower, upper = sketch_bounds(sketches, ['a'], iqr_mult = 0)
+    exact_lower, exact_upper = iqr_bounds(df[['a']].to_numpy(), iqr_mult = 0)
+    assert abs(lower[0] - exact_lower[0]) <= 1 and abs(upper[0] - exact_upper[0]) <= 1
+
+def test_report_compares_same_dtype(tmp_path):
+    # One-decimal values with many ties, most of which float32 cannot represent exactly
+    df = pd.DataFrame(np.round(rng.normal(7, 1.5, size = (3000, len(FEATURE_DTYPES))), 1),
+                      columns = list(FEATURE_DTYPES))
+    df['quality'] = 5
+    df.to_csv(tmp_path / 'raw.csv', index = False)
+
+    report, sketches = sketch_report(str(tmp_path / 'raw.csv'), eps = 0.01, chunksize = 500)
+    assert list(report.index) == list(FEATURE_DTYPES)
+    assert (report['max rank error'] <= max(s.rank_error_bound() for s in sketches.values())).all()
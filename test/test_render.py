@@ -0,0 +1,79 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+import altair as alt
+from scipy.stats import rankdata
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.eda import eda_report
+from src.read_csv import FEATURE_DTYPES
+from src.render import average_ranks, corr_table, histogram_table, nice_bins, render_charts
+
+feature_columns = list(FEATURE_DTYPES)
+rng = np.random.default_rng(3)
+df = pd.DataFrame(np.round(rng.uniform(0.1, 1.4, size = (400, len(feature_columns))), 2), columns = feature_columns)
+df['alcohol'] = rng.uniform(8.4, 14.0, size = 400)
+df['quality_binary'] = df['alcohol'] + rng.normal(size = 400) > 11.5
+
+@pytest.mark.parametrize('lo, hi, expected', [
+    (8.4, 14.0, (8.0, 0.5, 12)),
+    (0.33, 1.22, (0.3, 0.05, 19)),
+    (0.12, 1.33, (0.1, 0.05, 25)),
+    (0, 100, (0, 5, 20)),
+    (3, 3, (3, 0.2, 1)),
+])
+def test_nice_bins(lo, hi, expected):
+    start, step, n_bins = nice_bins(lo, hi)
+    assert start == pytest.approx(expected[0])
+    assert step == pytest.approx(expected[1])
+    assert n_bins == expected[2]
+    assert start <= lo and start + n_bins * step >= hi - 1e-9
+
+def test_histogram_table():
+    table = histogram_table(df, ['alcohol', 'sulphates'], 'quality_binary')
+    assert list(table.columns) == ['feature', 'quality_binary', 'bin_start', 'bin_end', 'count']
+    for feature, rows in table.groupby('feature'):
+        for label, group in rows.groupby('quality_binary'):
+            values = df.loc[df['quality_binary'] == label, feature].to_numpy()
+            assert group['count'].sum() == values.size
+            np.testing.assert_allclose(group['bin_end'] - group['bin_start'], group['bin_end'].iloc[0] -
+                                       group['bin_start'].iloc[0])
+            if feature == 'alcohol':
+                # Continuous values never sit on an edge, where Vega's rounding may differ from NumPy's
+                edges = np.r_[group['bin_start'].to_numpy(), group['bin_end'].to_numpy()[-1]]
+                np.testing.assert_array_equal(group['count'], np.histogram(values, edges)[0])
+
+def test_corr_table_matches_pandas():
+    columns = feature_columns + ['quality_binary']
+    expected = df[columns].corr('spearman').stack().reset_index()
+    expected.columns = ['feature_1', 'feature_2', 'correlation']
+    expected.loc[expected['correlation'] == 1, 'correlation'] = 0
+    table = corr_table(df, columns)
+    pd.testing.assert_frame_equal(table[['feature_1', 'feature_2']], expected[['feature_1', 'feature_2']])
+    np.testing.assert_allclose(table['correlation'], expected['correlation'], atol = 1e-12)
+
+    pearson = corr_table(df, ['alcohol', 'sulphates'], method = 'pearson')
+    assert pearson['correlation'].iloc[1] == pytest.approx(df['alcohol'].corr(df['sulphates']))
+
+def test_average_ranks_with_ties():
+    values = np.round(rng.random((300, 4)), 1)
+    np.testing.assert_array_equal(average_ranks(values), rankdata(values, axis = 0))
+
+@pytest.mark.parametrize('draft, n_jobs', [(False, 1), (True, 2)])
+def test_render_charts(tmp_path, draft, n_jobs):
+    chart = alt.Chart(pd.DataFrame({'x': [1, 2], 'y': [3, 4]})).mark_bar().encode(x = 'x:O', y = 'y:Q')
+    paths = render_charts({'a': chart, 'b': chart.mark_point()}, str(tmp_path), draft = draft, n_jobs = n_jobs)
+    extension = '.svg' if draft else '.png'
+    assert paths == [str(tmp_path / ('a' + extension)), str(tmp_path / ('b' + extension))]
+    with open(paths[0], 'rb') as f:
+        head = f.read(8)
+    assert head.startswith(b'<svg') if draft else head == b'\x89PNG\r\n\x1a\n'
+
+def test_eda_report_draft(tmp_path):
+    eda_report(df, feature_columns, str(tmp_path), draft = True, n_jobs = 1)
+    assert sorted(os.listdir(tmp_path)) == ['eda_heatmap.svg', 'eda_hists.svg', 'summary_table.csv']
+    svg = (tmp_path / 'eda_hists.svg').read_text()
+    assert 'alcohol (binned)' in svg and 'volatile acidity (binned)' in svg
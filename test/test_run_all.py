@@ -0,0 +1,64 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import analysis, data_processing, eda
+from src.frame_io import read_frame, write_frame
+from src.read_csv import FEATURE_DTYPES
+from src.run_all import run_all
+
+feature_columns = list(FEATURE_DTYPES)
+
+@pytest.fixture
+def raw_path(tmp_path):
+    rng = np.random.default_rng(0)
+    raw = pd.DataFrame(rng.uniform(0.5, 2, size = (300, len(feature_columns))), columns = feature_columns)
+    raw['alcohol'] += rng.integers(0, 2, size = 300)
+    raw['quality'] = np.where(raw['alcohol'] > 1.8, 7, 5) + rng.integers(0, 2, size = 300)
+    path = str(tmp_path / 'raw.csv')
+    write_frame(raw, path)
+    return path
+
+def invoke(command, *args):
+    result = CliRunner().invoke(command, [str(arg) for arg in args])
+    assert result.exit_code == 0, result.output
+    return result
+
+def test_run_all_matches_file_based_stages(tmp_path, raw_path):
+    # File based: data_processing -> eda / analysis through feather files
+    processed = tmp_path / 'processed'
+    for path in [processed, tmp_path / 'files' / 'eda', tmp_path / 'files' / 'models']:
+        path.mkdir(parents = True)
+    invoke(data_processing.main, raw_path, processed, '--format', 'feather')
+    invoke(eda.main, processed / 'train_data.feather', tmp_path / 'files' / 'eda')
+    invoke(analysis.main, processed / 'train_data.feather', processed / 'test_data.feather',
+           tmp_path / 'files' / 'models')
+
+    results, train_df, test_df, train, test = run_all(raw_path, str(tmp_path / 'memory'),
+                                                      data_dir = str(tmp_path / 'data'), data_format = 'feather')
+    assert len(train) == len(train_df) and train.X.dtype == 'float64'
+    np.testing.assert_array_equal(test.y, test_df['quality_binary'])
+
+    pd.testing.assert_frame_equal(read_frame(str(processed / 'train_data.feather')), train_df.reset_index(drop = True))
+    pd.testing.assert_frame_equal(read_frame(str(tmp_path / 'data' / 'test_data.feather')),
+                                  test_df.reset_index(drop = True))
+    for name in ['summary_table.csv', 'eda_heatmap.png', 'eda_hists.png']:
+        assert (tmp_path / 'memory' / 'eda' / name).read_bytes() == (tmp_path / 'files' / 'eda' / name).read_bytes()
+
+    # Everything but the timings
+    metric_columns = ['Model', 'Train Accuracy', 'Test Accuracy', 'Precision', 'Recall', 'F1 Score', 'ROC AUC']
+    expected = pd.read_csv(tmp_path / 'files' / 'models' / 'model_performance_metrics.csv')
+    actual = pd.read_csv(tmp_path / 'memory' / 'models' / 'model_performance_metrics.csv')
+    pd.testing.assert_frame_equal(actual[metric_columns], expected[metric_columns])
+    assert [result['Model'] for result in results] == list(expected['Model'])
+    assert (tmp_path / 'memory' / 'models' / 'roc_curves.png').exists()
+
+def test_run_all_keeps_data_in_memory(tmp_path, raw_path):
+    run_all(raw_path, str(tmp_path / 'results'))
+    assert sorted(os.listdir(tmp_path)) == ['raw.csv', 'results']
+    assert sorted(os.listdir(tmp_path / 'results')) == ['eda', 'models']
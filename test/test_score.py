@@ -0,0 +1,77 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.frame_io import iter_frame_chunks, read_frame, write_frame
+from src.model_store import save_models
+from src.parallel import bounded_map
+from src.score import score_file
+
+feature_columns = ['f0', 'f1', 'f2']
+X, y = make_classification(n_samples = 250, n_features = 3, n_informative = 2, n_redundant = 0, random_state = 7)
+X_df = pd.DataFrame(X, columns = feature_columns)
+scaler = StandardScaler().fit(X_df)
+models = {
+    'Logistic Regression': LogisticRegression().fit(scaler.transform(X_df), y),
+    'Decision Tree': DecisionTreeClassifier(max_depth = 3, random_state = 7).fit(scaler.transform(X_df), y),
+}
+
+@pytest.fixture
+def model_dir(tmp_path):
+    path = str(tmp_path / 'models')
+    save_models(scaler, models, feature_columns, path)
+    return path
+
+@pytest.mark.parametrize('suffix', ['.csv', '.feather', '.parquet'])
+def test_iter_frame_chunks(tmp_path, suffix):
+    path = str(tmp_path / ('data' + suffix))
+    write_frame(X_df, path)
+    chunks = list(iter_frame_chunks(path, chunksize = 100, columns = ['f0', 'f2']))
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+    np.testing.assert_allclose(pd.concat(chunks).to_numpy(), X_df[['f0', 'f2']].to_numpy())
+
+def test_bounded_map_keeps_order():
+    assert list(bounded_map(abs, range(-20, 0), n_jobs = 2, max_pending = 3)) == list(range(20, 0, -1))
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+@pytest.mark.parametrize('suffix', ['.csv', '.parquet'])
+def test_score_file_matches_model(tmp_path, model_dir, n_jobs, suffix):
+    path_read = str(tmp_path / 'input.feather')
+    path_save = str(tmp_path / ('scores' + suffix))
+    write_frame(X_df.assign(id = np.arange(len(X_df))), path_read)
+
+    name, n_rows = score_file(path_read, path_save, model_dir, 'Decision Tree', chunksize = 60, n_jobs = n_jobs)
+    scores = read_frame(path_save)
+
+    model = models['Decision Tree']
+    X_scaled = scaler.transform(X_df)
+    assert (name, n_rows) == ('Decision Tree', len(X_df))
+    assert list(scores.columns) == ['probability', 'label']
+    np.testing.assert_allclose(scores['probability'], model.predict_proba(X_scaled)[:, 1])
+    np.testing.assert_array_equal(scores['label'], model.predict(X_scaled))
+
+def test_score_file_include_input(tmp_path, model_dir):
+    path_read = str(tmp_path / 'input.csv')
+    path_save = str(tmp_path / 'scores.csv')
+    write_frame(X_df.assign(id = np.arange(len(X_df))), path_read)
+
+    name, _ = score_file(path_read, path_save, model_dir, chunksize = 100, include_input = True)
+    scores = read_frame(path_save)
+
+    assert name == 'Logistic Regression'
+    assert list(scores.columns) == feature_columns + ['id', 'probability', 'label']
+    np.testing.assert_array_equal(scores['id'], np.arange(len(X_df)))
+
+def test_score_file_unknown_model(tmp_path, model_dir):
+    path_read = str(tmp_path / 'input.csv')
+    write_frame(X_df, path_read)
+    with pytest.raises(KeyError):
+        score_file(path_read, str(tmp_path / 'scores.csv'), model_dir, 'SVM')
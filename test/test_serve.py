@@ -0,0 +1,157 @@
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.model_store import save_models, load_models
+from src.serve import MicroBatcher, PredictionHandler, PredictionServer, make_server
+from src.load_test import run_load_test
+
+feature_columns = ['f0', 'f1', 'f2', 'f3']
+X, y = make_classification(n_samples = 200, n_features = 4, random_state = 14)
+X_df = pd.DataFrame(X, columns = feature_columns)
+scaler = StandardScaler().fit(X_df)
+X_scaled = scaler.transform(X_df)
+models = {
+    'Logistic Regression': LogisticRegression(max_iter = 1000).fit(X_scaled, y),
+    'Decision Tree': DecisionTreeClassifier(max_depth = 3, random_state = 14).fit(X_scaled, y),
+}
+
+@pytest.fixture
+def server(tmp_path):
+    save_models(scaler, models, feature_columns, str(tmp_path))
+    server = make_server(str(tmp_path), port = 0, max_wait_ms = 5)
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+    yield server, f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+def post(url, payload):
+    request = urllib.request.Request(url + '/predict', data = json.dumps(payload).encode())
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+def test_model_store_round_trip(tmp_path):
+    save_models(scaler, models, feature_columns, str(tmp_path))
+    loaded_scaler, loaded, columns = load_models(str(tmp_path), ['Decision Tree'])
+
+    assert columns == feature_columns
+    assert list(loaded) == ['Decision Tree']
+    np.testing.assert_allclose(loaded_scaler.mean_, scaler.mean_)
+    with pytest.raises(KeyError, match = 'not found'):
+        load_models(str(tmp_path), ['Random Forest'])
+
+def test_batcher_matches_models():
+    batcher = MicroBatcher(scaler, models, feature_columns, max_wait_ms = 20)
+
+    # Concurrent calls for both models are answered from shared batches
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(batcher.predict_proba, X[i:i + 5], name)
+                   for i in range(0, 100, 5) for name in models]
+        results = [future.result() for future in futures]
+
+    for k, (i, name) in enumerate((i, name) for i in range(0, 100, 5) for name in models):
+        np.testing.assert_allclose(results[k], models[name].predict_proba(X_scaled[i:i + 5])[:, 1])
+
+    metrics = batcher.metrics()
+    assert metrics['requests'] == 40
+    assert metrics['rows'] == 200
+    assert metrics['batches'] < 40
+    assert metrics['latency_p99_ms'] >= metrics['latency_p50_ms'] > 0
+
+def test_batcher_rejects_bad_input():
+    batcher = MicroBatcher(scaler, models, feature_columns)
+    with pytest.raises(ValueError, match = 'Expected rows of 4 features'):
+        batcher.predict_proba([[1.0, 2.0]])
+    with pytest.raises(KeyError, match = 'Unknown model'):
+        batcher.predict_proba(X[:1], 'Random Forest')
+    with pytest.raises(ValueError, match = 'NaN'):
+        batcher.predict_proba([[1.0, np.nan, 2.0, 3.0]])
+    with pytest.raises(ValueError, match = 'NaN'):
+        batcher.predict_proba([[1.0, None, 2.0, 3.0]])
+
+class Picky:
+    # Fails on extreme rows, which pass the input checks
+    def __init__(self, model):
+        self.model = model
+
+    def predict_proba(self, X):
+        if (np.abs(X) > 100).any():
+            raise RuntimeError('extreme row')
+        return self.model.predict_proba(X)
+
+def test_batch_failure_is_isolated():
+    batcher = MicroBatcher(scaler, {'Picky': Picky(models['Decision Tree'])}, feature_columns, max_wait_ms = 50)
+    bad = np.full((1, 4), 1e6)
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(batcher.predict_proba, rows) for rows in [X[:3], bad, X[3:6], X[6:9]]]
+        with pytest.raises(RuntimeError, match = 'extreme row'):
+            futures[1].result()
+        for i, future in zip([0, 3, 6], [futures[0], futures[2], futures[3]]):
+            expected = models['Decision Tree'].predict_proba(X_scaled[i:i + 3])[:, 1]
+            np.testing.assert_allclose(future.result(), expected)
+    assert batcher.metrics()['errors'] == 1
+
+def test_http_internal_error():
+    server = PredictionServer(('127.0.0.1', 0), PredictionHandler)
+    server.batcher = MicroBatcher(scaler, {'Picky': Picky(models['Decision Tree'])}, feature_columns)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    try:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            post(f'http://127.0.0.1:{server.server_address[1]}', {'instances': [[1e6] * 4]})
+        assert error.value.code == 500
+        assert 'extreme row' in json.loads(error.value.read())['error']
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_http_predict(server):
+    _, url = server
+    response = post(url, {'instances': X[:3].tolist(), 'model': 'Decision Tree'})
+    expected = models['Decision Tree'].predict_proba(X_scaled[:3])[:, 1]
+
+    assert response['model'] == 'Decision Tree'
+    np.testing.assert_allclose(response['probabilities'], expected)
+    assert response['labels'] == list(expected > 0.5)
+
+    records = X_df.iloc[:2].to_dict(orient = 'records')
+    np.testing.assert_allclose(post(url, {'instances': records})['probabilities'],
+                               models['Logistic Regression'].predict_proba(X_scaled[:2])[:, 1])
+
+def test_http_errors(server):
+    _, url = server
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(url, {'instances': [[1.0]]})
+    assert error.value.code == 400
+
+def test_load_test(server):
+    _, url = server
+    client = run_load_test(url, X, n_requests = 50, concurrency = 4, batch_size = 2)
+
+    assert client['requests'] == 50
+    assert client['errors'] == 0
+    assert client['rows_per_s'] > 0
+
+def test_compiled_models(tmp_path):
+    from src.compiled_trees import export_compiled
+    save_models(scaler, models, feature_columns, str(tmp_path))
+    export_compiled(str(tmp_path))
+    server = make_server(str(tmp_path), port = 0, compiled = True)
+    try:
+        proba = server.batcher.predict_proba(X[:5], model = 'Decision Tree')
+    finally:
+        server.server_close()
+    np.testing.assert_allclose(proba, models['Decision Tree'].predict_proba(X_scaled[:5])[:, 1])
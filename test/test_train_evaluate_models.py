@@ -1,7 +1,11 @@
 import pandas as pd
+import pytest
 import sys
 import os
+from sklearn.datasets import make_classification
 from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import (
     accuracy_score,
@@ -77,3 +81,58 @@ def test_train_evaluate_models():
     row = results[0]
     for key in ["Train Accuracy", "Test Accuracy", "Precision", "Recall", "F1 Score", "ROC AUC"]:
         assert 0.0 <= row[key] <= 1.0
+
+def _make_data():
+    X, y = make_classification(n_samples = 200, n_features = 5, random_state = 14)
+    return X[:150], y[:150], X[150:], y[150:]
+
+def _make_models():
+    return {
+        "Logistic Regression": LogisticRegression(max_iter = 1000, random_state = 14),
+        "Decision Tree": DecisionTreeClassifier(max_depth = 3, random_state = 14),
+        "Random Forest": RandomForestClassifier(n_estimators = 10, random_state = 14),
+    }
+
+@pytest.mark.parametrize("executor", ["thread", "process", "joblib"])
+def test_executors_match_serial(executor):
+    """
+    Every executor should return the same metrics as the serial loop, in the
+    same order as the input `models` dictionary.
+    """
+    X_train, y_train, X_test, y_test = _make_data()
+
+    serial_results, _ = train_evaluate_models(_make_models(), X_train, y_train, X_test, y_test)
+    results, trained_models = train_evaluate_models(
+        _make_models(), X_train, y_train, X_test, y_test, executor = executor, max_workers = 2
+    )
+
+    assert [row["Model"] for row in results] == list(_make_models().keys())
+    assert list(trained_models.keys()) == list(_make_models().keys())
+    for serial_row, row in zip(serial_results, results):
+        for key in ["Train Accuracy", "Test Accuracy", "Precision", "Recall", "F1 Score", "ROC AUC"]:
+            assert row[key] == pytest.approx(serial_row[key])
+
+def test_timings_reported():
+    X_train, y_train, X_test, y_test = _make_data()
+    results, _ = train_evaluate_models(_make_models(), X_train, y_train, X_test, y_test)
+
+    for row in results:
+        for key in ["Fit Wall Time (s)", "Fit CPU Time (s)", "Total Wall Time (s)", "Total CPU Time (s)"]:
+            assert row[key] >= 0.0
+        assert row["Total Wall Time (s)"] >= row["Fit Wall Time (s)"]
+
+def test_unknown_executor():
+    X_train, y_train, X_test, y_test = _make_data()
+    with pytest.raises(ValueError, match = "executor must be one of"):
+        train_evaluate_models(_make_models(), X_train, y_train, X_test, y_test, executor = "gpu")
+
+def test_bootstrap_intervals():
+    X_train, y_train, X_test, y_test = _make_data()
+    results, _ = train_evaluate_models(_make_models(), X_train, y_train, X_test, y_test, bootstrap = 200)
+
+    keys = list(results[0])
+    after = keys.index("ROC AUC") + 1
+    assert keys[after:after + 2] == ["Test Accuracy CI Low", "Test Accuracy CI High"]
+    for row in results:
+        for key in ["Test Accuracy", "Precision", "Recall", "F1 Score", "ROC AUC"]:
+            assert row[key + " CI Low"] <= row[key] <= row[key + " CI High"]
@@ -0,0 +1,77 @@
+import os
+import sys
+import numpy as np
+import pytest
+from click.testing import CliRunner
+from sklearn.datasets import make_classification
+from sklearn.model_selection import GridSearchCV, StratifiedKFold
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.analysis import build_models
+from src.tune import _rung_folds, main, tune_models
+
+X, y = make_classification(n_samples = 300, n_features = 5, weights = [0.8], random_state = 3)
+models = {'Decision Tree': DecisionTreeClassifier(random_state = 3)}
+grids = {'Decision Tree': {'max_depth': [1, 2, 4, None], 'min_samples_leaf': [1, 10]}}
+
+def test_rung_folds():
+    assert _rung_folds(5, 1, 3) == [1, 3, 5]
+    assert _rung_folds(10, 2, 2) == [2, 4, 8, 10]
+    assert _rung_folds(3, 5, 3) == [3]
+
+def test_single_rung_matches_grid_search():
+    best_params, trials = tune_models(models, grids, X, y, n_splits = 3, min_folds = 3, random_state = 0)
+
+    search = GridSearchCV(make_pipeline(StandardScaler(), DecisionTreeClassifier(random_state = 3)),
+                          {'decisiontreeclassifier__' + k: v for k, v in grids['Decision Tree'].items()},
+                          scoring = 'roc_auc', cv = StratifiedKFold(3, shuffle = True, random_state = 0))
+    search.fit(X, y)
+
+    assert (trials['Folds'] == 3).all()
+    np.testing.assert_allclose(trials['Mean Score'], search.cv_results_['mean_test_score'])
+    assert best_params['Decision Tree'] == {k.split('__')[1]: v for k, v in search.best_params_.items()}
+
+def test_successive_halving_prunes():
+    _, trials = tune_models(models, grids, X, y, n_splits = 4, eta = 2, min_folds = 1)
+
+    # 8 configurations on 1 fold, the best 4 on 2 folds, the best 2 on all 4
+    assert sorted(trials['Folds']) == [1, 1, 1, 1, 2, 2, 4, 4]
+    assert trials.loc[trials['Folds'] == 4, 'Rung'].eq(2).all()
+
+def test_process_pool_matches_serial():
+    serial = tune_models(models, grids, X, y, n_splits = 3, scoring = 'f1')
+    parallel = tune_models(models, grids, X, y, n_splits = 3, scoring = 'f1', n_jobs = 2)
+
+    assert serial[0] == parallel[0]
+    np.testing.assert_allclose(serial[1]['Mean Score'], parallel[1]['Mean Score'])
+
+def test_budget_stops_search():
+    best_params, trials = tune_models(models, grids, X, y, budget_seconds = 0)
+    assert best_params == {}
+    assert (trials['Folds'] == 0).all()
+
+def test_unknown_model_or_scoring():
+    with pytest.raises(ValueError):
+        tune_models(models, {'SVM': {'C': [1]}}, X, y)
+    with pytest.raises(ValueError):
+        tune_models(models, grids, X, y, scoring = 'log_loss')
+
+@pytest.mark.parametrize('kwargs', [{'eta': 1}, {'eta': 0}, {'min_folds': 0}])
+def test_invalid_rungs(kwargs):
+    with pytest.raises(ValueError):
+        tune_models(models, grids, X, y, **kwargs)
+
+def test_cli_rejects_eta():
+    result = CliRunner().invoke(main, ['train.csv', 'out', '--eta', '1'])
+    assert result.exit_code == 2 and '--eta' in result.output
+
+def test_build_models_params():
+    tuned = build_models({'Decision Tree': {'max_depth': 3}})
+    assert tuned['Decision Tree'].max_depth == 3
+    assert tuned['Random Forest'].max_depth == 15
+    with pytest.raises(KeyError):
+        build_models({'SVM': {'C': 1}})
@@ -4,7 +4,8 @@ import pandera as pa
 import pytest
 import json
 import logging
-from src.val_data_handle_error import val_data_handle_error
+import numpy as np
+from src.val_data_handle_error import drop_invalid_rows, val_data_handle_error
 
 # Configure logging to capture output, similar to the example image
 logging.basicConfig(level=logging.INFO)
@@ -97,3 +98,59 @@ def test_val_data_handle_error():
     assert error_cases_valid is None
     
     LOGGER.info("Fully Valid Data Test Passed.")
+
+def test_engine_failures_dropped():
+    """
+    Failure cases returned by an engine are handled like the schema's own failures.
+    """
+    from src.validation_engine import FAILURE_CASE_COLUMNS
+
+    df_in = pd.DataFrame({
+        "id_col": [1, 2, 3],
+        "value_col": ["Good", "Bad", "Good"],
+        "score_col": [1.0, 2.0, 3.0]
+    })
+
+    def engine(df):
+        return pd.DataFrame([["Column", "score_col", "custom", 0, 2.0, 1]], columns = FAILURE_CASE_COLUMNS)
+
+    validated_df = val_data_handle_error(df_in, schema, engine = engine)
+
+    assert list(validated_df["id_col"]) == [1, 3]
+
+@pytest.mark.parametrize("seed", range(5))
+def test_drop_invalid_rows_matches_chained_drops(seed):
+    """
+    One filtering pass gives the frame, index included, of the chained drop/reset/dedupe/dropna.
+    """
+    rng = np.random.default_rng(seed)
+    df_in = pd.DataFrame(rng.choice([0.0, -0.0, 1.0, np.nan], size = (60, 2)), columns = ["a", "b"],
+                         index = rng.permutation(60) * 3)
+    df_in["s"] = rng.choice(["x", None], size = 60)
+    invalid = rng.random(60) < 0.3
+
+    expected = (df_in.drop(index = df_in.index[invalid])
+                .reset_index(drop = True)
+                .drop_duplicates()
+                .dropna(how = "all"))
+    tm.assert_frame_equal(drop_invalid_rows(df_in, invalid), expected, check_index_type = True)
+
+    # Nothing dropped after the invalid rows keeps a RangeIndex, like reset_index
+    unique = pd.DataFrame({"a": np.arange(10.0)})
+    tm.assert_frame_equal(drop_invalid_rows(unique, np.arange(10) < 3), unique.iloc[3:].reset_index(drop = True),
+                          check_index_type = True)
+
+def test_failure_log_is_capped(caplog):
+    df_in = pd.DataFrame({
+        "id_col": np.arange(1, 1001),
+        "value_col": "Good",
+        "score_col": np.where(np.arange(1000) % 2, 50.0, 1.0)
+    })
+
+    with caplog.at_level(logging.ERROR):
+        validated_df = val_data_handle_error(df_in, schema, max_cases = 3)
+
+    assert list(validated_df["id_col"]) == list(range(1, 1001, 2))
+    errors = json.loads(caplog.records[-1].getMessage())["DATA"]["DATAFRAME_CHECK"]
+    assert errors[0]["failure_count"] == 500
+    assert len(errors[0]["sample_index"]) == 3
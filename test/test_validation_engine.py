@@ -0,0 +1,101 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.validation_engine import (
+    FAILURE_CASE_COLUMNS,
+    FailureMask,
+    iqr_bounds,
+    outlier_failure_cases,
+    wine_failure_cases,
+    wine_failures,
+    correlation_failure_cases,
+    failure_message,
+)
+
+rng = np.random.default_rng(14)
+df = pd.DataFrame({
+    'alcohol': rng.normal(10, 1, 200),
+    'pH': rng.normal(3.3, 0.1, 200),
+    'quality': rng.integers(3, 9, 200),
+})
+df.loc[[5, 40], 'alcohol'] = [30.0, -10.0]
+df.loc[7, 'pH'] = np.nan
+df['quality_binary'] = df['quality'] >= 7
+
+def test_iqr_bounds_match_pandas():
+    lower, upper = iqr_bounds(df[['alcohol', 'pH']].to_numpy(), iqr_mult = 3)
+
+    q1 = df[['alcohol', 'pH']].quantile(0.25)
+    q3 = df[['alcohol', 'pH']].quantile(0.75)
+    np.testing.assert_allclose(lower, q1 - 3 * (q3 - q1))
+    np.testing.assert_allclose(upper, q3 + 3 * (q3 - q1))
+
+def test_outliers():
+    cases = outlier_failure_cases(df, ['alcohol', 'pH'])
+
+    assert list(cases.columns) == FAILURE_CASE_COLUMNS
+    assert list(cases['index']) == [5, 40]
+    assert list(cases['failure_case']) == [30.0, -10.0]
+    assert set(cases['column']) == {'alcohol'}
+
+def test_duplicates_reported_without_index():
+    dup = pd.concat([df, df.iloc[[0]]], ignore_index = True)
+    cases = wine_failure_cases(dup, ['alcohol', 'pH'])
+
+    dup_cases = cases[cases['check'] == 'Duplicate rows detected.']
+    assert len(dup_cases) == 1
+    assert dup_cases['index'].isna().all()
+
+def test_correlation_checks():
+    assert correlation_failure_cases(df).empty
+
+    correlated = df.assign(acid = df['alcohol'] * 2 + 1)
+    cases = correlation_failure_cases(correlated)
+    assert list(cases['check']) == ['feature_corr_check']
+
+    leaky = df.assign(leak = df['quality_binary'].astype(float))
+    assert 'target_corr_check' in set(correlation_failure_cases(leaky)['check'])
+
+def test_failure_message():
+    message = failure_message(outlier_failure_cases(df, ['alcohol', 'pH']))
+    errors = message['DATA']['DATAFRAME_CHECK']
+
+    assert len(errors) == 1
+    assert errors[0]['column'] == 'alcohol'
+    assert '30.0' in errors[0]['error']
+
+def test_wine_failures_match_failure_cases():
+    dup = pd.concat([df, df.iloc[[0]]], ignore_index = True)
+    failures = wine_failures(dup, ['alcohol', 'pH'])
+    cases = wine_failure_cases(dup, ['alcohol', 'pH'])
+
+    np.testing.assert_array_equal(failures.invalid, dup.index.isin(cases['index'].dropna()))
+    summary = lambda errors: [(e['column'], e['check'], e['failure_count'], e['sample_index']) for e in errors]
+    assert (summary(failures.message()['DATA']['DATAFRAME_CHECK'])
+            == summary(failure_message(cases)['DATA']['DATAFRAME_CHECK']))
+    assert not wine_failures(df.drop(index = [5, 40]), ['alcohol', 'pH']).invalid.any()
+
+def test_failure_mask_caps_cases():
+    values = np.arange(1000.0)
+    failures = FailureMask(pd.RangeIndex(1000) * 2, max_cases = 5)
+    failures.add('outlier_check', 'alcohol', np.arange(0, 1000, 2), values[::2])
+    failures.add('Duplicate rows detected.')
+    assert failures and failures.invalid.sum() == 500
+
+    outliers, duplicates = failures.message()['DATA']['DATAFRAME_CHECK']
+    assert outliers['failure_count'] == 500
+    # Evenly spaced over all failures, labelled by the frame's index
+    assert outliers['sample_index'] == [0, 500, 1000, 1496, 1996]
+    assert outliers['error'].endswith('failure cases: 0.0, 250.0, 500.0, 748.0, 998.0 and 495 more')
+    assert duplicates['column'] is None and duplicates['failure_count'] == 1
+
+    # Merged counts of two masks of one frame, still capped
+    other = FailureMask(failures.index, max_cases = 5).add('outlier_check', 'alcohol', np.array([1]), [1.0])
+    failures.update(other)
+    assert failures.checks[('Column', 'alcohol', 'outlier_check', 0)]['count'] == 501
+    assert failures.invalid.sum() == 501
+    assert len(failures.message()['DATA']['DATAFRAME_CHECK'][0]['sample_index']) == 5
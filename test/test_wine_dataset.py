@@ -0,0 +1,72 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.frame_io import write_frame
+from src.read_csv import FEATURE_DTYPES
+from src.wine_dataset import WineDataset, as_dataset, main, memory_report
+
+feature_columns = list(FEATURE_DTYPES)
+rng = np.random.default_rng(11)
+df = pd.DataFrame(np.round(rng.uniform(0.1, 15, size = (203, len(feature_columns))), 3), columns = feature_columns)
+df['quality'] = rng.integers(3, 9, size = 203)
+df['quality_binary'] = df['quality'] >= 7
+
+def test_from_frame():
+    dataset = WineDataset.from_frame(df, feature_columns)
+    assert len(dataset) == 203
+    assert dataset.X.dtype == np.float32 and dataset.X.flags['C_CONTIGUOUS']
+    assert dataset.X.shape == (203, len(feature_columns))
+    np.testing.assert_allclose(dataset.X, df[feature_columns].to_numpy(), rtol = 1e-6)
+    np.testing.assert_array_equal(dataset.y, df['quality_binary'])
+    assert dataset.y.dtype == bool
+    # One bit per target value
+    assert dataset.target_bits.nbytes == 26
+
+    exact = WineDataset.from_frame(df, feature_columns, dtype = 'float64')
+    np.testing.assert_array_equal(exact.X, df[feature_columns].to_numpy())
+
+def test_views():
+    dataset = WineDataset.from_frame(df, feature_columns)
+    assert np.shares_memory(dataset.column('alcohol'), dataset.X)
+    np.testing.assert_allclose(dataset.column('alcohol'), df['alcohol'], rtol = 1e-6)
+
+    adjacent = dataset.select(['citric acid', 'residual sugar', 'chlorides'])
+    assert np.shares_memory(adjacent, dataset.X)
+    shuffled = dataset.select(['alcohol', 'pH'])
+    assert not np.shares_memory(shuffled, dataset.X)
+    np.testing.assert_allclose(shuffled, df[['alcohol', 'pH']].to_numpy(), rtol = 1e-6)
+
+    frame = dataset.frame()
+    assert list(frame.columns) == feature_columns + ['quality_binary']
+    assert np.shares_memory(frame['density'].to_numpy(), dataset.X)
+    assert list(dataset.frame(target = None).columns) == feature_columns
+
+def test_rows():
+    dataset = WineDataset.from_frame(df, feature_columns)
+    part = dataset.rows(5, 150)
+    assert len(part) == 145
+    assert np.shares_memory(part.X, dataset.X)
+    np.testing.assert_array_equal(part.y, df['quality_binary'].to_numpy()[5:150])
+    assert len(dataset.rows(200)) == 3
+
+def test_as_dataset_and_memory_report():
+    dataset = as_dataset(df, feature_columns)
+    assert as_dataset(dataset, feature_columns) is dataset
+    report = memory_report(df, dataset)
+    assert report['rows'] == 203
+    assert report['dataset_mb'] == pytest.approx(dataset.nbytes / 2 ** 20)
+    # 11 float64, an int64 and a bool column against 11 float32 and a bit
+    assert report['ratio'] > 2
+
+def test_main(tmp_path):
+    path = str(tmp_path / 'raw.feather')
+    write_frame(df.drop(columns = 'quality_binary'), path)
+    result = CliRunner().invoke(main, [path])
+    assert result.exit_code == 0, result.output
+    assert '203 rows' in result.output and 'smaller' in result.output